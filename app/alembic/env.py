@@ -3,11 +3,13 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 import os
+import re
 import sys
 
 # Adicionar o diretório atual ao path (onde está a pasta app)
 sys.path.append(os.path.dirname(__file__))
 
+from core.config import settings
 from core.database import Base
 from models import *  # Importar todos os modelos
 
@@ -15,6 +17,9 @@ from models import *  # Importar todos os modelos
 # access to the values within the .ini file in use.
 config = context.config
 
+# Mesma URL da aplicação (DATABASE_URL), em vez da fixada no alembic.ini
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -24,6 +29,18 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Partições mensais ({tabela}_AAAAMM) e default ({tabela}_default) ficam fora dos modelos
+PARTITIONED_TABLES = [
+    table.name for table in target_metadata.tables.values()
+    if table.dialect_options["postgresql"].get("partition_by")
+]
+PARTITION_NAME = re.compile(rf"^({'|'.join(map(re.escape, PARTITIONED_TABLES)) or '(?!)'})_(\d{{6}}|default)$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and reflected and compare_to is None and PARTITION_NAME.match(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -46,6 +63,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -69,7 +87,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
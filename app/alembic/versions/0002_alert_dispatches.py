@@ -0,0 +1,43 @@
+"""alert dispatches
+
+Registro dos alertas de manutenção e CNH já disparados e índices parciais
+das varreduras do beat
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-20 16:05:12.340871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('alert_dispatches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('alert_type', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('reference_date', sa.Date(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('alert_type', 'entity_id', 'reference_date', name='uq_alert_dispatches_entity')
+    )
+    op.create_index(op.f('ix_alert_dispatches_id'), 'alert_dispatches', ['id'], unique=False)
+    op.create_index('ix_drivers_cnh_expiry_id', 'drivers', ['cnh_expiry', 'id'], unique=False, postgresql_where=sa.text('is_active'))
+    op.create_index('ix_maintenances_pending_date_id', 'maintenances', ['maintenance_date', 'id'], unique=False, postgresql_where=sa.text('NOT is_completed'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_maintenances_pending_date_id', table_name='maintenances', postgresql_where=sa.text('NOT is_completed'))
+    op.drop_index('ix_drivers_cnh_expiry_id', table_name='drivers', postgresql_where=sa.text('is_active'))
+    op.drop_index(op.f('ix_alert_dispatches_id'), table_name='alert_dispatches')
+    op.drop_table('alert_dispatches')
@@ -0,0 +1,29 @@
+"""tenant rate limits
+
+Limites de requisições por minuto customizáveis por tenant (nulo = padrão
+das settings)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-20 16:06:48.915204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tenants', sa.Column('rate_limit_per_minute', sa.Integer(), nullable=True))
+    op.add_column('tenants', sa.Column('heavy_rate_limit_per_minute', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tenants', 'heavy_rate_limit_per_minute')
+    op.drop_column('tenants', 'rate_limit_per_minute')
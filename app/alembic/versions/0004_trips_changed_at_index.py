@@ -0,0 +1,32 @@
+"""trips changed_at index
+
+Índice de (tenant_id, coalesce(updated_at, created_at)) para a atualização
+incremental do cubo de analytics
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 18:02:41.512337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_trips_tenant_changed_at',
+        'trips',
+        ['tenant_id', sa.text('coalesce(updated_at, created_at)')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trips_tenant_changed_at', table_name='trips')
@@ -0,0 +1,27 @@
+"""trip cargo weight
+
+Peso da carga da viagem (toneladas), usado pela otimização de despacho
+para respeitar a capacidade dos veículos
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 19:11:05.204718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('trips', sa.Column('cargo_weight', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('trips', 'cargo_weight')
@@ -0,0 +1,48 @@
+"""distance cache and route coordinates
+
+Cache persistente de distâncias/durações entre pontos (com expiração) e
+coordenadas opcionais de origem/destino nas rotas
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 20:03:47.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('distance_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('origin_key', sa.String(), nullable=False),
+    sa.Column('destination_key', sa.String(), nullable=False),
+    sa.Column('distance_km', sa.Float(), nullable=False),
+    sa.Column('duration_hours', sa.Float(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('origin_key', 'destination_key', name='uq_distance_cache_pair')
+    )
+    op.create_index(op.f('ix_distance_cache_id'), 'distance_cache', ['id'], unique=False)
+    op.add_column('routes', sa.Column('origin_latitude', sa.Float(), nullable=True))
+    op.add_column('routes', sa.Column('origin_longitude', sa.Float(), nullable=True))
+    op.add_column('routes', sa.Column('destination_latitude', sa.Float(), nullable=True))
+    op.add_column('routes', sa.Column('destination_longitude', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('routes', 'destination_longitude')
+    op.drop_column('routes', 'destination_latitude')
+    op.drop_column('routes', 'origin_longitude')
+    op.drop_column('routes', 'origin_latitude')
+    op.drop_index(op.f('ix_distance_cache_id'), table_name='distance_cache')
+    op.drop_table('distance_cache')
@@ -0,0 +1,48 @@
+"""geocoding cache and client/tenant coordinates
+
+Cache persistente de geocodificação por endereço normalizado e coordenadas
+(com data da geocodificação) em clientes e tenants
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 21:12:05.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('geocode_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('address_key', sa.Text(), nullable=False),
+    sa.Column('query', sa.Text(), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('address_key')
+    )
+    op.create_index(op.f('ix_geocode_cache_id'), 'geocode_cache', ['id'], unique=False)
+    for table in ('clients', 'tenants'):
+        op.add_column(table, sa.Column('latitude', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('longitude', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('geocoded_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('tenants', 'clients'):
+        op.drop_column(table, 'geocoded_at')
+        op.drop_column(table, 'longitude')
+        op.drop_column(table, 'latitude')
+    op.drop_index(op.f('ix_geocode_cache_id'), table_name='geocode_cache')
+    op.drop_table('geocode_cache')
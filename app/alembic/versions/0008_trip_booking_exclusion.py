@@ -0,0 +1,51 @@
+"""trip booking exclusion constraints
+
+Restrições de exclusão (GiST sobre ranges) contra viagens ativas sobrepostas do
+mesmo motorista ou veículo; os índices também atendem às buscas de conflito
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 22:05:31.774102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+BOOKING_PERIOD = "tsrange(departure_date, greatest(estimated_arrival, departure_date), '[)')"
+BOOKING_ACTIVE = "status IN ('PLANNED', 'IN_TRANSIT')"
+
+
+def upgrade() -> None:
+    # Sobreposições já existentes impediriam a criação das restrições: falhar com a lista
+    for column in ('driver_id', 'vehicle_id'):
+        conflicts = op.get_bind().execute(sa.text(f"""
+            SELECT a.id, b.id FROM trips a JOIN trips b ON a.{column} = b.{column} AND a.id < b.id
+             WHERE tsrange(a.departure_date, greatest(a.estimated_arrival, a.departure_date), '[)')
+                && tsrange(b.departure_date, greatest(b.estimated_arrival, b.departure_date), '[)')
+               AND a.status IN ('PLANNED', 'IN_TRANSIT') AND b.status IN ('PLANNED', 'IN_TRANSIT')
+             LIMIT 20
+        """)).all()
+        if conflicts:
+            raise RuntimeError(
+                f"Viagens ativas sobrepostas para o mesmo {column} (reagende ou cancele antes de migrar): "
+                + ", ".join(f"{a}x{b}" for a, b in conflicts)
+            )
+
+    for column in ('driver_id', 'vehicle_id'):
+        op.execute(f"""
+            ALTER TABLE trips ADD CONSTRAINT ex_trips_{column.removesuffix('_id')}_booking
+            EXCLUDE USING gist (int4range({column}, {column}, '[]') WITH =, {BOOKING_PERIOD} WITH &&)
+            WHERE ({BOOKING_ACTIVE}) DEFERRABLE INITIALLY DEFERRED
+        """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('ex_trips_vehicle_booking', 'trips')
+    op.drop_constraint('ex_trips_driver_booking', 'trips')
@@ -0,0 +1,51 @@
+"""vehicle positions (partitioned)
+
+Posições GPS dos veículos em tabela particionada por mês (recorded_at); as
+partições seguintes são criadas pelo beat (maintain_position_partitions) e
+pelos consumidores do stream quando chega um mês novo
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 23:40:12.519204
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Mês corrente e os dois seguintes (GPS_PARTITIONS_AHEAD_MONTHS)
+INITIAL_MONTHS = 3
+
+
+def upgrade() -> None:
+    op.create_table('vehicle_positions',
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('speed_kmh', sa.Float(), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('vehicle_id', 'recorded_at', name='pk_vehicle_positions'),
+    postgresql_partition_by='RANGE (recorded_at)'
+    )
+    today = date.today()
+    for i in range(INITIAL_MONTHS):
+        index = today.year * 12 + today.month - 1 + i
+        month, following = date(index // 12, index % 12 + 1, 1), date((index + 1) // 12, (index + 1) % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE vehicle_positions_{month:%Y%m} PARTITION OF vehicle_positions "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{following:%Y-%m-%d} 00:00:00+00')"
+        )
+
+
+def downgrade() -> None:
+    # Remove também todas as partições
+    op.drop_table('vehicle_positions')
@@ -0,0 +1,64 @@
+"""tenant row level security
+
+Índices iniciados por tenant_id e políticas de RLS nas tabelas com tenant: com
+app.tenant_id definido (sessões por tenant) só as linhas do tenant são visíveis
+e graváveis; sem a variável (workers, migrations) o acesso não muda.
+
+Superusuários e roles com BYPASSRLS ignoram as políticas: a aplicação deve
+conectar com um role comum (dono das tabelas, por isso FORCE ROW LEVEL SECURITY).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 10:12:08.413950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+TENANT_TABLES = (
+    'users', 'clients', 'drivers', 'vehicles', 'routes', 'trips',
+    'maintenances', 'alert_dispatches', 'vehicle_positions',
+)
+ID_INDEXED_TABLES = ('clients', 'drivers', 'vehicles', 'routes', 'maintenances')
+
+# Variável local à transação (set_config(..., true)); vazia ou ausente = sem escopo
+CURRENT_TENANT_FUNCTION = """
+CREATE OR REPLACE FUNCTION current_tenant_id() RETURNS integer
+LANGUAGE sql STABLE PARALLEL SAFE
+AS $$ SELECT NULLIF(current_setting('app.tenant_id', true), '')::integer $$
+"""
+
+TENANT_CHECK = "current_tenant_id() IS NULL OR tenant_id = current_tenant_id()"
+
+
+def upgrade() -> None:
+    op.create_index('ix_trips_tenant_status', 'trips', ['tenant_id', 'status'], unique=False)
+    op.create_index('ix_trips_tenant_created_at', 'trips', ['tenant_id', 'created_at'], unique=False)
+    for table in ID_INDEXED_TABLES:
+        op.create_index(f'ix_{table}_tenant_id_id', table, ['tenant_id', 'id'], unique=False)
+
+    op.execute(CURRENT_TENANT_FUNCTION)
+    for table in TENANT_TABLES:
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+        op.execute(f"CREATE POLICY tenant_isolation ON {table} USING ({TENANT_CHECK}) WITH CHECK ({TENANT_CHECK})")
+
+
+def downgrade() -> None:
+    for table in TENANT_TABLES:
+        op.execute(f"DROP POLICY IF EXISTS tenant_isolation ON {table}")
+        op.execute(f"ALTER TABLE {table} NO FORCE ROW LEVEL SECURITY")
+        op.execute(f"ALTER TABLE {table} DISABLE ROW LEVEL SECURITY")
+    op.execute("DROP FUNCTION IF EXISTS current_tenant_id()")
+
+    for table in reversed(ID_INDEXED_TABLES):
+        op.drop_index(f'ix_{table}_tenant_id_id', table_name=table)
+    op.drop_index('ix_trips_tenant_created_at', table_name='trips')
+    op.drop_index('ix_trips_tenant_status', table_name='trips')
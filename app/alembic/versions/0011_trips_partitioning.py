@@ -0,0 +1,217 @@
+"""trips partitioning
+
+Viagens em tabela particionada por mês de departure_date (trips_AAAAMM, criadas
+pelo beat em maintain_trip_partitions) com partição default para datas fora
+do horizonte. A PK passa a ser (id, departure_date): a chave de partição
+precisa fazer parte dela; o id continua único pela sequência compartilhada.
+
+Restrições de exclusão não podem ser criadas na tabela particionada (e por
+partição não pegariam sobreposições entre meses): as reservas das viagens
+ativas vão para trip_bookings, mantida pelo trigger trips_sync_booking.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-20 14:31:55.208417
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+# Mês corrente e os doze seguintes (TRIPS_PARTITIONS_AHEAD_MONTHS)
+INITIAL_MONTHS = 13
+
+BOOKING_PERIOD = "tsrange(departure_date, greatest(estimated_arrival, departure_date), '[)')"
+BOOKING_ACTIVE = "status IN ('PLANNED', 'IN_TRANSIT')"
+TENANT_CHECK = "current_tenant_id() IS NULL OR tenant_id = current_tenant_id()"
+
+TRIP_COLUMNS = (
+    'id', 'tenant_id', 'client_id', 'driver_id', 'vehicle_id', 'route_id',
+    'departure_date', 'estimated_arrival', 'actual_departure', 'actual_arrival', 'status',
+    'estimated_fuel_cost', 'estimated_toll_cost', 'actual_fuel_cost', 'actual_toll_cost',
+    'daily_allowance_cost', 'other_costs', 'freight_revenue', 'cargo_weight', 'notes',
+    'created_at', 'updated_at',
+)
+BOOKING_COLUMNS = ('trip_id', 'tenant_id', 'driver_id', 'vehicle_id', 'departure_date', 'estimated_arrival')
+
+# Reserva acompanha a viagem: sai em DELETE/UPDATE e volta se a viagem segue ativa.
+# UPDATE que troca de partição chega como DELETE + INSERT.
+SYNC_BOOKING_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION sync_trip_booking() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM trip_bookings WHERE trip_id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.{BOOKING_ACTIVE} THEN
+        INSERT INTO trip_bookings ({', '.join(BOOKING_COLUMNS)})
+        VALUES (NEW.id, NEW.tenant_id, NEW.driver_id, NEW.vehicle_id, NEW.departure_date, NEW.estimated_arrival);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+SYNC_BOOKING_TRIGGER = """
+CREATE TRIGGER trips_sync_booking
+AFTER INSERT OR DELETE OR UPDATE OF tenant_id, driver_id, vehicle_id, departure_date, estimated_arrival, status
+ON trips FOR EACH ROW EXECUTE FUNCTION sync_trip_booking()
+"""
+
+
+def _month_partition(month: date) -> str:
+    index = month.year * 12 + month.month
+    following = date(index // 12, index % 12 + 1, 1)
+    return (
+        f"CREATE TABLE trips_{month:%Y%m} PARTITION OF trips "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{following:%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def _enable_row_security(table: str) -> None:
+    op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+    op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+    op.execute(f"CREATE POLICY tenant_isolation ON {table} USING ({TENANT_CHECK}) WITH CHECK ({TENANT_CHECK})")
+
+
+def _create_trip_indexes() -> None:
+    op.create_index(op.f('ix_trips_id'), 'trips', ['id'], unique=False)
+    op.create_index('ix_trips_tenant_changed_at', 'trips', ['tenant_id', sa.text('coalesce(updated_at, created_at)')], unique=False)
+    op.create_index('ix_trips_tenant_status', 'trips', ['tenant_id', 'status'], unique=False)
+    op.create_index('ix_trips_tenant_created_at', 'trips', ['tenant_id', 'created_at'], unique=False)
+
+
+def _detach_trips() -> None:
+    """Renomear trips para trips_old, liberando nomes de índices, PK e sequência"""
+    op.execute("DROP POLICY IF EXISTS tenant_isolation ON trips")
+    op.rename_table('trips', 'trips_old')
+    for index in ('ix_trips_tenant_created_at', 'ix_trips_tenant_status', 'ix_trips_tenant_changed_at', 'ix_trips_id'):
+        op.drop_index(index, table_name='trips_old')
+    op.execute("ALTER TABLE trips_old DROP CONSTRAINT trips_pkey")
+    op.execute("ALTER TABLE trips_old ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE trips_id_seq OWNED BY NONE")
+
+
+def _trip_columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('trips_id_seq'::regclass)"), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('route_id', sa.Integer(), nullable=False),
+        sa.Column('departure_date', sa.DateTime(), nullable=False),
+        sa.Column('estimated_arrival', sa.DateTime(), nullable=False),
+        sa.Column('actual_departure', sa.DateTime(), nullable=True),
+        sa.Column('actual_arrival', sa.DateTime(), nullable=True),
+        sa.Column('status', postgresql.ENUM('PLANNED', 'IN_TRANSIT', 'COMPLETED', 'CANCELLED', name='tripstatus', create_type=False), nullable=True),
+        sa.Column('estimated_fuel_cost', sa.Float(), nullable=False),
+        sa.Column('estimated_toll_cost', sa.Float(), nullable=False),
+        sa.Column('actual_fuel_cost', sa.Float(), nullable=True),
+        sa.Column('actual_toll_cost', sa.Float(), nullable=True),
+        sa.Column('daily_allowance_cost', sa.Float(), nullable=True),
+        sa.Column('other_costs', sa.Float(), nullable=True),
+        sa.Column('freight_revenue', sa.Float(), nullable=True),
+        sa.Column('cargo_weight', sa.Float(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ),
+        sa.ForeignKeyConstraint(['driver_id'], ['drivers.id'], ),
+        sa.ForeignKeyConstraint(['route_id'], ['routes.id'], ),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    ]
+
+
+def _copy_trips() -> None:
+    columns = ', '.join(TRIP_COLUMNS)
+    op.execute(f"INSERT INTO trips ({columns}) SELECT {columns} FROM trips_old")
+    op.execute("ALTER SEQUENCE trips_id_seq OWNED BY trips.id")
+    op.drop_table('trips_old')
+
+
+def upgrade() -> None:
+    op.create_table('trip_bookings',
+    sa.Column('trip_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('driver_id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False),
+    sa.Column('departure_date', sa.DateTime(), nullable=False),
+    sa.Column('estimated_arrival', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['driver_id'], ['drivers.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('trip_id')
+    )
+    for column in ('driver_id', 'vehicle_id'):
+        op.execute(f"""
+            ALTER TABLE trip_bookings ADD CONSTRAINT ex_trip_bookings_{column.removesuffix('_id')}
+            EXCLUDE USING gist (int4range({column}, {column}, '[]') WITH =, {BOOKING_PERIOD} WITH &&)
+            DEFERRABLE INITIALLY DEFERRED
+        """)
+    _enable_row_security('trip_bookings')
+
+    _detach_trips()
+    op.execute("ALTER TABLE trips_old DROP CONSTRAINT ex_trips_vehicle_booking")
+    op.execute("ALTER TABLE trips_old DROP CONSTRAINT ex_trips_driver_booking")
+
+    op.create_table('trips',
+    *_trip_columns(),
+    sa.PrimaryKeyConstraint('id', 'departure_date', name='trips_pkey'),
+    postgresql_partition_by='RANGE (departure_date)'
+    )
+    _create_trip_indexes()
+
+    # Meses com viagens já cadastradas + horizonte inicial; o resto cai em trips_default
+    months = {
+        row[0] for row in op.get_bind().execute(sa.text(
+            "SELECT DISTINCT date_trunc('month', departure_date)::date FROM trips_old"
+        ))
+    }
+    today = date.today()
+    for i in range(INITIAL_MONTHS):
+        index = today.year * 12 + today.month - 1 + i
+        months.add(date(index // 12, index % 12 + 1, 1))
+    for month in sorted(months):
+        op.execute(_month_partition(month))
+    op.execute("CREATE TABLE trips_default PARTITION OF trips DEFAULT")
+
+    _copy_trips()
+    op.execute(
+        f"INSERT INTO trip_bookings ({', '.join(BOOKING_COLUMNS)}) "
+        f"SELECT id, tenant_id, driver_id, vehicle_id, departure_date, estimated_arrival FROM trips WHERE {BOOKING_ACTIVE}"
+    )
+    op.execute(SYNC_BOOKING_FUNCTION)
+    op.execute(SYNC_BOOKING_TRIGGER)
+    _enable_row_security('trips')
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER trips_sync_booking ON trips")
+    op.execute("DROP FUNCTION sync_trip_booking()")
+    _detach_trips()
+
+    op.create_table('trips',
+    *_trip_columns(),
+    sa.PrimaryKeyConstraint('id', name='trips_pkey')
+    )
+    _create_trip_indexes()
+    # Remove também todas as partições
+    _copy_trips()
+    for column in ('driver_id', 'vehicle_id'):
+        op.execute(f"""
+            ALTER TABLE trips ADD CONSTRAINT ex_trips_{column.removesuffix('_id')}_booking
+            EXCLUDE USING gist (int4range({column}, {column}, '[]') WITH =, {BOOKING_PERIOD} WITH &&)
+            WHERE ({BOOKING_ACTIVE}) DEFERRABLE INITIALLY DEFERRED
+        """)
+    _enable_row_security('trips')
+    op.drop_table('trip_bookings')
@@ -1,11 +1,15 @@
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import setup_logging as celery_setup_logging, worker_process_init
 from .config import settings
+from .logging import setup_logging, reinit_logging_after_fork
+from .query_tracker import register_celery_signals
 
 celery_app = Celery(
     "tms",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["tasks.reports", "tasks.maintenance"]
+    include=["tasks.reports", "tasks.maintenance", "tasks.analytics", "tasks.geocoding", "tasks.telemetry", "tasks.trips"]
 )
 
 celery_app.conf.update(
@@ -17,4 +21,47 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
-)
\ No newline at end of file
+)
+
+
+@celery_setup_logging.connect(weak=False)
+def _configure_logging(**kwargs):
+    # Conectar este sinal impede o Celery de reconfigurar o logger raiz
+    setup_logging()
+
+
+@worker_process_init.connect(weak=False)
+def _configure_child_logging(**kwargs):
+    reinit_logging_after_fork()
+
+
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    register_celery_signals()
+
+# Tarefas periódicas (executadas pelo celery beat)
+celery_app.conf.beat_schedule = {
+    "scan-due-maintenances": {
+        "task": "tasks.maintenance.scan_due_maintenances",
+        "schedule": crontab(minute=0),  # a cada hora
+    },
+    "scan-expiring-cnh": {
+        "task": "tasks.maintenance.scan_expiring_cnh",
+        "schedule": crontab(minute=30, hour="*/6"),
+    },
+    "refresh-revenue-forecasts": {
+        "task": "tasks.analytics.refresh_revenue_forecasts",
+        "schedule": crontab(minute=15, hour=3),  # diariamente, fora do horário comercial
+    },
+    "geocode-pending-addresses": {
+        "task": "tasks.geocoding.geocode_pending_addresses",
+        "schedule": crontab(minute="*/30"),
+    },
+    "maintain-position-partitions": {
+        "task": "tasks.telemetry.maintain_position_partitions",
+        "schedule": crontab(minute=45, hour=2),
+    },
+    "maintain-trip-partitions": {
+        "task": "tasks.trips.maintain_trip_partitions",
+        "schedule": crontab(minute=50, hour=2),
+    },
+}
@@ -0,0 +1,181 @@
+import zlib
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, apenas gzip
+    brotli = None
+
+# Conteúdo já comprimido (arquivos de relatório, imagens) ou que precisa chegar
+# sem buffer no cliente (SSE) não passa pela compressão
+UNCOMPRESSIBLE_CONTENT_TYPES = (
+    "application/gzip",
+    "application/octet-stream",
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument",
+    "application/x-gzip",
+    "application/zip",
+    "audio/",
+    "image/",
+    "text/event-stream",
+    "video/",
+)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Qualidade (q) de cada codificação citada pelo cliente, inclusive q=0 (recusada)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolher a codificação suportada de maior q; brotli só desempata"""
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    # Maior q vence; com q igual, brotli
+    encoding = max(supported, key=lambda name: (accepted.get(name, wildcard), name == "br"))
+    quality = accepted.get(encoding, wildcard)
+    # identity preferida explicitamente às demais: sem compressão
+    if quality <= 0 or accepted.get("identity", 0.0) > quality:
+        return None
+    return encoding
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabeçalho + CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _make_compressor(encoding: str):
+    if encoding == "br":
+        return _BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    return _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return not content_type.startswith(UNCOMPRESSIBLE_CONTENT_TYPES)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI de compressão gzip/brotli negociada por Accept-Encoding
+
+    - Respostas abaixo de COMPRESSION_MINIMUM_SIZE seguem sem compressão
+    - Corpos em vários pedaços (streaming) são comprimidos pedaço a pedaço;
+      só os primeiros pedaços, até o tamanho mínimo, ficam em memória
+    """
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = minimum_size or settings.COMPRESSION_MINIMUM_SIZE
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "HEAD"
+            or scope["path"].startswith(tuple(settings.COMPRESSION_EXCLUDED_PREFIXES))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+        pending: List[bytes] = []
+        pending_size = 0
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough, pending_size
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = not _is_compressible(headers)
+                if passthrough:
+                    await send(message)
+                else:
+                    # Adiar o início até saber se o corpo atinge o tamanho mínimo
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                pending.append(body)
+                pending_size += len(body)
+                if more_body and pending_size < self.minimum_size:
+                    return
+
+                body = b"".join(pending)
+                pending.clear()
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+
+                compressor = _make_compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                compressed = compressor.compress(body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    compressed += compressor.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+                return
+
+            compressed = compressor.compress(body)
+            if not more_body:
+                compressed += compressor.finish()
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
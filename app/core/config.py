@@ -1,10 +1,15 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql://tms_user:tms_password@db:5432/tms_db"
+    DB_PARALLEL_QUERY_WORKERS: int = 4  # consultas independentes em paralelo (conexões extras do pool)
+    DB_POOL_SIZE: int = 10  # conexões mantidas abertas por processo
+    # Rotas síncronas simultâneas (threadpool do anyio); cada uma usa uma conexão. O pool
+    # comporta API_THREADPOOL_SIZE + DB_PARALLEL_QUERY_WORKERS conexões (ver core/database.py)
+    API_THREADPOOL_SIZE: int = 40
     
     # Redis
     REDIS_URL: str = "redis://redis:6379"
@@ -24,10 +29,15 @@ class Settings(BaseSettings):
     
     # File Storage
     REPORTS_DIR: str = "/app/reports"
+    REPORT_PROGRESS_INTERVAL_SECONDS: float = 0.5  # intervalo mínimo entre atualizações de progresso publicadas
+    REPORT_PROGRESS_TTL_SECONDS: int = 24 * 3600
     
     # v3.0 - Novas configurações
     # Multi-tenant
     DEFAULT_TENANT_ID: str = "default"
+    # Rotas de alto volume (telemetria) resolvem o tenant pelo token: estado (ativo/trial) em cache
+    TENANT_STATUS_CACHE_SECONDS: int = 60
+    TENANT_STATUS_CACHE_SIZE: int = 1000  # tenants em cache (LRU)
     
     # Integrações
     GOOGLE_MAPS_API_KEY: str = ""
@@ -42,12 +52,117 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     ELASTICSEARCH_URL: str = "http://elasticsearch:9200"
+    LOG_QUEUE_SIZE: int = 10000
+    ACCESS_LOG_SAMPLE_RATE: float = 0.1  # fração de respostas de sucesso registradas
+    ACCESS_LOG_SAMPLED_PATHS: List[str] = ["/health", "/metrics", "/api/v1/trips", "/api/v1/dashboard"]
+    ACCESS_LOG_SLOW_REQUEST_MS: float = 1000.0  # requisições lentas são sempre registradas
+    LOG_SHIPPING_ENABLED: bool = False  # envio de logs ao Elasticsearch (_bulk)
+    LOG_SHIPPING_INDEX_PREFIX: str = "tms-logs"
+    LOG_SHIPPING_BATCH_SIZE: int = 500
+    LOG_SHIPPING_FLUSH_INTERVAL: float = 5.0
+    LOG_SHIPPING_MAX_BUFFER: int = 10000
+    LOG_SHIPPING_SPOOL_DIR: str = "/tmp/tms-log-spool"
     
     # Monitoring
     PROMETHEUS_ENABLED: bool = True
+    METRICS_MAX_TENANT_LABELS: int = 200
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+    SQL_N_PLUS_ONE_STRICT: bool = False  # True em testes: N+1 levanta NPlusOneError
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_HEAVY_PER_MINUTE: int = 20  # analytics e relatórios
+    RATE_LIMIT_HEAVY_PREFIXES: List[str] = ["/api/v1/analytics", "/api/v1/reports", "/api/v1/dispatch"]
+    RATE_LIMIT_TENANT_CACHE_SECONDS: int = 60
+    RATE_LIMIT_TENANT_CACHE_SIZE: int = 1000  # tenants com limites em cache (LRU)
+    RATE_LIMIT_TELEMETRY_PER_MINUTE: int = 6000  # lotes de posições GPS (gateways enviam várias vezes por segundo)
+    RATE_LIMIT_TELEMETRY_PREFIXES: List[str] = ["/api/v1/telemetry/positions"]
+
+    # Compressão de respostas (gzip/brotli)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; respostas menores vão sem compressão
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # qualidade baixa: bom ganho com pouco CPU
+    COMPRESSION_EXCLUDED_PREFIXES: List[str] = ["/api/v1/reports/download", "/metrics"]
+
+    # Alertas periódicos (Celery beat)
+    MAINTENANCE_ALERT_DAYS_AHEAD: int = 7
+    CNH_EXPIRY_ALERT_DAYS_AHEAD: int = 30
+    ALERT_SCAN_BATCH_SIZE: int = 1000
+    ALERT_DISPATCH_CONCURRENCY: int = 20
+    
+    # Previsão de receita (job noturno + cache)
+    FORECAST_HISTORY_MONTHS: int = 36
+    FORECAST_HORIZON_MONTHS: int = 12
+    FORECAST_CACHE_TTL_SECONDS: int = 36 * 3600  # sobrevive a uma execução perdida do job
+    
+    # Cubo colunar de analytics (NumPy, em memória por processo)
+    ANALYTICS_CUBE_ENABLED: bool = True
+    ANALYTICS_CUBE_MAX_BYTES: int = 256 * 1024 * 1024  # acima disso, cubos menos usados são despejados
+    ANALYTICS_CUBE_FULL_RELOAD_SECONDS: int = 3600
+    ANALYTICS_CUBE_WATERMARK_OVERLAP_SECONDS: int = 300
+    ANALYTICS_CUBE_FALLBACK_TTL_SECONDS: int = 30  # sem Redis: idade máxima antes de reconsultar
+    
+    # Cache de resultados de analytics (Redis, invalidado pelas versões de dados do tenant)
+    ANALYTICS_CACHE_ENABLED: bool = True
+    ANALYTICS_CACHE_TTL_SECONDS: int = 600  # janelas relativas a "agora": defasagem máxima sem escritas
+    ANALYTICS_CACHE_LOCK_TTL_SECONDS: float = 60.0  # maior que o cálculo mais lento
+    ANALYTICS_CACHE_WAIT_SECONDS: float = 30.0  # espera pelo worker que está calculando
+    ANALYTICS_CACHE_POLL_INTERVAL_SECONDS: float = 0.05
+    
+    # Otimização de despacho (VRP: savings + busca local em pool de processos)
+    VRP_TIME_BUDGET_SECONDS: float = 10.0
+    VRP_MAX_TIME_BUDGET_SECONDS: float = 60.0
+    VRP_PROCESS_WORKERS: int = 2
+    VRP_PARALLEL_STARTS: int = 2  # execuções com sementes diferentes; fica a melhor
+    VRP_NEIGHBORS: int = 20
+    VRP_AVERAGE_SPEED_KMH: float = 60.0  # deslocamento vazio entre viagens
+    VRP_COST_PER_KM: float = 3.5
+    VRP_VEHICLE_FIXED_COST: float = 300.0  # custo de colocar mais um veículo na rua no dia
+    VRP_DEPARTURE_SLACK_MINUTES: int = 120  # quanto a saída planejada pode ser antecipada/adiada
+    
+    # Matriz de distâncias/durações (cache persistente na tabela distance_cache)
+    ROUTING_BACKEND: str = "haversine"  # haversine (cálculo local) | osrm (requer OPENSTREETMAP_ENABLED)
+    OSRM_URL: str = "http://osrm:5000"
+    ROUTING_TIMEOUT_SECONDS: float = 10.0
+    ROUTING_BATCH_SIZE: int = 100  # origens + destinos por requisição ao backend
+    ROUTING_ROAD_FACTOR: float = 1.3  # distância por estrada / distância em linha reta
+    ROUTING_AVERAGE_SPEED_KMH: float = 60.0
+    DISTANCE_CACHE_TTL_DAYS: int = 90
+    DISTANCE_CACHE_FALLBACK_TTL_HOURS: int = 24  # estimativas por linha reta quando o backend falha
+    
+    # Geocodificação de endereços (cache persistente na tabela geocode_cache + job em lote)
+    GEOCODING_PROVIDER: str = "nominatim"  # nominatim (requer OPENSTREETMAP_ENABLED) | google (requer GOOGLE_MAPS_API_KEY)
+    NOMINATIM_URL: str = "https://nominatim.openstreetmap.org"
+    GEOCODING_USER_AGENT: str = "transportadora-tms"  # exigido pela política do Nominatim
+    GEOCODING_RATE_LIMIT_PER_SECOND: float = 1.0
+    GEOCODING_TIMEOUT_SECONDS: float = 10.0
+    GEOCODING_BATCH_SIZE: int = 500  # endereços consultados no provedor por execução do job
+    GEOCODING_COUNTRY: str = "Brasil"
+    GEOCODING_COUNTRY_CODES: str = "br"
+
+    # Dashboard ao vivo (SSE; eventos por tenant via Redis pub/sub)
+    LIVE_COALESCE_SECONDS: float = 0.5  # rajadas de eventos nesta janela viram uma mensagem
+    LIVE_HEARTBEAT_SECONDS: float = 15.0  # comentário SSE para manter proxies/conexões abertas
+    LIVE_QUEUE_SIZE: int = 1000  # mensagens pendentes por conexão; acima disso o cliente recebe resync
+
+    # Telemetria GPS (stream Redis -> grupo de consumidores -> tabela particionada vehicle_positions)
+    GPS_STREAM_KEY: str = "tms:telemetry:positions"
+    GPS_CONSUMER_GROUP: str = "positions-writers"
+    GPS_MAX_BATCH_SIZE: int = 1000  # posições por requisição
+    GPS_STREAM_MAX_ENTRIES: int = 20000  # lotes pendentes no stream; acima disso a ingestão responde 503
+    GPS_CONSUMER_BATCH_ENTRIES: int = 50  # lotes lidos do stream por gravação (COPY)
+    GPS_CONSUMER_BLOCK_MS: int = 1000
+    GPS_CLAIM_IDLE_MS: int = 60000  # lotes de consumidores parados são reprocessados após este tempo
+    GPS_MAX_POINT_AGE_DAYS: int = 30  # posições mais antigas (ou no futuro) são rejeitadas
+    GPS_MAX_CLOCK_SKEW_SECONDS: int = 300
+    GPS_PARTITIONS_AHEAD_MONTHS: int = 2
+    GPS_RETENTION_MONTHS: int = 12  # partições mensais mais antigas são removidas
+
+    # Viagens (trips particionada por mês de departure_date; datas sem partição vão para trips_default)
+    TRIPS_PARTITIONS_AHEAD_MONTHS: int = 12  # viagens são planejadas com antecedência
     
     class Config:
         env_file = ".env"
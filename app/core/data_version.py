@@ -0,0 +1,85 @@
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from core.logging import get_logger
+from core.redis_client import redis_client, async_redis_client
+
+logger = get_logger("data_version")
+
+GLOBAL_SCOPE = "all"
+KEY_PREFIX = "tms:dv"
+# Muda se o Redis perder os contadores, para que versões reiniciadas não colidam
+EPOCH_KEY = f"{KEY_PREFIX}:epoch"
+
+
+def _version_key(scope, table: str) -> str:
+    return f"{KEY_PREFIX}:{scope}:{table}"
+
+
+# Contadores de versão por tenant e tabela, incrementados a cada commit com escrita.
+# Usados para ETags e invalidação de caches sem consultar o banco.
+
+def _collect_changes(session: Session, flush_context) -> None:
+    """Registrar (tabela, tenant) das entidades alteradas neste flush"""
+    pending: Set[Tuple[str, Optional[int]]] = session.info.setdefault("data_version_pending", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table and hasattr(obj, "tenant_id"):
+            pending.add((table, obj.tenant_id))
+
+
+def _bump_on_commit(session: Session) -> None:
+    pending = session.info.pop("data_version_pending", None)
+    if pending:
+        bump_versions(pending)
+
+
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("data_version_pending", None)
+
+
+def bump_versions(changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+    """Incrementar as versões (tenant e global) das tabelas alteradas"""
+    keys = set()
+    for table, tenant_id in changes:
+        keys.add(_version_key(GLOBAL_SCOPE, table))
+        if tenant_id is not None:
+            keys.add(_version_key(tenant_id, table))
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Falha ao incrementar versão de dados", error=str(e))
+
+
+def install_data_versioning(session_factory: sessionmaker) -> None:
+    """Registrar os hooks de versão de dados nas sessões do factory"""
+    if event.contains(session_factory, "after_flush", _collect_changes):
+        return
+    event.listen(session_factory, "after_flush", _collect_changes)
+    event.listen(session_factory, "after_commit", _bump_on_commit)
+    event.listen(session_factory, "after_rollback", _discard_on_rollback)
+
+
+async def get_versions(scope, tables: Iterable[str]) -> List[str]:
+    """Época + versões atuais das tabelas (um único MGET no caso comum)"""
+    keys = [EPOCH_KEY] + [_version_key(scope, table) for table in tables]
+    values = await async_redis_client.mget(keys)
+    if values[0] is None:
+        await async_redis_client.set(EPOCH_KEY, time.time_ns(), nx=True)
+        values[0] = await async_redis_client.get(EPOCH_KEY)
+    return [value or "0" for value in values]
+
+
+def read_versions(scope, tables: Iterable[str]) -> List[str]:
+    """Versão síncrona de get_versions (serviços e tarefas fora do event loop)"""
+    keys = [EPOCH_KEY] + [_version_key(scope, table) for table in tables]
+    values = redis_client.mget(keys)
+    if values[0] is None:
+        redis_client.set(EPOCH_KEY, time.time_ns(), nx=True)
+        values[0] = redis_client.get(EPOCH_KEY)
+    return [value or "0" for value in values]
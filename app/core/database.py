@@ -1,12 +1,30 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
+from .query_tracker import install_query_tracking
+from .data_version import install_data_versioning
+from .live_events import install_live_events
+from .row_security import TENANT_INFO_KEY, install_row_security
 
-engine = create_engine(settings.DATABASE_URL)
+# Capacidade para uma conexão por requisição simultânea mais as consultas paralelas
+# (run_concurrently): requisições esperando os workers não esgotam o pool
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=max(settings.API_THREADPOOL_SIZE + settings.DB_PARALLEL_QUERY_WORKERS - settings.DB_POOL_SIZE, 0)
+)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    install_query_tracking(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+install_data_versioning(SessionLocal)
+install_live_events(SessionLocal)
 
 Base = declarative_base()
+install_row_security(SessionLocal, Base)
 
 
 def get_db():
@@ -14,4 +32,50 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def tenant_session(tenant_id: Optional[int]) -> Session:
+    """Sessão com escopo de tenant (RLS + filtro tenant_id nas consultas ORM); None = sem escopo"""
+    if tenant_id is None:
+        return SessionLocal()
+    return SessionLocal(info={TENANT_INFO_KEY: tenant_id})
+
+
+_query_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_query_executor() -> ThreadPoolExecutor:
+    global _query_executor
+    if _query_executor is None:
+        _query_executor = ThreadPoolExecutor(
+            max_workers=settings.DB_PARALLEL_QUERY_WORKERS,
+            thread_name_prefix="db-query"
+        )
+    return _query_executor
+
+
+def _run_in_session(job: Callable[[Session], Any], tenant_id: Optional[int] = None) -> Any:
+    db = tenant_session(tenant_id)
+    try:
+        return job(db)
+    finally:
+        db.close()
+
+
+def run_concurrently(jobs: Dict[str, Callable[[Session], Any]], tenant_id: Optional[int] = None) -> Dict[str, Any]:
+    """Executar consultas independentes em paralelo, cada uma em sua própria sessão/conexão
+
+    O pool de threads é compartilhado pelo processo, limitando as conexões extras
+    a DB_PARALLEL_QUERY_WORKERS. O contexto (contagem de consultas) é propagado e,
+    com tenant_id, cada sessão tem o mesmo escopo de tenant da requisição.
+    """
+    if len(jobs) <= 1 or settings.DB_PARALLEL_QUERY_WORKERS <= 1:
+        return {name: _run_in_session(job, tenant_id) for name, job in jobs.items()}
+
+    executor = _get_query_executor()
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _run_in_session, job, tenant_id)
+        for name, job in jobs.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,56 @@
+import hashlib
+from datetime import date
+from typing import List
+from fastapi import Depends, HTTPException, Request, Response
+from core.data_version import get_versions
+from core.logging import get_logger
+from core.tenant import get_current_tenant
+from models.tenant import Tenant
+
+logger = get_logger("etag")
+
+
+def _build_etag(request: Request, scope, versions: List[str], daily: bool) -> str:
+    parts = [request.url.path, request.url.query, str(scope), ",".join(versions)]
+    if daily:
+        # KPIs com janela relativa a "agora" mudam de um dia para o outro sem escritas
+        parts.append(date.today().isoformat())
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {value.strip() for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
+async def _apply_etag(request: Request, response: Response, scope, tables, daily: bool) -> None:
+    try:
+        versions = await get_versions(scope, tables)
+    except Exception as e:
+        logger.warning("Versão de dados indisponível, ETag ignorado", error=str(e))
+        return
+
+    etag = _build_etag(request, scope, versions, daily)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        # Nada mudou: responde 304 sem executar as consultas da rota
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def tenant_data_etag(*tables: str, daily: bool = False):
+    """Dependency de ETag para rotas filtradas pelo tenant atual"""
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        current_tenant: Tenant = Depends(get_current_tenant)
+    ) -> None:
+        await _apply_etag(request, response, current_tenant.id, tables, daily)
+
+    return dependency
+
@@ -0,0 +1,215 @@
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, sessionmaker
+from core.config import settings
+from core.logging import get_logger
+from core.redis_client import redis_client, async_redis_client
+
+logger = get_logger("live_events")
+
+CHANNEL_PREFIX = "tms:live"
+# Viagens têm eventos detalhados; as demais tabelas só avisam que mudaram
+DETAILED_TABLES = {"trips"}
+
+
+def channel(tenant_id: int) -> str:
+    return f"{CHANNEL_PREFIX}:{tenant_id}"
+
+
+def _status_value(status) -> Optional[str]:
+    return getattr(status, "value", status)
+
+
+def _trip_event(obj, kind: str) -> Dict[str, Any]:
+    status = _status_value(obj.status)
+    previous = status
+    if kind == "created":
+        previous = None
+    else:
+        history = inspect(obj).attrs.status.history
+        if history.deleted:
+            previous = _status_value(history.deleted[0])
+        elif history.added:
+            previous = "unknown"  # valor anterior não carregado na sessão
+    return {
+        "type": kind,
+        "trip_id": obj.id,
+        "status": None if kind == "deleted" else status,
+        "previous_status": previous,
+        "departure_date": obj.departure_date.isoformat() if obj.departure_date else None,
+    }
+
+
+# Eventos por tenant publicados no Redis (pub/sub) após o commit, para o dashboard ao vivo
+
+def _collect_events(session: Session, flush_context) -> None:
+    """Registrar eventos de viagem e tabelas alteradas neste flush (estado anterior ainda visível)"""
+    pending: Dict[int, Dict[str, Any]] = session.info.setdefault("live_events_pending", {})
+    groups = (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted))
+    for kind, objects in groups:
+        for obj in objects:
+            table = getattr(obj, "__tablename__", None)
+            tenant_id = getattr(obj, "tenant_id", None)
+            if not table or tenant_id is None:
+                continue
+            if kind == "updated" and not session.is_modified(obj):
+                continue
+            entry = pending.setdefault(tenant_id, {"trips": [], "changed": set()})
+            if table in DETAILED_TABLES:
+                entry["trips"].append(_trip_event(obj, kind))
+            else:
+                entry["changed"].add(table)
+
+
+def _publish_on_commit(session: Session) -> None:
+    pending = session.info.pop("live_events_pending", None)
+    for tenant_id, entry in (pending or {}).items():
+        publish(tenant_id, trips=entry["trips"], changed=entry["changed"])
+
+
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("live_events_pending", None)
+
+
+def publish(tenant_id: int, trips: Iterable[Dict[str, Any]] = (), changed: Iterable[str] = ()) -> None:
+    """Publicar eventos do tenant; escritas em massa (UPDATE executemany) chamam diretamente"""
+    message = {"trips": list(trips), "changed": sorted(changed)}
+    if not message["trips"] and not message["changed"]:
+        return
+    try:
+        redis_client.publish(channel(tenant_id), json.dumps(message))
+    except Exception as e:
+        logger.warning("Falha ao publicar evento ao vivo", tenant_id=tenant_id, error=str(e))
+
+
+def install_live_events(session_factory: sessionmaker) -> None:
+    """Registrar os hooks de publicação nas sessões do factory"""
+    if event.contains(session_factory, "after_flush", _collect_events):
+        return
+    event.listen(session_factory, "after_flush", _collect_events)
+    event.listen(session_factory, "after_commit", _publish_on_commit)
+    event.listen(session_factory, "after_rollback", _discard_on_rollback)
+
+
+def coalesce(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Juntar uma rajada de mensagens em uma só
+
+    Por viagem vale o primeiro status anterior e o último status; mudanças que se
+    anulam na janela são descartadas. status_delta soma as transições por status.
+    """
+    trips: Dict[int, Dict[str, Any]] = {}
+    changed: Set[str] = set()
+    for message in messages:
+        changed.update(message.get("changed", ()))
+        for trip_event in message.get("trips", ()):
+            current = trips.get(trip_event["trip_id"])
+            if current is None:
+                trips[trip_event["trip_id"]] = dict(trip_event)
+            else:
+                current.update(
+                    status=trip_event["status"],
+                    departure_date=trip_event["departure_date"],
+                    type="created" if current["type"] == "created" else trip_event["type"]
+                )
+
+    status_delta: Dict[str, int] = {}
+    events = []
+    for trip_event in trips.values():
+        if trip_event["type"] == "created" and trip_event["status"] is None:
+            continue  # criada e removida na mesma janela
+        previous, status = trip_event["previous_status"], trip_event["status"]
+        if previous == "unknown":
+            changed.add("trips")  # sem o status anterior, o cliente recarrega os contadores
+        elif previous != status:
+            if previous is not None:
+                status_delta[previous] = status_delta.get(previous, 0) - 1
+            if status is not None:
+                status_delta[status] = status_delta.get(status, 0) + 1
+        events.append(trip_event)
+    return {
+        "trips": events,
+        "status_delta": {status: delta for status, delta in status_delta.items() if delta},
+        "changed": sorted(changed),
+    }
+
+
+class LiveSubscriber:
+    """Fila limitada de uma conexão; ao transbordar, o cliente recebe um pedido de resync"""
+
+    def __init__(self, tenant_id: int):
+        self.tenant_id = tenant_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def drain(self) -> List[Dict[str, Any]]:
+        messages = []
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+
+class LiveHub:
+    """Uma assinatura Redis por processo (PSUBSCRIBE tms:live:*) distribuída às conexões locais"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[LiveSubscriber]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, tenant_id: int) -> LiveSubscriber:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        subscriber = LiveSubscriber(tenant_id)
+        self._subscribers.setdefault(tenant_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.tenant_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.tenant_id]
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        try:
+            tenant_id = int(message["channel"].rsplit(":", 1)[1])
+            payload = json.loads(message["data"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return
+        for subscriber in tuple(self._subscribers.get(tenant_id, ())):
+            subscriber.put(payload)
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None and message["type"] == "pmessage":
+                        self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Assinatura de eventos ao vivo perdida; reconectando", error=str(e))
+                # Mensagens perdidas durante a queda: todos os clientes recarregam
+                for subscribers in self._subscribers.values():
+                    for subscriber in subscribers:
+                        subscriber.overflowed = True
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.close()
+
+
+live_hub = LiveHub()
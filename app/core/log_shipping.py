@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+from core.metrics import LOG_SHIPPER_EVENTS
+
+
+class ElasticsearchLogHandler(logging.Handler):
+    """Handler que agrupa eventos de log e envia para o Elasticsearch via API _bulk
+
+    - Envio por tamanho de lote ou intervalo de tempo (thread próprio)
+    - Buffer limitado: eventos abaixo de WARNING são descartados quando cheio;
+      WARNING ou acima aguardam espaço (backpressure) por até block_timeout
+    - Falhas de envio gravam o lote em disco (spool) para reenvio posterior
+    - Documentos recusados no _bulk (status por item): 429/5xx voltam ao buffer,
+      os demais são contados como rejected
+    """
+
+    def __init__(
+        self,
+        url: str,
+        index_prefix: str = "tms-logs",
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_buffer: int = 10000,
+        block_timeout: float = 1.0,
+        spool_dir: Optional[str] = None,
+        spool_max_bytes: int = 100 * 1024 * 1024,
+        request_timeout: float = 5.0,
+        level: int = logging.NOTSET,
+    ):
+        super().__init__(level)
+        self.bulk_url = url.rstrip("/") + "/_bulk"
+        self.index_prefix = index_prefix
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.block_timeout = block_timeout
+        self.spool_dir = spool_dir
+        self.spool_max_bytes = spool_max_bytes
+        self.request_timeout = request_timeout
+
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._retry_at = 0.0
+        self._backoff = flush_interval
+
+        if self.spool_dir:
+            os.makedirs(self.spool_dir, exist_ok=True)
+        # Lotes deixados em disco por uma execução anterior também são reenviados
+        self._spool_pending = bool(self._spool_files())
+
+        self._thread = threading.Thread(target=self._run, name="es-log-shipper", daemon=True)
+        self._thread.start()
+
+    # Produção de eventos (executado no thread do QueueListener)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            document = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        high_priority = record.levelno >= logging.WARNING
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer:
+                if not high_priority:
+                    LOG_SHIPPER_EVENTS.labels("dropped").inc()
+                    return
+                # Backpressure: segura o produtor até o envio liberar espaço
+                self._cond.notify_all()
+                self._cond.wait_for(
+                    lambda: len(self._buffer) < self.max_buffer or self._closed,
+                    timeout=self.block_timeout,
+                )
+                if len(self._buffer) >= self.max_buffer:
+                    LOG_SHIPPER_EVENTS.labels("dropped").inc()
+                    return
+
+            self._buffer.append(document)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Enviar imediatamente tudo o que está no buffer"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            if time.monotonic() < self._retry_at:
+                # Em backoff (ex.: documentos devolvidos com 429): o restante vai para o disco
+                self._spool(batch)
+            else:
+                self._ship(batch)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=self.request_timeout * 2)
+        self.flush()
+        super().close()
+
+    # Envio (thread do shipper)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                backoff = self._retry_at - time.monotonic()
+                if backoff > 0:
+                    # Elasticsearch fora do ar: dorme até o fim do backoff, acordando
+                    # só para gravar em disco se o buffer encher
+                    self._cond.wait_for(
+                        lambda: self._closed or len(self._buffer) >= self.max_buffer,
+                        timeout=backoff,
+                    )
+                else:
+                    self._cond.wait_for(
+                        lambda: self._closed or len(self._buffer) >= self.batch_size,
+                        timeout=self.flush_interval,
+                    )
+                if self._closed:
+                    return
+
+            if time.monotonic() < self._retry_at:
+                if len(self._buffer) >= self.max_buffer:
+                    self._spool(self._take_batch())
+                continue
+
+            batch = self._take_batch()
+            if batch:
+                self._ship(batch)
+            elif self._spool_pending:
+                self._replay_spool()
+
+    def _take_batch(self) -> List[str]:
+        with self._cond:
+            count = min(self.batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(count)]
+            self._cond.notify_all()
+        return batch
+
+    def _bulk_body(self, documents: List[str]) -> bytes:
+        index = f"{self.index_prefix}-{datetime.now(timezone.utc):%Y.%m.%d}"
+        action = json.dumps({"index": {"_index": index}})
+        lines = []
+        for document in documents:
+            lines.append(action)
+            lines.append(document)
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _post(self, body: bytes, count: int) -> Optional[List[int]]:
+        """Status de cada documento do lote; None = falha transitória (reenviar o lote inteiro)"""
+        request = urllib.request.Request(
+            self.bulk_url,
+            data=body,
+            headers={"Content-Type": "application/x-ndjson"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.request_timeout) as response:
+                payload = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                return None
+            # Erro do cliente (payload inválido): reenviar não adianta
+            return [e.code] * count
+        except (urllib.error.URLError, OSError):
+            return None
+
+        # _bulk responde 200 mesmo quando documentos são recusados: o status vale por item
+        statuses = [200] * count
+        try:
+            result = json.loads(payload)
+        except ValueError:
+            return statuses
+        if isinstance(result, dict) and result.get("errors"):
+            for position, item in enumerate(result.get("items", [])[:count]):
+                for outcome in item.values():
+                    statuses[position] = outcome.get("status", 200)
+        return statuses
+
+    def _settle(self, documents: List[str], statuses: List[int], accepted: str = "shipped") -> None:
+        """Contabilizar a resposta; documentos recusados por sobrecarga (429/5xx) voltam ao buffer"""
+        retry = [doc for doc, code in zip(documents, statuses) if code == 429 or code >= 500]
+        rejected = sum(1 for code in statuses if 300 <= code < 500 and code != 429)
+        LOG_SHIPPER_EVENTS.labels(accepted).inc(len(documents) - len(retry) - rejected)
+        if rejected:
+            LOG_SHIPPER_EVENTS.labels("rejected").inc(rejected)
+        if not retry:
+            return
+
+        # Cluster sobrecarregado: espera o backoff antes de reenviar
+        self._retry_at = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, 300.0)
+        with self._cond:
+            room = len(self._buffer) + len(retry) <= self.max_buffer
+            if room:
+                self._buffer.extendleft(reversed(retry))
+        if room:
+            LOG_SHIPPER_EVENTS.labels("retried").inc(len(retry))
+        else:
+            self._spool(retry)
+
+    def _ship(self, batch: List[str]) -> None:
+        with self._send_lock:
+            body = self._bulk_body(batch)
+            statuses = self._post(body, len(batch))
+            if statuses is None:
+                self._retry_at = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2, 300.0)
+                self._spool_body(body, len(batch))
+                return
+            self._retry_at = 0.0
+            self._backoff = self.flush_interval
+            self._settle(batch, statuses)
+            if self._spool_pending and not self._retry_at:
+                self._replay_spool(locked=True)
+
+    def _spool(self, batch: List[str]) -> None:
+        if batch:
+            self._spool_body(self._bulk_body(batch), len(batch))
+
+    def _spool_body(self, body: bytes, count: int) -> None:
+        if not self.spool_dir or self._spool_size() + len(body) > self.spool_max_bytes:
+            LOG_SHIPPER_EVENTS.labels("dropped").inc(count)
+            return
+        path = os.path.join(self.spool_dir, f"{time.time_ns()}.ndjson")
+        with open(path, "wb") as f:
+            f.write(body)
+        self._spool_pending = True
+        LOG_SHIPPER_EVENTS.labels("spooled").inc(count)
+
+    def _spool_files(self) -> List[str]:
+        if not self.spool_dir:
+            return []
+        return sorted(
+            os.path.join(self.spool_dir, name)
+            for name in os.listdir(self.spool_dir)
+            if name.endswith(".ndjson")
+        )
+
+    def _spool_size(self) -> int:
+        return sum(os.path.getsize(path) for path in self._spool_files())
+
+    def _replay_spool(self, locked: bool = False) -> None:
+        """Reenviar lotes gravados em disco, do mais antigo para o mais novo"""
+        if not locked:
+            with self._send_lock:
+                return self._replay_spool(locked=True)
+
+        for path in self._spool_files():
+            with open(path, "rb") as f:
+                body = f.read()
+            documents = body.decode("utf-8").splitlines()[1::2]
+            statuses = self._post(body, len(documents))
+            if statuses is None:
+                self._retry_at = time.monotonic() + self._backoff
+                return
+            os.remove(path)
+            self._settle(documents, statuses, accepted="replayed")
+            if self._retry_at:
+                return
+        self._spool_pending = False
@@ -1,38 +1,116 @@
 import structlog
 import logging
+import atexit
+import queue
+import random
 import sys
-from typing import Any, Dict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
 from core.config import settings
+from core.metrics import LOG_EVENTS_DROPPED
+
+_listener: Optional[QueueListener] = None
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que não formata no thread chamador e descarta eventos com fila cheia"""
+    
+    def prepare(self, record):
+        # A renderização JSON acontece no thread de escrita (ProcessorFormatter)
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_EVENTS_DROPPED.inc()
 
 
 def setup_logging():
-    """Configurar logging estruturado"""
+    """Configurar logging estruturado com escrita assíncrona em thread dedicado
+
+    Chamado explicitamente pelos pontos de entrada (startup da API, sinais do Celery)
+    """
+    global _listener
+    
+    if _listener is not None:
+        return
+    
+    shared_processors = [
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        structlog.processors.UnicodeDecoder(),
+    ]
     
     # Configurar structlog
     structlog.configure(
-        processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer()
-        ],
+        processors=[structlog.stdlib.filter_by_level]
+        + shared_processors
+        + [structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
     )
     
-    # Configurar logging padrão
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.LOG_LEVEL.upper())
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.JSONRenderer(),
+        ],
+        foreign_pre_chain=shared_processors,
     )
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    
+    handlers = [stream_handler]
+    if settings.LOG_SHIPPING_ENABLED:
+        from core.log_shipping import ElasticsearchLogHandler
+        
+        es_handler = ElasticsearchLogHandler(
+            settings.ELASTICSEARCH_URL,
+            index_prefix=settings.LOG_SHIPPING_INDEX_PREFIX,
+            batch_size=settings.LOG_SHIPPING_BATCH_SIZE,
+            flush_interval=settings.LOG_SHIPPING_FLUSH_INTERVAL,
+            max_buffer=settings.LOG_SHIPPING_MAX_BUFFER,
+            spool_dir=settings.LOG_SHIPPING_SPOOL_DIR,
+        )
+        es_handler.setFormatter(formatter)
+        handlers.append(es_handler)
+    
+    # Requisições só enfileiram; a escrita em stdout fica no thread do listener
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    root_logger = logging.getLogger()
+    root_logger.handlers = [NonBlockingQueueHandler(log_queue)]
+    root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def reinit_logging_after_fork():
+    """Recriar fila e thread de escrita em processo filho (o thread do pai não existe após o fork)"""
+    global _listener
+    
+    _listener = None
+    setup_logging()
+
+
+def shutdown_logging():
+    """Descarregar a fila e parar o thread de escrita"""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 def get_logger(name: str = None) -> structlog.BoundLogger:
@@ -45,26 +123,33 @@ class RequestLogger:
     
     def __init__(self, logger: structlog.BoundLogger = None):
         self.logger = logger or get_logger("http")
+        self.sample_rate = settings.ACCESS_LOG_SAMPLE_RATE
+        self.sampled_paths = tuple(settings.ACCESS_LOG_SAMPLED_PATHS)
+        self.slow_request_ms = settings.ACCESS_LOG_SLOW_REQUEST_MS
     
-    def log_request(self, request, tenant_id: str = None, user_id: str = None):
-        """Log de requisição recebida"""
-        self.logger.info(
-            "request_received",
-            method=request.method,
-            url=str(request.url),
-            client_ip=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-            tenant_id=tenant_id,
-            user_id=user_id
-        )
+    def should_log(self, path: str, status_code: int, duration_ms: float) -> bool:
+        """Amostrar respostas de sucesso em rotas de alto volume; erros e lentas sempre"""
+        if status_code >= 400 or duration_ms >= self.slow_request_ms:
+            return True
+        if not path.startswith(self.sampled_paths):
+            return True
+        return random.random() < self.sample_rate
     
-    def log_response(self, request, response, tenant_id: str = None, user_id: str = None):
-        """Log de resposta enviada"""
+    def log_access(self, request, status_code: int, duration_ms: float, tenant_id: str = None, user_id: str = None):
+        """Evento único de acesso (requisição + resposta + latência)"""
+        path = request.scope["path"]
+        if not self.should_log(path, status_code, duration_ms):
+            return
+        
+        route = request.scope.get("route")
         self.logger.info(
-            "response_sent",
+            "http_access",
             method=request.method,
-            url=str(request.url),
-            status_code=response.status_code,
+            path=path,
+            route=getattr(route, "path", None),
+            status_code=status_code,
+            duration_ms=round(duration_ms, 2),
+            client_ip=request.client.host if request.client else None,
             tenant_id=tenant_id,
             user_id=user_id
         )
@@ -75,6 +160,7 @@ class RequestLogger:
             "request_error",
             method=request.method,
             url=str(request.url),
+            user_agent=request.headers.get("user-agent"),
             error_type=type(error).__name__,
             error_message=str(error),
             tenant_id=tenant_id,
@@ -125,8 +211,4 @@ class BusinessLogger:
             user_id=user_id,
             tenant_id=tenant_id,
             success=success
-        )
-
-
-# Inicializar logging
-setup_logging()
\ No newline at end of file
+        )
\ No newline at end of file
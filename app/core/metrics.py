@@ -0,0 +1,174 @@
+import os
+import time
+from typing import Set
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.requests import Request
+from starlette.responses import Response
+from core.config import settings
+
+# Com vários workers (uvicorn --workers / gunicorn) cada processo grava suas
+# métricas em arquivos no diretório PROMETHEUS_MULTIPROC_DIR, agregados no scrape.
+MULTIPROCESS_ENABLED = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+UNMATCHED_ROUTE = "<unmatched>"
+OTHER_TENANT = "<other>"
+
+REQUEST_LATENCY = Histogram(
+    "tms_http_request_duration_seconds",
+    "Latência das requisições HTTP",
+    ["route", "method", "status", "tenant"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+REQUEST_COUNT = Counter(
+    "tms_http_requests_total",
+    "Total de requisições HTTP",
+    ["route", "method", "status", "tenant"],
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    "tms_http_requests_in_progress",
+    "Requisições HTTP em andamento",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# Instrumentação SQL (ver core/query_tracker.py); kind = http | celery | block
+DB_QUERIES = Histogram(
+    "tms_db_queries",
+    "Consultas SQL por requisição/tarefa",
+    ["kind", "name"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+DB_TIME = Histogram(
+    "tms_db_time_seconds",
+    "Tempo total em consultas SQL por requisição/tarefa",
+    ["kind", "name"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+DB_N_PLUS_ONE = Counter(
+    "tms_db_n_plus_one_total",
+    "Padrões N+1 detectados (mesma consulta repetida acima do limite)",
+    ["kind", "name"],
+)
+
+ANALYTICS_CACHE_REQUESTS = Counter(
+    "tms_analytics_cache_requests_total",
+    "Consultas ao cache de resultados de analytics",
+    ["kpi", "result"],  # hit | miss | wait | timeout | bypass
+)
+
+DISTANCE_MATRIX_PAIRS = Counter(
+    "tms_distance_matrix_pairs_total",
+    "Pares origem/destino resolvidos pela matriz de distâncias",
+    ["result"],  # hit | computed | fallback
+)
+
+GPS_POSITIONS = Counter(
+    "tms_gps_positions_total",
+    "Posições GPS recebidas pela ingestão e gravadas pelos consumidores do stream",
+    ["result"],  # accepted | rejected | stored | duplicate | unknown_vehicle
+)
+
+LOG_EVENTS_DROPPED = Counter(
+    "tms_log_events_dropped_total",
+    "Eventos de log descartados por fila cheia",
+)
+
+LOG_SHIPPER_EVENTS = Counter(
+    "tms_log_shipper_events_total",
+    "Eventos de log processados pelo envio ao Elasticsearch",
+    ["result"],  # shipped | spooled | replayed | retried | rejected | dropped
+)
+
+
+def get_registry() -> CollectorRegistry:
+    """Registry usado no scrape (agregado entre processos quando necessário)"""
+    if not MULTIPROCESS_ENABLED:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead(pid: int) -> None:
+    """Limpar métricas de um worker encerrado (hook child_exit do gunicorn)"""
+    if MULTIPROCESS_ENABLED:
+        multiprocess.mark_process_dead(pid)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Expor métricas no formato do Prometheus"""
+    return Response(generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+class PrometheusMiddleware:
+    """Middleware ASGI que mede latência por template de rota, método, status e tenant"""
+
+    def __init__(self, app, max_tenant_labels: int = None):
+        self.app = app
+        self.max_tenant_labels = max_tenant_labels or settings.METRICS_MAX_TENANT_LABELS
+        self._tenants: Set[str] = set()
+
+    def _tenant_label(self, scope) -> str:
+        """Limitar a cardinalidade do label de tenant (valor vem do cliente)"""
+        tenant_id = scope.get("tenant_id")
+        if tenant_id is None:
+            for name, value in scope.get("headers", []):
+                if name == b"x-tenant-id":
+                    tenant_id = value.decode("latin-1")
+                    break
+            else:
+                tenant_id = settings.DEFAULT_TENANT_ID
+
+        if tenant_id in self._tenants:
+            return tenant_id
+        if len(self._tenants) < self.max_tenant_labels:
+            self._tenants.add(tenant_id)
+            return tenant_id
+        return OTHER_TENANT
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+
+            # O roteador do FastAPI registra a rota encontrada no scope
+            route = scope.get("route")
+            labels = (
+                getattr(route, "path", UNMATCHED_ROUTE),
+                method,
+                str(status_code),
+                self._tenant_label(scope),
+            )
+            REQUEST_LATENCY.labels(*labels).observe(duration)
+            REQUEST_COUNT.labels(*labels).inc()
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from core.config import settings
+from core.logging import get_logger
+from core.metrics import DB_QUERIES, DB_TIME, DB_N_PLUS_ONE
+
+logger = get_logger("sql")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class NPlusOneError(Exception):
+    """Levantada no modo estrito quando um padrão N+1 é detectado"""
+
+
+class QueryStats:
+    """Contadores de consultas SQL de uma requisição ou tarefa"""
+
+    def __init__(self, kind: str, name: str, threshold: int = None, strict: bool = None):
+        self.kind = kind
+        self.name = name
+        self.threshold = threshold or settings.SQL_N_PLUS_ONE_THRESHOLD
+        self.strict = settings.SQL_N_PLUS_ONE_STRICT if strict is None else strict
+        self.query_count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self.flagged: Dict[str, int] = {}
+        # Consultas paralelas (run_concurrently) registram no mesmo objeto
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            repeats = self._count(statement, duration)
+        if repeats == self.threshold:
+            logger.warning(
+                "Possível N+1 detectado",
+                kind=self.kind,
+                name=self.name,
+                repeats=repeats,
+                statement=statement[:500]
+            )
+            if self.strict:
+                raise NPlusOneError(
+                    f"{self.name}: consulta repetida {repeats} vezes: {statement[:200]}"
+                )
+
+    def _count(self, statement: str, duration: float) -> int:
+        self.query_count += 1
+        self.total_time += duration
+
+        # O SQL compilado pelo SQLAlchemy já vem parametrizado: texto igual = mesmo formato
+        self.shapes[statement] += 1
+        repeats = self.shapes[statement]
+        if repeats >= self.threshold:
+            self.flagged[statement] = repeats
+        return repeats
+
+    def publish(self) -> None:
+        """Exportar os totais para as métricas Prometheus"""
+        DB_QUERIES.labels(self.kind, self.name).observe(self.query_count)
+        DB_TIME.labels(self.kind, self.name).observe(self.total_time)
+        if self.flagged:
+            DB_N_PLUS_ONE.labels(self.kind, self.name).inc(len(self.flagged))
+
+
+def get_current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(name: str, kind: str = "block", threshold: int = None, strict: bool = None):
+    """Contabilizar as consultas executadas dentro do bloco (útil em testes e scripts)"""
+    stats = QueryStats(kind, name, threshold=threshold, strict=strict)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        stats.publish()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_time = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start_time)
+
+
+def _handle_error(context):
+    # Consulta com erro não passa por after_cursor_execute
+    if context.connection is not None:
+        start_times = context.connection.info.get("query_start_time")
+        if start_times:
+            start_times.pop()
+
+
+def install_query_tracking(engine: Engine) -> None:
+    """Registrar os hooks de contagem de consultas no engine"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def register_celery_signals() -> None:
+    """Contabilizar consultas por tarefa Celery"""
+    from celery.signals import task_prerun, task_postrun
+
+    tokens = {}
+
+    @task_prerun.connect(weak=False)
+    def _start_tracking(task_id=None, task=None, **kwargs):
+        stats = QueryStats("celery", task.name if task else "unknown")
+        tokens[task_id] = (_current_stats.set(stats), stats)
+
+    @task_postrun.connect(weak=False)
+    def _stop_tracking(task_id=None, **kwargs):
+        entry = tokens.pop(task_id, None)
+        if entry is None:
+            return
+        token, stats = entry
+        _current_stats.reset(token)
+        stats.publish()
+        logger.info(
+            "task_queries",
+            task=stats.name,
+            query_count=stats.query_count,
+            db_time_ms=round(stats.total_time * 1000, 2)
+        )
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI que contabiliza consultas por requisição e expõe nos headers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats("http", scope["path"])
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(stats.query_count))
+                headers.append("X-DB-Time", f"{stats.total_time * 1000:.2f}ms")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            # Usar o template da rota como label (evita cardinalidade por id)
+            route = scope.get("route")
+            stats.name = getattr(route, "path", "<unmatched>")
+            stats.publish()
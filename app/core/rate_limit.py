@@ -0,0 +1,169 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from core.config import settings
+from core.database import SessionLocal
+from core.logging import get_logger
+from core.redis_client import async_redis_client
+from core.security import verify_token
+from models.tenant import Tenant
+
+logger = get_logger("rate_limit")
+
+ROUTE_CLASS_DEFAULT = "default"
+ROUTE_CLASS_HEAVY = "heavy"
+ROUTE_CLASS_TELEMETRY = "telemetry"
+
+# GCRA (Generic Cell Rate Algorithm): um único valor (TAT) por chave e um round trip.
+# Usa o relógio do Redis para que todos os workers concordem sobre o tempo.
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tat = tonumber(redis.call('GET', key) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, math.ceil(allow_at - now), 0}
+end
+redis.call('SET', key, new_tat, 'PX', math.ceil(new_tat - now))
+return {1, 0, math.floor((tolerance - (new_tat - now)) / emission)}
+"""
+
+_gcra = async_redis_client.register_script(GCRA_SCRIPT)
+
+# id do tenant -> (expira_em, limite_padrao, limite_pesado), com despejo LRU
+_tenant_limits: "OrderedDict[int, Tuple[float, int, int]]" = OrderedDict()
+
+
+def _load_tenant_limits(tenant_id: int) -> Tuple[Optional[int], Optional[int]]:
+    """Buscar limites customizados do tenant no banco"""
+    db = SessionLocal()
+    try:
+        row = db.query(
+            Tenant.rate_limit_per_minute,
+            Tenant.heavy_rate_limit_per_minute
+        ).filter(Tenant.id == tenant_id).first()
+        return (row[0], row[1]) if row else (None, None)
+    finally:
+        db.close()
+
+
+async def get_tenant_limits(tenant_id: Optional[int]) -> Tuple[int, int]:
+    """Limites (padrão, pesado) por minuto do tenant, com cache local por processo
+
+    Sem tenant autenticado valem os limites padrão das settings (sem consulta ao banco).
+    """
+    if tenant_id is None:
+        return settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_HEAVY_PER_MINUTE
+
+    cached = _tenant_limits.get(tenant_id)
+    if cached and cached[0] > time.monotonic():
+        _tenant_limits.move_to_end(tenant_id)
+        return cached[1], cached[2]
+
+    default_limit, heavy_limit = await run_in_threadpool(_load_tenant_limits, tenant_id)
+    limits = (
+        default_limit or settings.RATE_LIMIT_PER_MINUTE,
+        heavy_limit or settings.RATE_LIMIT_HEAVY_PER_MINUTE,
+    )
+    _tenant_limits[tenant_id] = (time.monotonic() + settings.RATE_LIMIT_TENANT_CACHE_SECONDS, *limits)
+    _tenant_limits.move_to_end(tenant_id)
+    while len(_tenant_limits) > settings.RATE_LIMIT_TENANT_CACHE_SIZE:
+        _tenant_limits.popitem(last=False)
+    return limits
+
+
+def get_route_class(path: str) -> str:
+    """Classificar a rota: analytics/relatórios (pesadas), ingestão de telemetria vs. CRUD"""
+    if path.startswith(tuple(settings.RATE_LIMIT_HEAVY_PREFIXES)):
+        return ROUTE_CLASS_HEAVY
+    if path.startswith(tuple(settings.RATE_LIMIT_TELEMETRY_PREFIXES)):
+        return ROUTE_CLASS_TELEMETRY
+    return ROUTE_CLASS_DEFAULT
+
+
+def _get_identity(request: Request) -> Tuple[Optional[int], str]:
+    """Tenant e usuário do token JWT ou, sem autenticação, o IP do cliente
+
+    O tenant vem do token assinado, não do header X-Tenant-ID (escolhido pelo cliente).
+    """
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        payload = verify_token(authorization[7:])
+        if payload and payload.get("sub"):
+            return payload.get("tenant_id"), f"user:{payload['sub']}"
+    return None, f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def check_rate_limit(key: str, limit_per_minute: int) -> Tuple[bool, int, int]:
+    """Retorna (permitido, retry_after_ms, restantes)"""
+    emission = 60000 / limit_per_minute
+    tolerance = 60000  # permite rajada de até limit_per_minute requisições
+    allowed, retry_after_ms, remaining = await _gcra(keys=[key], args=[emission, tolerance])
+    return bool(allowed), int(retry_after_ms), int(remaining)
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI de rate limiting distribuído por tenant, usuário e classe de rota"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith(settings.API_V1_STR)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        tenant_id, subject = _get_identity(request)
+        route_class = get_route_class(scope["path"])
+
+        try:
+            default_limit, heavy_limit = await get_tenant_limits(tenant_id)
+            if route_class == ROUTE_CLASS_TELEMETRY:
+                limit = settings.RATE_LIMIT_TELEMETRY_PER_MINUTE
+            else:
+                limit = heavy_limit if route_class == ROUTE_CLASS_HEAVY else default_limit
+            key = f"rl:{tenant_id or 'anon'}:{subject}:{route_class}"
+            allowed, retry_after_ms, remaining = await check_rate_limit(key, limit)
+        except Exception as e:
+            # Redis ou banco indisponível: não bloquear o tráfego
+            logger.warning("Rate limit indisponível", error=str(e))
+            await self.app(scope, receive, send)
+            return
+
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Limite de requisições excedido"},
+                headers={
+                    "Retry-After": str(max(1, -(-retry_after_ms // 1000))),
+                    "X-RateLimit-Limit": str(limit),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-RateLimit-Limit", str(limit))
+                headers.append("X-RateLimit-Remaining", str(remaining))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,4 +1,8 @@
 import redis
+import redis.asyncio
 from .config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
\ No newline at end of file
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+# Cliente assíncrono para uso dentro do event loop (middlewares, endpoints async)
+async_redis_client = redis.asyncio.from_url(settings.REDIS_URL, decode_responses=True)
\ No newline at end of file
@@ -0,0 +1,71 @@
+from typing import List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker, with_loader_criteria
+
+# Variável de sessão lida pelas políticas de RLS (função current_tenant_id() no banco)
+TENANT_SETTING = "app.tenant_id"
+TENANT_INFO_KEY = "tenant_id"
+
+SET_TENANT_SQL = text(f"SELECT set_config('{TENANT_SETTING}', :tenant_id, true)")
+
+
+# Sessões com escopo de tenant (session.info["tenant_id"], ver tenant_session): cada
+# transação define a variável local usada pelo RLS e as consultas ORM recebem o filtro
+# tenant_id explícito, que o planner usa nos índices iniciados por tenant_id.
+# Sessões sem tenant (workers, migrations, jobs globais) não são alteradas.
+
+def session_tenant(session: Session) -> Optional[int]:
+    return session.info.get(TENANT_INFO_KEY)
+
+
+def scope_session(session: Session, tenant_id: int) -> None:
+    """Aplicar o escopo de tenant a uma sessão já aberta (ex.: a da requisição)"""
+    session.info[TENANT_INFO_KEY] = tenant_id
+    # Transação já iniciada (usuário e tenant carregados): after_begin não roda de novo
+    if session.in_transaction():
+        session.connection().execute(SET_TENANT_SQL, {"tenant_id": str(tenant_id)})
+
+
+def _tenant_classes(base) -> List[type]:
+    return [mapper.class_ for mapper in base.registry.mappers if "tenant_id" in mapper.columns]
+
+
+def _set_tenant_setting(session: Session, transaction, connection) -> None:
+    """Variável local à transação: a conexão volta ao pool sem tenant"""
+    tenant_id = session_tenant(session)
+    if tenant_id is not None:
+        connection.execute(SET_TENANT_SQL, {"tenant_id": str(tenant_id)})
+
+
+def _assign_tenant(session: Session, flush_context, instances) -> None:
+    """Novos registros herdam o tenant da sessão"""
+    tenant_id = session_tenant(session)
+    if tenant_id is None:
+        return
+    for obj in session.new:
+        if hasattr(type(obj), "tenant_id") and obj.tenant_id is None:
+            obj.tenant_id = tenant_id
+
+
+def install_row_security(session_factory: sessionmaker, base) -> None:
+    """Registrar os hooks de escopo de tenant nas sessões do factory"""
+    if event.contains(session_factory, "after_begin", _set_tenant_setting):
+        return
+
+    def add_tenant_criteria(execute_state: ORMExecuteState) -> None:
+        tenant_id = session_tenant(execute_state.session)
+        if (
+            tenant_id is None
+            or not execute_state.is_select
+            or execute_state.is_column_load
+            or execute_state.is_relationship_load  # já herdam o critério da consulta original
+        ):
+            return
+        execute_state.statement = execute_state.statement.options(*(
+            with_loader_criteria(cls, cls.tenant_id == tenant_id, include_aliases=True)
+            for cls in _tenant_classes(base)
+        ))
+
+    event.listen(session_factory, "after_begin", _set_tenant_setting)
+    event.listen(session_factory, "before_flush", _assign_tenant)
+    event.listen(session_factory, "do_orm_execute", add_tenant_criteria)
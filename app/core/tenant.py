@@ -1,10 +1,18 @@
-from fastapi import Request, HTTPException, Depends
+from collections import OrderedDict
+from datetime import datetime
+from fastapi import Request, HTTPException, Depends, status
 from sqlalchemy.orm import Session
-from typing import Optional
-from core.database import get_db
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Tuple
+from core.config import settings
+from core.database import SessionLocal, get_db
+from core.row_security import scope_session
+from core.security import verify_token
 from models.tenant import Tenant
 from models.user import User
+from routes.auth import get_current_user, oauth2_scheme
 import re
+import time
 
 
 def get_tenant_from_header(request: Request) -> Optional[str]:
@@ -33,46 +41,103 @@ def get_tenant_from_path(request: Request) -> Optional[str]:
     return None
 
 
-async def get_current_tenant(
+def _tenant_error(tenant: Optional[Tenant], reference) -> Optional[Tuple[int, str]]:
+    """(status, detalhe) se o tenant não pode ser usado; None se está liberado"""
+    if not tenant:
+        return 404, f"Tenant '{reference}' não encontrado ou inativo"
+    # Verificar se está em trial e se expirou
+    if tenant.is_trial and tenant.trial_ends_at and datetime.utcnow() > tenant.trial_ends_at:
+        return 402, "Período de trial expirado. Entre em contato para ativar sua conta."
+    return None
+
+
+def get_current_tenant(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
 ) -> Tenant:
-    """Obter tenant atual baseado no header ou path"""
+    """Obter tenant atual baseado no header ou path (sem eles, o tenant do usuário)
+
+    O header/subdomínio é informado pelo cliente: só vale se for o tenant do
+    usuário autenticado, pois define o escopo de RLS da sessão.
+    """
     
     # Tentar obter tenant de diferentes formas
-    tenant_id = (
-        get_tenant_from_header(request) or
-        get_tenant_from_path(request) or
-        "default"  # Tenant padrão
-    )
+    tenant_slug = get_tenant_from_header(request) or get_tenant_from_path(request)
     
     # Buscar tenant no banco
-    tenant = db.query(Tenant).filter(
-        Tenant.slug == tenant_id,
-        Tenant.is_active == True
-    ).first()
+    query = db.query(Tenant).filter(Tenant.is_active == True)
+    if tenant_slug:
+        tenant = query.filter(Tenant.slug == tenant_slug).first()
+    else:
+        tenant = query.filter(Tenant.id == current_user.tenant_id).first()
     
-    if not tenant:
+    if tenant and tenant.id != current_user.tenant_id:
         raise HTTPException(
-            status_code=404,
-            detail=f"Tenant '{tenant_id}' não encontrado ou inativo"
+            status_code=403,
+            detail=f"Usuário sem acesso ao tenant '{tenant.slug}'"
         )
     
-    # Verificar se está em trial e se expirou
-    if tenant.is_trial and tenant.trial_ends_at:
-        from datetime import datetime
-        if datetime.utcnow() > tenant.trial_ends_at:
-            raise HTTPException(
-                status_code=402,
-                detail="Período de trial expirado. Entre em contato para ativar sua conta."
-            )
+    error = _tenant_error(tenant, tenant_slug or current_user.tenant_id)
+    if error:
+        raise HTTPException(status_code=error[0], detail=error[1])
     
     return tenant
 
 
-def get_tenant_db_session(tenant: Tenant = Depends(get_current_tenant)):
-    """Dependency para obter sessão do banco filtrada por tenant"""
-    return tenant
+def get_tenant_db_session(tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    """Dependency para obter sessão do banco filtrada por tenant
+
+    Reaproveita a sessão da requisição (a mesma de get_current_user): uma conexão
+    por requisição. Cada transação define app.tenant_id (políticas de RLS) e as
+    consultas ORM recebem o filtro tenant_id; novos registros herdam o tenant da sessão.
+    """
+    scope_session(db, tenant.id)
+    return db
+
+
+# id do tenant -> (expira_em, erro ou None), com despejo LRU
+_tenant_status: "OrderedDict[int, Tuple[float, Optional[Tuple[int, str]]]]" = OrderedDict()
+
+
+def _load_tenant_status(tenant_id: int) -> Optional[Tuple[int, str]]:
+    db = SessionLocal()
+    try:
+        tenant = db.query(Tenant).filter(Tenant.id == tenant_id, Tenant.is_active == True).first()
+        return _tenant_error(tenant, tenant_id)
+    finally:
+        db.close()
+
+
+async def get_token_tenant_id(token: str = Depends(oauth2_scheme)) -> int:
+    """Tenant do usuário autenticado pela claim tenant_id do token, sem consulta por requisição
+
+    Para rotas de alto volume (ingestão de telemetria): o usuário não é recarregado e o
+    estado do tenant (ativo, trial) vem de um cache local por processo.
+    """
+    payload = verify_token(token)
+    tenant_id = payload.get("tenant_id") if payload else None
+    if tenant_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    cached = _tenant_status.get(tenant_id)
+    if cached and cached[0] > time.monotonic():
+        _tenant_status.move_to_end(tenant_id)
+        error = cached[1]
+    else:
+        error = await run_in_threadpool(_load_tenant_status, tenant_id)
+        _tenant_status[tenant_id] = (time.monotonic() + settings.TENANT_STATUS_CACHE_SECONDS, error)
+        _tenant_status.move_to_end(tenant_id)
+        while len(_tenant_status) > settings.TENANT_STATUS_CACHE_SIZE:
+            _tenant_status.popitem(last=False)
+
+    if error:
+        raise HTTPException(status_code=error[0], detail=error[1])
+    return tenant_id
 
 
 class TenantMiddleware:
@@ -84,13 +84,9 @@ def test_tables_exist():
     
     try:
         from core.database import engine
-        from models import Base
         from sqlalchemy import text
         
-        # Criar tabelas se não existirem
-        Base.metadata.create_all(bind=engine)
-        print("✅ Tabelas criadas/verificadas - OK")
-        
+        # Schema criado via Alembic (alembic upgrade head)
         # Verificar se as tabelas existem
         with engine.connect() as conn:
             tables = ['users', 'clients', 'drivers', 'vehicles', 'routes', 'trips', 'maintenances']
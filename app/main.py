@@ -1,46 +1,62 @@
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from core.config import settings
-from core.database import engine
-from models import Base
-from routes import auth, clients, drivers, vehicles, routes, trips, dashboard, maintenance, reports, analytics
+from routes import auth, clients, drivers, vehicles, routes, trips, dashboard, maintenance, reports, analytics, dispatch, availability, telemetry, live
 from core.tenant import TenantMiddleware
-from core.logging import RequestLogger, BusinessLogger
+from core.logging import RequestLogger, BusinessLogger, setup_logging, shutdown_logging
+from core.compression import CompressionMiddleware
+from core.metrics import PrometheusMiddleware, metrics_endpoint
+from core.query_tracker import QueryStatsMiddleware
+from core.rate_limit import RateLimitMiddleware
 import time
+import anyio
 
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+# O schema do banco é gerenciado pelo Alembic (alembic upgrade head), não no import
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Sistema Multi-tenant de Gerenciamento de Transporte (TMS) - API REST",
     version="3.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
+@app.on_event("startup")
+def configure_logging():
+    setup_logging()
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    # Mesmo limite usado para dimensionar o pool de conexões (core/database.py)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.API_THREADPOOL_SIZE
+
+
+@app.on_event("shutdown")
+def flush_logging():
+    shutdown_logging()
+
+
 # Middleware para logging de requisições
 request_logger = RequestLogger()
 business_logger = BusinessLogger()
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Log da requisição
-    tenant_id = request.headers.get("X-Tenant-ID", "default")
-    request_logger.log_request(request, tenant_id=tenant_id)
+    start_time = time.perf_counter()
     
     # Processar requisição
     response = await call_next(request)
     
     # Calcular tempo de resposta
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     response.headers["X-Process-Time"] = str(process_time)
     
-    # Log da resposta
-    request_logger.log_response(request, response, tenant_id=tenant_id)
+    # Log único de acesso (amostrado para respostas de sucesso)
+    tenant_id = request.headers.get("X-Tenant-ID", "default")
+    request_logger.log_access(request, response.status_code, process_time * 1000, tenant_id=tenant_id)
     
     return response
 
@@ -63,6 +79,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão gzip/brotli de respostas grandes
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Rate limiting por tenant/usuário/classe de rota (Redis, GCRA)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+# Contagem de consultas SQL por requisição (headers X-DB-*)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Métricas Prometheus (scrape em /metrics)
+if settings.PROMETHEUS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
 # Incluir rotas
 app.include_router(auth.router, prefix=settings.API_V1_STR)
 app.include_router(clients.router, prefix=settings.API_V1_STR)
@@ -74,6 +107,10 @@ app.include_router(dashboard.router, prefix=settings.API_V1_STR)
 app.include_router(maintenance.router, prefix=settings.API_V1_STR)
 app.include_router(reports.router, prefix=settings.API_V1_STR)
 app.include_router(analytics.router, prefix=settings.API_V1_STR)
+app.include_router(dispatch.router, prefix=settings.API_V1_STR)
+app.include_router(availability.router, prefix=settings.API_V1_STR)
+app.include_router(telemetry.router, prefix=settings.API_V1_STR)
+app.include_router(live.router, prefix=settings.API_V1_STR)
 
 
 @app.get("/")
@@ -6,7 +6,12 @@ from .driver import Driver
 from .vehicle import Vehicle
 from .route import Route
 from .trip import Trip, TripStatus
+from .trip_booking import TripBooking
 from .maintenance import Maintenance, MaintenanceType
+from .alert import AlertDispatch
+from .distance_cache import DistanceCacheEntry
+from .geocode_cache import GeocodeCacheEntry
+from .vehicle_position import VehiclePosition
 
 __all__ = [
     "Base",
@@ -19,6 +24,11 @@ __all__ = [
     "Route",
     "Trip",
     "TripStatus",
+    "TripBooking",
     "Maintenance",
-    "MaintenanceType"
+    "MaintenanceType",
+    "AlertDispatch",
+    "DistanceCacheEntry",
+    "GeocodeCacheEntry",
+    "VehiclePosition"
 ]
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class AlertDispatch(Base):
+    """Registro de alertas já disparados (evita reenvio a cada varredura)"""
+    __tablename__ = "alert_dispatches"
+    __table_args__ = (
+        UniqueConstraint("alert_type", "entity_id", "reference_date", name="uq_alert_dispatches_entity"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    alert_type = Column(String, nullable=False)  # maintenance_due, cnh_expiry
+    entity_id = Column(Integer, nullable=False)  # id da manutenção ou do motorista
+    reference_date = Column(Date, nullable=False)  # data de vencimento que gerou o alerta
+    sent_at = Column(DateTime(timezone=True), server_default=func.now())
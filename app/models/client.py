@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -6,6 +6,10 @@ from core.database import Base
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Listagens e contagens do tenant (escopo das sessões por tenant)
+        Index("ix_clients_tenant_id_id", "tenant_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
@@ -18,6 +22,10 @@ class Client(Base):
     city = Column(String, nullable=False)
     state = Column(String, nullable=False)
     zip_code = Column(String, nullable=False)
+    # Preenchidas pela geocodificação (cache ou job em lote); nulas até lá
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geocoded_at = Column(DateTime(timezone=True), nullable=True)  # nulo = pendente
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
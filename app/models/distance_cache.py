@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class DistanceCacheEntry(Base):
+    """Distância/duração já calculada entre dois pontos (compartilhada entre tenants)"""
+    __tablename__ = "distance_cache"
+    __table_args__ = (
+        UniqueConstraint("origin_key", "destination_key", name="uq_distance_cache_pair"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    origin_key = Column(String, nullable=False)  # "lat,lon" arredondados (ver point_key)
+    destination_key = Column(String, nullable=False)
+    distance_km = Column(Float, nullable=False)
+    duration_hours = Column(Float, nullable=False)
+    source = Column(String, nullable=False)  # osrm, haversine
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
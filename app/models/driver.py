@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, ForeignKey
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, ForeignKey, Index
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from core.database import Base
 
 
 class Driver(Base):
     __tablename__ = "drivers"
+    __table_args__ = (
+        # Varredura de CNHs vencendo (range em cnh_expiry com paginação por id)
+        Index("ix_drivers_cnh_expiry_id", "cnh_expiry", "id", postgresql_where=text("is_active")),
+        Index("ix_drivers_tenant_id_id", "tenant_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
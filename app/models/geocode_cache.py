@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class GeocodeCacheEntry(Base):
+    """Resultado de geocodificação por endereço normalizado (compartilhado entre tenants)"""
+    __tablename__ = "geocode_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    address_key = Column(Text, unique=True, nullable=False)  # ver services.geocoding.normalize_address
+    query = Column(Text, nullable=False)  # texto enviado ao provedor
+    latitude = Column(Float, nullable=True)  # nulos: endereço não encontrado
+    longitude = Column(Float, nullable=True)
+    provider = Column(String, nullable=False)  # nominatim, google
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
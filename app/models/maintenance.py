@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Float, Text, ForeignKey
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Float, Text, ForeignKey, Index
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from core.database import Base
 from enum import Enum
@@ -12,6 +12,11 @@ class MaintenanceType(str, Enum):
 
 class Maintenance(Base):
     __tablename__ = "maintenances"
+    __table_args__ = (
+        # Varredura de manutenções pendentes próximas do vencimento
+        Index("ix_maintenances_pending_date_id", "maintenance_date", "id", postgresql_where=text("NOT is_completed")),
+        Index("ix_maintenances_tenant_id_id", "tenant_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
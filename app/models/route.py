@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -6,6 +6,9 @@ from core.database import Base
 
 class Route(Base):
     __tablename__ = "routes"
+    __table_args__ = (
+        Index("ix_routes_tenant_id_id", "tenant_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
@@ -14,6 +17,10 @@ class Route(Base):
     destination = Column(String, nullable=False)
     estimated_distance = Column(Float, nullable=False)  # Em km
     estimated_time = Column(Float, nullable=False)  # Em horas
+    origin_latitude = Column(Float, nullable=True)
+    origin_longitude = Column(Float, nullable=True)
+    destination_latitude = Column(Float, nullable=True)
+    destination_longitude = Column(Float, nullable=True)
     description = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -18,12 +18,20 @@ class Tenant(Base):
     address = Column(Text, nullable=True)
     phone = Column(String, nullable=True)
     email = Column(String, nullable=True)
+    # Coordenadas do endereço da empresa (geocodificação)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geocoded_at = Column(DateTime(timezone=True), nullable=True)
     
     # Configurações do sistema
     max_users = Column(Integer, default=10)
     max_vehicles = Column(Integer, default=50)
     features_enabled = Column(Text, nullable=True)  # JSON string
     
+    # Rate limiting (None = usar os limites padrão das settings)
+    rate_limit_per_minute = Column(Integer, nullable=True)
+    heavy_rate_limit_per_minute = Column(Integer, nullable=True)  # analytics e relatórios
+    
     # Status
     is_active = Column(Boolean, default=True)
     is_trial = Column(Boolean, default=True)
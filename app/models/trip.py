@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Date, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Date, Text, Enum, Index, text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 from core.database import Base
 import enum
 
@@ -12,22 +12,40 @@ class TripStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+# Viagens que ocupam motorista e veículo: só elas têm reserva em trip_bookings (trigger trips_sync_booking)
+ACTIVE_TRIP_STATUSES = (TripStatus.PLANNED, TripStatus.IN_TRANSIT)
+
+
 class Trip(Base):
     __tablename__ = "trips"
+    __table_args__ = (
+        # Atualização incremental do cubo de analytics (marca d'água por tenant)
+        Index("ix_trips_tenant_changed_at", "tenant_id", text("coalesce(updated_at, created_at)")),
+        # Contadores por status e viagens recentes do dashboard, por tenant
+        Index("ix_trips_tenant_status", "tenant_id", "status"),
+        Index("ix_trips_tenant_created_at", "tenant_id", "created_at"),
+        # Partições mensais trips_AAAAMM (services/partitions.py) + trips_default para datas
+        # sem partição; reservas ativas em trip_bookings (restrições de exclusão)
+        {"postgresql_partition_by": "RANGE (departure_date)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    # PK da tabela (id, departure_date): a chave de partição precisa fazer parte dela.
+    # Para o ORM a identidade continua sendo só o id (sequência única entre partições).
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     driver_id = Column(Integer, ForeignKey("drivers.id"), nullable=False)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
     route_id = Column(Integer, ForeignKey("routes.id"), nullable=False)
     
-    departure_date = Column(DateTime, nullable=False)
+    departure_date = Column(DateTime, primary_key=True)
     estimated_arrival = Column(DateTime, nullable=False)
     actual_departure = Column(DateTime, nullable=True)
     actual_arrival = Column(DateTime, nullable=True)
     
-    status = Column(Enum(TripStatus), default=TripStatus.PLANNED)
+    # active_history: o status anterior é carregado mesmo com a instância expirada,
+    # para os eventos ao vivo (core.live_events) saberem a transição
+    status = column_property(Column(Enum(TripStatus), default=TripStatus.PLANNED), active_history=True)
     
     # Custos
     estimated_fuel_cost = Column(Float, nullable=False)
@@ -38,14 +56,19 @@ class Trip(Base):
     other_costs = Column(Float, nullable=True)
     freight_revenue = Column(Float, nullable=True)
     
+    cargo_weight = Column(Float, nullable=True)  # Em toneladas (mesma unidade de Vehicle.capacity)
+    
     notes = Column(Text, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __mapper_args__ = {"primary_key": [id]}
+    
     # Relationships
     tenant = relationship("Tenant", back_populates="trips")
     client = relationship("Client", back_populates="trips")
     driver = relationship("Driver", back_populates="trips")
     vehicle = relationship("Vehicle", back_populates="trips")
-    route = relationship("Route", back_populates="trips")
\ No newline at end of file
+    route = relationship("Route", back_populates="trips")
+
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from core.database import Base
+
+# Janela ocupada pela viagem; chegada anterior à saída vira intervalo vazio
+BOOKING_PERIOD = "tsrange(departure_date, greatest(estimated_arrival, departure_date), '[)')"
+
+
+def booking_resource(column: str) -> str:
+    # Id como range de um ponto: GiST compara com = sem depender da extensão btree_gist
+    return f"int4range({column}, {column}, '[]')"
+
+
+def _booking_exclusion(column: str) -> ExcludeConstraint:
+    """Impede duas reservas do mesmo motorista/veículo com janelas sobrepostas
+
+    Verificada no commit (DEFERRABLE), para que trocas em lote no despacho não falhem no meio.
+    """
+    return ExcludeConstraint(
+        (text(booking_resource(column)), "="),
+        (text(BOOKING_PERIOD), "&&"),
+        name=f"ex_trip_bookings_{column.removesuffix('_id')}",
+        using="gist",
+        deferrable=True,
+        initially="DEFERRED",
+    )
+
+
+class TripBooking(Base):
+    """Reserva de motorista e veículo de uma viagem ativa (planejada ou em trânsito)
+
+    Mantida pelo trigger trips_sync_booking: trips é particionada por departure_date e
+    restrições de exclusão não atravessam partições, então as reservas ficam nesta
+    tabela pequena, que só tem viagens ativas. Os índices GiST das restrições
+    atendem às buscas de conflito e de disponibilidade (services/booking.py).
+    """
+    __tablename__ = "trip_bookings"
+    __table_args__ = (
+        _booking_exclusion("driver_id"),
+        _booking_exclusion("vehicle_id"),
+    )
+
+    trip_id = Column(Integer, primary_key=True, autoincrement=False)  # sem FK: trips é particionada
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    driver_id = Column(Integer, ForeignKey("drivers.id"), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    departure_date = Column(DateTime, nullable=False)
+    estimated_arrival = Column(DateTime, nullable=False)
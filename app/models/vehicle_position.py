@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, DateTime, Float, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class VehiclePosition(Base):
+    """Posição GPS de um veículo (tabela particionada por mês em recorded_at)
+
+    Sem chave estrangeira para vehicles: o consumidor do stream já descarta veículos
+    desconhecidos e o histórico não deve bloquear a exclusão do veículo.
+    """
+    __tablename__ = "vehicle_positions"
+    __table_args__ = (
+        # A chave de partição precisa fazer parte da chave primária;
+        # (vehicle_id, recorded_at) também atende às consultas de histórico
+        PrimaryKeyConstraint("vehicle_id", "recorded_at", name="pk_vehicle_positions"),
+        {"postgresql_partition_by": "RANGE (recorded_at)"},
+    )
+
+    tenant_id = Column(Integer, nullable=False)
+    vehicle_id = Column(Integer, nullable=False)
+    recorded_at = Column(DateTime(timezone=True), nullable=False)  # horário do GPS
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed_kmh = Column(Float, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
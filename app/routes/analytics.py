@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from core.database import get_db
 from routes.auth import get_current_user
 from models.user import User
 from models.tenant import Tenant
-from core.tenant import get_current_tenant
+from core.tenant import get_current_tenant, get_tenant_db_session
+from core.etag import tenant_data_etag
 from services.analytics import AnalyticsService
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
@@ -14,9 +14,10 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 @router.get("/customer-retention")
 def get_customer_retention(
     period_days: int = Query(90, ge=30, le=365),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("clients", "trips", daily=True))
 ):
     """Obter taxa de retenção de clientes"""
     analytics = AnalyticsService(db)
@@ -26,9 +27,10 @@ def get_customer_retention(
 @router.get("/fleet-occupation")
 def get_fleet_occupation(
     period_days: int = Query(30, ge=7, le=90),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("vehicles", "trips", daily=True))
 ):
     """Obter taxa de ocupação da frota"""
     analytics = AnalyticsService(db)
@@ -38,9 +40,10 @@ def get_fleet_occupation(
 @router.get("/cost-per-km")
 def get_cost_per_km(
     period_days: int = Query(30, ge=7, le=90),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("trips", "routes", daily=True))
 ):
     """Obter custo médio por km rodado"""
     analytics = AnalyticsService(db)
@@ -50,9 +53,10 @@ def get_cost_per_km(
 @router.get("/future-earnings")
 def get_future_earnings(
     months: int = Query(6, ge=1, le=12),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("trips", daily=True))
 ):
     """Obter projeção de ganhos futuros"""
     analytics = AnalyticsService(db)
@@ -62,9 +66,10 @@ def get_future_earnings(
 @router.get("/on-time-delivery")
 def get_on_time_delivery(
     period_days: int = Query(30, ge=7, le=90),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("trips", daily=True))
 ):
     """Obter análise de viagens no prazo vs atrasadas"""
     analytics = AnalyticsService(db)
@@ -74,9 +79,10 @@ def get_on_time_delivery(
 @router.get("/maintenance-costs")
 def get_maintenance_costs(
     period_days: int = Query(90, ge=30, le=365),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("maintenances", "vehicles", daily=True))
 ):
     """Obter análise de custos de manutenção"""
     analytics = AnalyticsService(db)
@@ -86,9 +92,10 @@ def get_maintenance_costs(
 @router.get("/driver-performance")
 def get_driver_performance(
     period_days: int = Query(30, ge=7, le=90),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("drivers", "trips", daily=True))
 ):
     """Obter métricas de performance dos motoristas"""
     analytics = AnalyticsService(db)
@@ -97,9 +104,10 @@ def get_driver_performance(
 
 @router.get("/comprehensive")
 def get_comprehensive_analytics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    etag: None = Depends(tenant_data_etag("clients", "drivers", "maintenances", "routes", "trips", "vehicles", daily=True))
 ):
     """Obter analytics completo com todos os KPIs"""
     analytics = AnalyticsService(db)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from routes.auth import get_current_user
+from models.user import User
+from models.tenant import Tenant
+from core.tenant import get_current_tenant, get_tenant_db_session
+from schemas.availability import Availability
+from services.availability import AvailabilityService
+
+router = APIRouter(prefix="/availability", tags=["availability"])
+
+
+@router.get("/", response_model=Availability)
+def search_availability(
+    start: datetime,
+    end: datetime,
+    min_capacity: Optional[float] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, gt=0, le=1000),
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Motoristas (CNH válida) e veículos ativos (capacidade >= min_capacity) livres na janela"""
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end must be after start"
+        )
+    return AvailabilityService(db).search(current_tenant.id, start, end, min_capacity, limit)
@@ -1,19 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 from typing import List
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
 from models.user import User
 from models.client import Client
 from schemas.client import ClientCreate, ClientUpdate, Client as ClientSchema
+from services.geocoding import apply_cached_coordinates
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
+ADDRESS_FIELDS = {"address", "city", "state", "zip_code"}
+
 
 @router.post("/", response_model=ClientSchema)
 def create_client(
     client: ClientCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     # Verificar se CNPJ/CPF já existe
@@ -25,6 +29,10 @@ def create_client(
         )
     
     db_client = Client(**client.dict())
+    if db_client.latitude is None or db_client.longitude is None:
+        apply_cached_coordinates(db, db_client)
+    else:
+        db_client.geocoded_at = func.now()
     db.add(db_client)
     db.commit()
     db.refresh(db_client)
@@ -35,7 +43,7 @@ def create_client(
 def read_clients(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     clients = db.query(Client).offset(skip).limit(limit).all()
@@ -45,7 +53,7 @@ def read_clients(
 @router.get("/{client_id}", response_model=ClientSchema)
 def read_client(
     client_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     client = db.query(Client).filter(Client.id == client_id).first()
@@ -58,7 +66,7 @@ def read_client(
 def update_client(
     client_id: int,
     client: ClientUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     db_client = db.query(Client).filter(Client.id == client_id).first()
@@ -68,6 +76,11 @@ def update_client(
     update_data = client.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_client, field, value)
+    if "latitude" in update_data or "longitude" in update_data:
+        db_client.geocoded_at = func.now()
+    elif ADDRESS_FIELDS & update_data.keys():
+        # Endereço mudou: coordenadas do cache ou pendente para o job
+        apply_cached_coordinates(db, db_client)
     
     db.commit()
     db.refresh(db_client)
@@ -77,7 +90,7 @@ def update_client(
 @router.delete("/{client_id}")
 def delete_client(
     client_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     client = db.query(Client).filter(Client.id == client_id).first()
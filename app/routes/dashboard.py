@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
+from core.etag import tenant_data_etag
 from models.user import User
 from services.dashboard import DashboardService
 from schemas.dashboard import DashboardStats
@@ -11,7 +12,8 @@ router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    etag: None = Depends(tenant_data_etag("trips", "clients", "drivers", "vehicles", "routes"))
 ):
     return DashboardService.get_dashboard_stats(db)
\ No newline at end of file
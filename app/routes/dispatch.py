@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from routes.auth import get_current_user
+from models.user import User
+from models.tenant import Tenant
+from core.tenant import get_current_tenant, get_tenant_db_session
+from schemas.dispatch import DispatchOptimizeRequest
+
+router = APIRouter(prefix="/dispatch", tags=["dispatch"])
+
+
+@router.post("/optimize")
+def optimize_dispatch(
+    request: DispatchOptimizeRequest,
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Otimizar veículos, motoristas e horários das viagens planejadas do dia"""
+    # Import tardio: o solver (NumPy) só é carregado no primeiro uso, não no boot da API
+    from services.dispatch import DispatchOptimizer
+
+    optimizer = DispatchOptimizer(db)
+    return optimizer.optimize(
+        current_tenant.id,
+        request.date,
+        time_budget=request.time_budget_seconds,
+        apply=request.apply
+    )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
 from models.user import User
 from models.driver import Driver
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/drivers", tags=["drivers"])
 @router.post("/", response_model=DriverSchema)
 def create_driver(
     driver: DriverCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     # Verificar se CNH já existe
@@ -35,7 +35,7 @@ def create_driver(
 def read_drivers(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     drivers = db.query(Driver).offset(skip).limit(limit).all()
@@ -45,7 +45,7 @@ def read_drivers(
 @router.get("/{driver_id}", response_model=DriverSchema)
 def read_driver(
     driver_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     driver = db.query(Driver).filter(Driver.id == driver_id).first()
@@ -58,7 +58,7 @@ def read_driver(
 def update_driver(
     driver_id: int,
     driver: DriverUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     db_driver = db.query(Driver).filter(Driver.id == driver_id).first()
@@ -77,7 +77,7 @@ def update_driver(
 @router.delete("/{driver_id}")
 def delete_driver(
     driver_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     driver = db.query(Driver).filter(Driver.id == driver_id).first()
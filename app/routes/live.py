@@ -0,0 +1,77 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+from core.database import tenant_session
+from core.live_events import coalesce, live_hub
+from routes.auth import get_current_user
+from models.user import User
+from models.tenant import Tenant
+from core.tenant import get_current_tenant
+from services.dashboard import DashboardService
+
+router = APIRouter(prefix="/live", tags=["live"])
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _dashboard_snapshot(tenant_id: int):
+    db = tenant_session(tenant_id)
+    try:
+        return DashboardService.get_dashboard_stats(db).model_dump(mode="json")
+    finally:
+        db.close()
+
+
+@router.get("/dashboard")
+async def stream_dashboard(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Atualizações do dashboard por Server-Sent Events
+
+    Eventos: snapshot (estatísticas completas ao conectar), trips (viagens criadas/alteradas
+    com status_delta por status e tabelas alteradas em changed) e resync (mensagens perdidas:
+    o cliente deve recarregar /dashboard/stats).
+    """
+    async def events():
+        # Assinar antes do snapshot: nada que mude depois dele se perde
+        subscriber = live_hub.subscribe(current_tenant.id)
+        try:
+            yield f"retry: {int(settings.LIVE_HEARTBEAT_SECONDS * 1000)}\n\n"
+            yield _sse("snapshot", await run_in_threadpool(_dashboard_snapshot, current_tenant.id))
+            while True:
+                try:
+                    first = await asyncio.wait_for(subscriber.queue.get(), timeout=settings.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if subscriber.overflowed:
+                        subscriber.overflowed = False
+                        yield _sse("resync", {})
+                    else:
+                        yield ": keepalive\n\n"
+                    continue
+                # Janela de coalescência: uma mensagem por rajada de commits
+                await asyncio.sleep(settings.LIVE_COALESCE_SECONDS)
+                messages = [first] + subscriber.drain()
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield _sse("resync", {})
+                    continue
+                update = coalesce(messages)
+                if update["trips"] or update["changed"]:
+                    yield _sse("trips", update)
+                if await request.is_disconnected():
+                    break
+        finally:
+            live_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
 from models.user import User
 from schemas.maintenance import (
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/maintenance", tags=["maintenance"])
 @router.post("/", response_model=Maintenance)
 def create_maintenance(
     maintenance: MaintenanceCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Criar nova manutenção"""
@@ -31,7 +31,7 @@ def get_maintenances(
     limit: int = Query(100, ge=1, le=1000),
     vehicle_id: Optional[int] = Query(None),
     maintenance_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Listar manutenções com filtros opcionais"""
@@ -45,7 +45,7 @@ def get_maintenances(
 @router.get("/{maintenance_id}", response_model=MaintenanceWithVehicle)
 def get_maintenance(
     maintenance_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Obter manutenção específica com informações do veículo"""
@@ -59,7 +59,7 @@ def get_maintenance(
 def update_maintenance(
     maintenance_id: int,
     maintenance: MaintenanceUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Atualizar manutenção"""
@@ -72,7 +72,7 @@ def update_maintenance(
 @router.delete("/{maintenance_id}")
 def delete_maintenance(
     maintenance_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Deletar manutenção"""
@@ -84,7 +84,7 @@ def delete_maintenance(
 
 @router.get("/reports/costs-by-vehicle")
 def get_maintenance_costs_by_vehicle(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Relatório de custos de manutenção por veículo"""
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import json
+import uuid
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from core.database import get_db
+from core.config import settings
+from core.tenant import get_current_tenant, get_tenant_db_session
+from core.redis_client import async_redis_client
 from routes.auth import get_current_user
+from core.etag import tenant_data_etag
 from models.user import User
+from models.tenant import Tenant
 from schemas.reports import ReportRequest, ReportStatus, DashboardV2
 from services.dashboard import DashboardService
-from tasks.reports import generate_report_task
+from services import report_progress
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -14,33 +22,75 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 def generate_report(
     report_request: ReportRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
 ):
     """Solicitar geração de relatório em background"""
-    task = generate_report_task.delay(
-        report_type=report_request.report_type.value,
-        format=report_request.format.value,
-        start_date=report_request.start_date.isoformat() if report_request.start_date else None,
-        end_date=report_request.end_date.isoformat() if report_request.end_date else None,
-        client_id=report_request.client_id,
-        driver_id=report_request.driver_id,
-        vehicle_id=report_request.vehicle_id
+    # Import tardio: o Celery só é carregado no primeiro uso, não no boot da API
+    from tasks.reports import generate_report_task
+    
+    # Estado inicial gravado antes de enfileirar: o worker pode começar (e até
+    # terminar) antes de a requisição retornar
+    task_id = str(uuid.uuid4())
+    report_progress.register_report(task_id, current_user.id)
+    generate_report_task.apply_async(
+        kwargs=dict(
+            report_type=report_request.report_type.value,
+            format=report_request.format.value,
+            start_date=report_request.start_date.isoformat() if report_request.start_date else None,
+            end_date=report_request.end_date.isoformat() if report_request.end_date else None,
+            client_id=report_request.client_id,
+            driver_id=report_request.driver_id,
+            vehicle_id=report_request.vehicle_id,
+            tenant_id=current_tenant.id
+        ),
+        task_id=task_id
     )
     
     return ReportStatus(
-        task_id=task.id,
+        task_id=task_id,
         status="PENDING",
         progress=0
     )
 
 
+def _to_status(state: Dict[str, str]) -> ReportStatus:
+    def number(name: str) -> Optional[int]:
+        return int(state[name]) if state.get(name) else None
+
+    return ReportStatus(
+        task_id=state["task_id"],
+        status=state["status"],
+        progress=number("progress"),
+        message=state.get("message") or None,
+        rows_processed=number("rows_processed"),
+        rows_total=number("rows_total"),
+        download_url=state.get("download_url") or None
+    )
+
+
+def _owned(state: Optional[Dict[str, str]], user: User) -> bool:
+    return state is not None and state.get("user_id") == str(user.id)
+
+
+def _sse(state: Dict[str, str]) -> str:
+    return f"event: progress\ndata: {_to_status(state).model_dump_json()}\n\n"
+
+
 @router.get("/status/{task_id}", response_model=ReportStatus)
 def get_report_status(
     task_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Verificar status de um relatório"""
+    """Verificar status de um relatório (estado publicado pela tarefa no Redis)"""
+    state = report_progress.read_progress(task_id)
+    if state is not None:
+        if not _owned(state, current_user):
+            raise HTTPException(status_code=404, detail="Report not found")
+        return _to_status(state)
+    
+    # Relatórios anteriores ao registro de progresso: consultar o backend do Celery
     from core.celery_app import celery_app
     
     task_result = celery_app.AsyncResult(task_id)
@@ -67,10 +117,76 @@ def get_report_status(
         )
 
 
+@router.get("/progress/{task_id}")
+async def stream_report_progress(
+    task_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Progresso do relatório por Server-Sent Events, até o estado final"""
+    if not _owned(await report_progress.read_progress_async(task_id), current_user):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    async def events():
+        pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(report_progress.CHANNEL.format(task_id=task_id))
+        try:
+            # Lido após assinar: nenhuma atualização entre a leitura e a assinatura se perde
+            state = await report_progress.read_progress_async(task_id)
+            if state is None:
+                return
+            yield _sse(state)
+            while state["status"] not in report_progress.FINAL_STATES:
+                message = await pubsub.get_message(timeout=settings.LIVE_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                state = json.loads(message["data"])
+                yield _sse(state)
+        finally:
+            await pubsub.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{task_id}/cancel", response_model=ReportStatus)
+def cancel_report(
+    task_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Cancelar a geração: revoga a tarefa na fila e interrompe a que está em execução"""
+    state = report_progress.read_progress(task_id)
+    if not _owned(state, current_user):
+        raise HTTPException(status_code=404, detail="Report not found")
+    if state["status"] in report_progress.FINAL_STATES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report already {state['status'].lower()}"
+        )
+
+    from core.celery_app import celery_app
+
+    # Ainda na fila: o worker descarta; em execução: para na próxima atualização de progresso
+    celery_app.control.revoke(task_id)
+    state = report_progress.request_cancel(task_id)
+    if state["status"] != report_progress.CANCELLED:
+        # Concluído entre a leitura e o pedido
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report already {state['status'].lower()}"
+        )
+    report_progress.remove_partial_files(task_id)
+    return _to_status(state)
+
+
 @router.get("/dashboard/v2", response_model=DashboardV2)
 def get_dashboard_v2(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    etag: None = Depends(tenant_data_etag("trips", "clients", "drivers", "routes", "vehicles", "maintenances"))
 ):
     """Dashboard avançado com métricas financeiras e rankings"""
     return DashboardService.get_dashboard_v2(db)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
 from models.user import User
 from models.route import Route
@@ -13,10 +13,29 @@ router = APIRouter(prefix="/routes", tags=["routes"])
 @router.post("/", response_model=RouteSchema)
 def create_route(
     route: RouteCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
-    db_route = Route(**route.dict())
+    data = route.dict()
+    if data["estimated_distance"] is None or data["estimated_time"] is None:
+        coordinates = (
+            data["origin_latitude"], data["origin_longitude"],
+            data["destination_latitude"], data["destination_longitude"]
+        )
+        if any(value is None for value in coordinates):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Informe estimated_distance/estimated_time ou as coordenadas de origem e destino"
+            )
+        # Import tardio: a matriz de distâncias (NumPy) só é carregada quando usada
+        from services.distance_matrix import DistanceMatrixService
+        distance, duration = DistanceMatrixService(db).distance(coordinates[:2], coordinates[2:])
+        if data["estimated_distance"] is None:
+            data["estimated_distance"] = round(distance, 2)
+        if data["estimated_time"] is None:
+            data["estimated_time"] = round(duration, 2)
+
+    db_route = Route(**data)
     db.add(db_route)
     db.commit()
     db.refresh(db_route)
@@ -27,7 +46,7 @@ def create_route(
 def read_routes(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     routes = db.query(Route).offset(skip).limit(limit).all()
@@ -37,7 +56,7 @@ def read_routes(
 @router.get("/{route_id}", response_model=RouteSchema)
 def read_route(
     route_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     route = db.query(Route).filter(Route.id == route_id).first()
@@ -50,7 +69,7 @@ def read_route(
 def update_route(
     route_id: int,
     route: RouteUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     db_route = db.query(Route).filter(Route.id == route_id).first()
@@ -69,7 +88,7 @@ def update_route(
 @router.delete("/{route_id}")
 def delete_route(
     route_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     route = db.query(Route).filter(Route.id == route_id).first()
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from core.config import settings
+from core.metrics import GPS_POSITIONS
+from routes.auth import get_current_user
+from models.user import User
+from models.tenant import Tenant
+from models.vehicle import Vehicle
+from models.vehicle_position import VehiclePosition
+from core.tenant import get_current_tenant, get_tenant_db_session, get_token_tenant_id
+from schemas.telemetry import PositionBatch, PositionIngestResult, Position
+from services.telemetry import enqueue_positions, latest_positions, to_millis
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+
+@router.post("/positions", response_model=PositionIngestResult, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_positions(
+    batch: PositionBatch,
+    tenant_id: int = Depends(get_token_tenant_id)
+):
+    """Receber um lote de posições GPS; a gravação é assíncrona (stream Redis -> consumidores)
+
+    Caminho quente: o tenant vem do token (sem consultas ao banco por lote).
+    """
+    now = datetime.now(timezone.utc)
+    oldest = to_millis(now - timedelta(days=settings.GPS_MAX_POINT_AGE_DAYS))
+    newest = to_millis(now + timedelta(seconds=settings.GPS_MAX_CLOCK_SKEW_SECONDS))
+
+    points = []
+    for position in batch.positions:
+        recorded_ms = to_millis(position.recorded_at)
+        if oldest <= recorded_ms <= newest:
+            points.append((position.vehicle_id, recorded_ms, position.latitude, position.longitude, position.speed_kmh))
+    rejected = len(batch.positions) - len(points)
+
+    if points and not await enqueue_positions(tenant_id, points):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Telemetry backlog is full, retry later",
+            headers={"Retry-After": "5"}
+        )
+    GPS_POSITIONS.labels(result="accepted").inc(len(points))
+    GPS_POSITIONS.labels(result="rejected").inc(rejected)
+    return {"accepted": len(points), "rejected": rejected}
+
+
+@router.get("/latest", response_model=List[Position])
+async def read_latest_positions(
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Última posição conhecida de cada veículo (cache Redis mantido pelos consumidores)"""
+    return await latest_positions(current_tenant.id)
+
+
+@router.get("/vehicles/{vehicle_id}/positions", response_model=List[Position])
+def read_vehicle_positions(
+    vehicle_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(1000, gt=0, le=10000),
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Trajeto do veículo na janela (padrão: últimas 24 horas)"""
+    vehicle = db.query(Vehicle.id).filter(
+        Vehicle.id == vehicle_id,
+        Vehicle.tenant_id == current_tenant.id
+    ).first()
+    if vehicle is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=1)
+    # Filtro em recorded_at: só as partições dos meses da janela são lidas
+    return db.query(VehiclePosition).filter(
+        VehiclePosition.vehicle_id == vehicle_id,
+        VehiclePosition.recorded_at >= start,
+        VehiclePosition.recorded_at < end
+    ).order_by(VehiclePosition.recorded_at).limit(limit).all()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from typing import List
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
+from core.etag import tenant_data_etag
 from models.user import User
 from models.trip import Trip, TripStatus
 from models.client import Client
@@ -10,14 +12,48 @@ from models.driver import Driver
 from models.vehicle import Vehicle
 from models.route import Route
 from schemas.trip import TripCreate, TripUpdate, Trip as TripSchema, TripWithRelations
+from services.booking import booking_conflicts, describe_conflicts, is_booking_conflict
 
 router = APIRouter(prefix="/trips", tags=["trips"])
 
+BOOKING_FIELDS = {"driver_id", "vehicle_id", "departure_date", "estimated_arrival", "status"}
+
+
+def _check_booking(db: Session, trip: Trip, exclude_trip_id: int = None) -> None:
+    """409 se o motorista ou o veículo já tem viagem ativa sobreposta à janela"""
+    if trip.status not in (None, TripStatus.PLANNED, TripStatus.IN_TRANSIT):
+        return
+    conflicts = booking_conflicts(
+        db, trip.driver_id, trip.vehicle_id, trip.departure_date, trip.estimated_arrival, exclude_trip_id
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Driver or vehicle already booked in this period",
+                "conflicts": describe_conflicts(conflicts, trip.driver_id, trip.vehicle_id)
+            }
+        )
+
+
+def _commit_booking(db: Session) -> None:
+    # Reserva concorrente entre a checagem e o commit: barrada pelas restrições de exclusão
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_booking_conflict(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Driver or vehicle already booked in this period"
+            )
+        raise
+
 
 @router.post("/", response_model=TripSchema)
 def create_trip(
     trip: TripCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     # Verificar se as entidades relacionadas existem
@@ -38,8 +74,9 @@ def create_trip(
         raise HTTPException(status_code=404, detail="Route not found")
     
     db_trip = Trip(**trip.dict())
+    _check_booking(db, db_trip)
     db.add(db_trip)
-    db.commit()
+    _commit_booking(db)
     db.refresh(db_trip)
     return db_trip
 
@@ -49,54 +86,47 @@ def read_trips(
     skip: int = 0,
     limit: int = 100,
     status: TripStatus = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_tenant_db_session),
+    current_user: User = Depends(get_current_user),
+    etag: None = Depends(tenant_data_etag("trips", "clients", "drivers", "vehicles", "routes"))
 ):
-    query = db.query(Trip)
+    # Relações carregadas no mesmo SELECT (evita N+1 ao ler os nomes)
+    query = db.query(Trip).options(
+        joinedload(Trip.client).load_only(Client.name),
+        joinedload(Trip.driver).load_only(Driver.name),
+        joinedload(Trip.vehicle).load_only(Vehicle.plate),
+        joinedload(Trip.route).load_only(Route.name)
+    )
     if status:
         query = query.filter(Trip.status == status)
     
-    trips = query.offset(skip).limit(limit).all()
-    
-    # Adicionar informações das relações
-    result = []
-    for trip in trips:
-        trip_data = TripWithRelations(
-            **trip.__dict__,
-            client_name=trip.client.name,
-            driver_name=trip.driver.name,
-            vehicle_plate=trip.vehicle.plate,
-            route_name=trip.route.name
-        )
-        result.append(trip_data)
-    
-    return result
+    # O response_model valida direto dos atributos do ORM
+    return query.offset(skip).limit(limit).all()
 
 
 @router.get("/{trip_id}", response_model=TripWithRelations)
 def read_trip(
     trip_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    trip = db.query(Trip).options(
+        joinedload(Trip.client),
+        joinedload(Trip.driver),
+        joinedload(Trip.vehicle),
+        joinedload(Trip.route)
+    ).filter(Trip.id == trip_id).first()
     if trip is None:
         raise HTTPException(status_code=404, detail="Trip not found")
     
-    return TripWithRelations(
-        **trip.__dict__,
-        client_name=trip.client.name,
-        driver_name=trip.driver.name,
-        vehicle_plate=trip.vehicle.plate,
-        route_name=trip.route.name
-    )
+    return trip
 
 
 @router.put("/{trip_id}", response_model=TripSchema)
 def update_trip(
     trip_id: int,
     trip: TripUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     db_trip = db.query(Trip).filter(Trip.id == trip_id).first()
@@ -106,8 +136,11 @@ def update_trip(
     update_data = trip.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_trip, field, value)
+    if BOOKING_FIELDS & update_data.keys():
+        with db.no_autoflush:
+            _check_booking(db, db_trip, exclude_trip_id=db_trip.id)
     
-    db.commit()
+    _commit_booking(db)
     db.refresh(db_trip)
     return db_trip
 
@@ -116,7 +149,7 @@ def update_trip(
 def update_trip_status(
     trip_id: int,
     status: TripStatus,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     db_trip = db.query(Trip).filter(Trip.id == trip_id).first()
@@ -133,7 +166,7 @@ def update_trip_status(
         from datetime import datetime
         db_trip.actual_arrival = datetime.utcnow()
     
-    db.commit()
+    _commit_booking(db)
     db.refresh(db_trip)
     return {"message": f"Trip status updated to {status.value}"}
 
@@ -141,7 +174,7 @@ def update_trip_status(
 @router.delete("/{trip_id}")
 def delete_trip(
     trip_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     trip = db.query(Trip).filter(Trip.id == trip_id).first()
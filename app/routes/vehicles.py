@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from core.database import get_db
+from core.tenant import get_tenant_db_session
 from routes.auth import get_current_user
 from models.user import User
 from models.vehicle import Vehicle
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 @router.post("/", response_model=VehicleSchema)
 def create_vehicle(
     vehicle: VehicleCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     # Verificar se placa já existe
@@ -35,7 +35,7 @@ def create_vehicle(
 def read_vehicles(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     vehicles = db.query(Vehicle).offset(skip).limit(limit).all()
@@ -45,7 +45,7 @@ def read_vehicles(
 @router.get("/{vehicle_id}", response_model=VehicleSchema)
 def read_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
@@ -58,7 +58,7 @@ def read_vehicle(
 def update_vehicle(
     vehicle_id: int,
     vehicle: VehicleUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     db_vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
@@ -77,7 +77,7 @@ def update_vehicle(
 @router.delete("/{vehicle_id}")
 def delete_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db_session),
     current_user: User = Depends(get_current_user)
 ):
     vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+from schemas.driver import Driver
+from schemas.vehicle import Vehicle
+
+
+class Availability(BaseModel):
+    start: datetime
+    end: datetime
+    drivers: List[Driver]
+    vehicles: List[Vehicle]
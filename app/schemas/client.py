@@ -13,6 +13,9 @@ class ClientBase(BaseModel):
     city: str
     state: str
     zip_code: str
+    # Opcionais: sem elas, vêm do cache de geocodificação ou do job em lote
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 
 class ClientCreate(ClientBase):
@@ -29,10 +32,13 @@ class ClientUpdate(BaseModel):
     city: Optional[str] = None
     state: Optional[str] = None
     zip_code: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 
 class Client(ClientBase):
     id: int
+    geocoded_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date
+
+
+class DispatchOptimizeRequest(BaseModel):
+    date: date
+    time_budget_seconds: Optional[float] = Field(None, gt=0)
+    apply: bool = False  # True: grava veículos, motoristas e horários nas viagens
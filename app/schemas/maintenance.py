@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, AliasPath
 from typing import Optional
 from datetime import datetime, date
 from models.maintenance import MaintenanceType
@@ -38,6 +38,10 @@ class Maintenance(MaintenanceBase):
 
 
 class MaintenanceWithVehicle(Maintenance):
-    vehicle_plate: str
-    vehicle_model: str
-    vehicle_brand: str
\ No newline at end of file
+    vehicle_plate: str = Field(validation_alias=AliasPath("vehicle", "plate"))
+    vehicle_model: str = Field(validation_alias=AliasPath("vehicle", "model"))
+    vehicle_brand: str = Field(validation_alias=AliasPath("vehicle", "brand"))
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
\ No newline at end of file
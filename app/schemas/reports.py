@@ -28,8 +28,11 @@ class ReportRequest(BaseModel):
 
 class ReportStatus(BaseModel):
     task_id: str
-    status: str
+    status: str  # PENDING, RUNNING, COMPLETED, FAILED, CANCELLED
     progress: Optional[int] = None
+    message: Optional[str] = None
+    rows_processed: Optional[int] = None
+    rows_total: Optional[int] = None
     download_url: Optional[str] = None
 
 
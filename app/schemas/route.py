@@ -10,10 +10,16 @@ class RouteBase(BaseModel):
     estimated_distance: float
     estimated_time: float
     description: Optional[str] = None
+    origin_latitude: Optional[float] = None
+    origin_longitude: Optional[float] = None
+    destination_latitude: Optional[float] = None
+    destination_longitude: Optional[float] = None
 
 
 class RouteCreate(RouteBase):
-    pass
+    # Sem distância/tempo, são calculados pelas coordenadas (serviço de matriz de distâncias)
+    estimated_distance: Optional[float] = None
+    estimated_time: Optional[float] = None
 
 
 class RouteUpdate(BaseModel):
@@ -23,6 +29,10 @@ class RouteUpdate(BaseModel):
     estimated_distance: Optional[float] = None
     estimated_time: Optional[float] = None
     description: Optional[str] = None
+    origin_latitude: Optional[float] = None
+    origin_longitude: Optional[float] = None
+    destination_latitude: Optional[float] = None
+    destination_longitude: Optional[float] = None
     is_active: Optional[bool] = None
 
 
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from core.config import settings
+
+
+class PositionIn(BaseModel):
+    vehicle_id: int
+    recorded_at: datetime  # sem fuso: UTC
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    speed_kmh: Optional[float] = Field(None, ge=0)
+
+
+class PositionBatch(BaseModel):
+    positions: List[PositionIn] = Field(..., min_length=1, max_length=settings.GPS_MAX_BATCH_SIZE)
+
+
+class PositionIngestResult(BaseModel):
+    accepted: int
+    rejected: int  # fora da janela de GPS_MAX_POINT_AGE_DAYS / GPS_MAX_CLOCK_SKEW_SECONDS
+
+
+class Position(BaseModel):
+    vehicle_id: int
+    recorded_at: datetime
+    latitude: float
+    longitude: float
+    speed_kmh: Optional[float] = None
+
+    class Config:
+        from_attributes = True
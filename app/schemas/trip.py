@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, AliasPath
 from typing import Optional
 from datetime import datetime
 from models.trip import TripStatus
@@ -18,6 +18,7 @@ class TripBase(BaseModel):
     daily_allowance_cost: Optional[float] = None
     other_costs: Optional[float] = None
     freight_revenue: Optional[float] = None
+    cargo_weight: Optional[float] = None
     notes: Optional[str] = None
 
 
@@ -42,6 +43,7 @@ class TripUpdate(BaseModel):
     daily_allowance_cost: Optional[float] = None
     other_costs: Optional[float] = None
     freight_revenue: Optional[float] = None
+    cargo_weight: Optional[float] = None
     notes: Optional[str] = None
 
 
@@ -63,10 +65,12 @@ class Trip(TripBase):
 
 
 class TripWithRelations(Trip):
-    client_name: str
-    driver_name: str
-    vehicle_plate: str
-    route_name: str
+    # Lidos direto das relações do ORM (model_validate(trip) sem montar dicts)
+    client_name: str = Field(validation_alias=AliasPath("client", "name"))
+    driver_name: str = Field(validation_alias=AliasPath("driver", "name"))
+    vehicle_plate: str = Field(validation_alias=AliasPath("vehicle", "plate"))
+    route_name: str = Field(validation_alias=AliasPath("route", "name"))
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+        populate_by_name = True
\ No newline at end of file
@@ -1,16 +1,249 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_, case, distinct, extract, select, true
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta, date
 from models.trip import Trip, TripStatus
 from models.client import Client
 from models.driver import Driver
+from models.route import Route
 from models.vehicle import Vehicle
 from models.maintenance import Maintenance, MaintenanceType
+from core.config import settings
+from core.database import run_concurrently
 from core.logging import get_logger
+from services.analytics_cache import cached_analytics
 
 logger = get_logger("analytics")
 
+DELAY_PERCENTILES = (50, 90, 99)
+
+
+def _trip_cube(db: Session, tenant_id: int):
+    # Import tardio: o cubo (NumPy) só é carregado na primeira consulta, não no boot da API
+    from services.analytics_cube import get_trip_cube
+    return get_trip_cube(db, tenant_id)
+
+
+# Colunas agregadas reutilizadas pelos KPIs individuais e pela consulta combinada.
+# Cada KPI usa FILTER com a própria janela, então vários cabem num único SELECT.
+
+def _trip_cost():
+    return (
+        func.coalesce(Trip.actual_fuel_cost, 0) +
+        func.coalesce(Trip.actual_toll_cost, 0) +
+        func.coalesce(Trip.daily_allowance_cost, 0) +
+        func.coalesce(Trip.other_costs, 0)
+    )
+
+
+def _completed_since(start_date: datetime):
+    return and_(Trip.status == TripStatus.COMPLETED, Trip.created_at >= start_date)
+
+
+def _retention_columns(start_date: datetime) -> list:
+    return [
+        func.count(distinct(Trip.client_id)).filter(Trip.created_at >= start_date).label("retained_clients"),
+    ]
+
+
+def _occupation_columns(start_date: datetime) -> list:
+    return [
+        func.count(distinct(Trip.vehicle_id)).filter(Trip.created_at >= start_date).label("active_vehicles"),
+    ]
+
+
+def _cost_per_km_columns(start_date: datetime) -> list:
+    completed = _completed_since(start_date)
+    return [
+        func.coalesce(func.sum(_trip_cost()).filter(completed), 0).label("cost_total"),
+        func.coalesce(func.sum(func.coalesce(Route.estimated_distance, 0)).filter(completed), 0).label("cost_distance"),
+        func.count(Trip.id).filter(completed).label("cost_trips"),
+    ]
+
+
+def _on_time_columns(start_date: datetime) -> list:
+    completed = _completed_since(start_date)
+    return [
+        func.count(Trip.id).filter(
+            and_(completed, Trip.actual_arrival <= Trip.estimated_arrival)
+        ).label("on_time_trips"),
+        func.count(Trip.id).filter(
+            and_(completed, Trip.actual_arrival > Trip.estimated_arrival)
+        ).label("delayed_trips"),
+        *_delay_distribution_columns(completed),
+    ]
+
+
+def _lateness_minutes():
+    """Atraso na chegada em minutos (negativo = chegou antes do previsto)"""
+    return extract("epoch", Trip.actual_arrival - Trip.estimated_arrival) / 60
+
+
+def _delay_distribution_columns(condition) -> list:
+    """Percentis (percentile_cont) e média do atraso das viagens atrasadas"""
+    # NULL para as viagens no prazo: agregados ordenados ignoram NULLs
+    lateness = case(
+        (and_(condition, Trip.actual_arrival > Trip.estimated_arrival), _lateness_minutes())
+    )
+    return [
+        func.percentile_cont(percentile / 100).within_group(lateness).label(f"delay_p{percentile}")
+        for percentile in DELAY_PERCENTILES
+    ] + [func.avg(lateness).label("delay_avg")]
+
+
+def _trip_stats(tenant_id: int, since: datetime, columns: list):
+    """SELECT agregado sobre as viagens do tenant (com a rota para distâncias)"""
+    return select(*columns).select_from(Trip).outerjoin(
+        Route, Trip.route_id == Route.id
+    ).where(
+        Trip.tenant_id == tenant_id,
+        Trip.created_at >= since
+    )
+
+
+def _on_time_by_route(tenant_id: int, start_date: datetime):
+    """Viagens no prazo/atrasadas e distribuição de atraso por rota"""
+    return select(
+        Route.id.label("route_id"),
+        Route.name.label("route_name"),
+        func.count(Trip.id).filter(Trip.actual_arrival <= Trip.estimated_arrival).label("on_time_trips"),
+        func.count(Trip.id).filter(Trip.actual_arrival > Trip.estimated_arrival).label("delayed_trips"),
+        *_delay_distribution_columns(true()),
+    ).select_from(Trip).join(
+        Route, Trip.route_id == Route.id
+    ).where(
+        Trip.tenant_id == tenant_id,
+        _completed_since(start_date),
+        Trip.actual_arrival.isnot(None),
+        Trip.estimated_arrival.isnot(None)
+    ).group_by(Route.id, Route.name).order_by(Route.name)
+
+
+def _total_vehicles(tenant_id: int):
+    return select(func.count(Vehicle.id)).where(Vehicle.tenant_id == tenant_id).scalar_subquery()
+
+
+def _total_old_clients(tenant_id: int, start_date: datetime):
+    return select(func.count(Client.id)).where(
+        Client.tenant_id == tenant_id,
+        Client.created_at <= start_date
+    ).scalar_subquery()
+
+
+def _maintenance_stats(tenant_id: int, start_date: datetime):
+    preventive = Maintenance.maintenance_type == MaintenanceType.PREVENTIVE.value
+    return select(
+        func.coalesce(func.sum(Maintenance.cost).filter(preventive), 0).label("preventive_cost"),
+        func.coalesce(func.sum(Maintenance.cost).filter(~preventive), 0).label("corrective_cost"),
+        func.count(Maintenance.id).label("total_maintenances"),
+    ).select_from(Maintenance).join(Vehicle).where(
+        Vehicle.tenant_id == tenant_id,
+        Maintenance.maintenance_date >= start_date
+    )
+
+
+# Formatação dos resultados (mesmo formato nos endpoints individuais e no completo)
+
+def _format_retention(total_old_clients: int, retained_count: int, period_days: int) -> Dict[str, Any]:
+    retention_rate = (retained_count / total_old_clients * 100) if total_old_clients > 0 else 0
+    return {
+        "retention_rate": round(retention_rate, 2),
+        "total_old_clients": total_old_clients,
+        "retained_clients": retained_count,
+        "period_days": period_days
+    }
+
+
+def _format_occupation(total_vehicles: int, active_vehicles: int, period_days: int) -> Dict[str, Any]:
+    occupation_rate = (active_vehicles / total_vehicles * 100) if total_vehicles > 0 else 0
+    return {
+        "occupation_rate": round(occupation_rate, 2),
+        "total_vehicles": total_vehicles,
+        "active_vehicles": active_vehicles,
+        "period_days": period_days
+    }
+
+
+def _format_cost_per_km(total_cost, total_distance, completed_trips: int, period_days: int) -> Dict[str, Any]:
+    total_cost = float(total_cost or 0)
+    total_distance = float(total_distance or 0)
+    avg_cost_per_km = (total_cost / total_distance) if total_distance > 0 else 0
+    return {
+        "average_cost_per_km": round(avg_cost_per_km, 2),
+        "total_cost": round(total_cost, 2),
+        "total_distance": round(total_distance, 2),
+        "completed_trips": completed_trips,
+        "period_days": period_days
+    }
+
+
+def _format_driver_performance(driver_stats) -> List[Dict[str, Any]]:
+    results = []
+    for stat in driver_stats:
+        completion_rate = (stat.completed_trips / stat.total_trips * 100) if stat.total_trips > 0 else 0
+        
+        results.append({
+            "driver_id": stat.id,
+            "driver_name": stat.name,
+            "total_trips": stat.total_trips,
+            "completed_trips": stat.completed_trips,
+            "completion_rate": round(completion_rate, 2),
+            "total_revenue": round(float(stat.total_revenue or 0), 2),
+            "average_fuel_cost": round(float(stat.avg_fuel_cost or 0), 2)
+        })
+    return results
+
+
+def _format_delay_distribution(row) -> Dict[str, float]:
+    distribution = {
+        f"p{percentile}_minutes": round(float(getattr(row, f"delay_p{percentile}") or 0), 1)
+        for percentile in DELAY_PERCENTILES
+    }
+    distribution["average_minutes"] = round(float(row.delay_avg or 0), 1)
+    return distribution
+
+
+def _format_on_time_counts(row) -> Dict[str, Any]:
+    total_trips = row.on_time_trips + row.delayed_trips
+    on_time_rate = (row.on_time_trips / total_trips * 100) if total_trips > 0 else 0
+    return {
+        "on_time_rate": round(on_time_rate, 2),
+        "on_time_trips": row.on_time_trips,
+        "delayed_trips": row.delayed_trips,
+        "total_trips": total_trips,
+        "delay_distribution": _format_delay_distribution(row)
+    }
+
+
+def _format_route_breakdown(route_rows) -> List[Dict[str, Any]]:
+    return [
+        {"route_id": route.route_id, "route_name": route.route_name, **_format_on_time_counts(route)}
+        for route in route_rows
+    ]
+
+
+def _format_on_time(row, route_rows, period_days: int) -> Dict[str, Any]:
+    return {
+        **_format_on_time_counts(row),
+        "by_route": _format_route_breakdown(route_rows),
+        "period_days": period_days
+    }
+
+
+def _format_maintenance(row, period_days: int) -> Dict[str, Any]:
+    preventive_cost = float(row.preventive_cost or 0)
+    corrective_cost = float(row.corrective_cost or 0)
+    total_cost = preventive_cost + corrective_cost
+    return {
+        "total_maintenance_cost": round(total_cost, 2),
+        "preventive_cost": round(preventive_cost, 2),
+        "corrective_cost": round(corrective_cost, 2),
+        "preventive_percentage": round((preventive_cost / total_cost * 100) if total_cost > 0 else 0, 2),
+        "corrective_percentage": round((corrective_cost / total_cost * 100) if total_cost > 0 else 0, 2),
+        "total_maintenances": row.total_maintenances,
+        "period_days": period_days
+    }
+
 
 class AnalyticsService:
     """Serviço de analytics e KPIs avançados"""
@@ -18,231 +251,122 @@ class AnalyticsService:
     def __init__(self, db: Session):
         self.db = db
     
+    @cached_analytics("customer_retention", "clients", "trips")
     def get_customer_retention_rate(self, tenant_id: int, period_days: int = 90) -> Dict[str, Any]:
         """Calcular taxa de retenção de clientes"""
         
         start_date = datetime.now() - timedelta(days=period_days)
         
-        # Clientes ativos no período
-        active_clients = self.db.query(Client).filter(
-            and_(
-                Client.tenant_id == tenant_id,
-                Client.created_at <= start_date
-            )
-        ).subquery()
-        
-        # Clientes que fizeram viagens no período
-        retained_clients = self.db.query(Trip.client_id).filter(
-            and_(
-                Trip.tenant_id == tenant_id,
-                Trip.created_at >= start_date
-            )
-        ).distinct().subquery()
+        if settings.ANALYTICS_CUBE_ENABLED:
+            total_old_clients, retained = _trip_cube(self.db, tenant_id).retention_counts(start_date)
+            return _format_retention(total_old_clients, retained, period_days)
         
-        # Calcular retenção
-        total_old_clients = self.db.query(active_clients).count()
-        retained_count = self.db.query(retained_clients).count()
+        row = self.db.execute(
+            _trip_stats(tenant_id, start_date, [
+                *_retention_columns(start_date),
+                _total_old_clients(tenant_id, start_date).label("total_old_clients"),
+            ])
+        ).one()
         
-        retention_rate = (retained_count / total_old_clients * 100) if total_old_clients > 0 else 0
-        
-        return {
-            "retention_rate": round(retention_rate, 2),
-            "total_old_clients": total_old_clients,
-            "retained_clients": retained_count,
-            "period_days": period_days
-        }
+        return _format_retention(row.total_old_clients, row.retained_clients, period_days)
     
+    @cached_analytics("fleet_occupation", "vehicles", "trips")
     def get_fleet_occupation_rate(self, tenant_id: int, period_days: int = 30) -> Dict[str, Any]:
         """Calcular taxa de ocupação da frota"""
         
         start_date = datetime.now() - timedelta(days=period_days)
         
-        # Total de veículos
-        total_vehicles = self.db.query(Vehicle).filter(
-            Vehicle.tenant_id == tenant_id
-        ).count()
-        
-        # Veículos que fizeram viagens no período
-        active_vehicles = self.db.query(Trip.vehicle_id).filter(
-            and_(
-                Trip.tenant_id == tenant_id,
-                Trip.created_at >= start_date
-            )
-        ).distinct().count()
+        if settings.ANALYTICS_CUBE_ENABLED:
+            total_vehicles, active = _trip_cube(self.db, tenant_id).occupation_counts(start_date)
+            return _format_occupation(total_vehicles, active, period_days)
         
-        occupation_rate = (active_vehicles / total_vehicles * 100) if total_vehicles > 0 else 0
+        row = self.db.execute(
+            _trip_stats(tenant_id, start_date, [
+                *_occupation_columns(start_date),
+                _total_vehicles(tenant_id).label("total_vehicles"),
+            ])
+        ).one()
         
-        return {
-            "occupation_rate": round(occupation_rate, 2),
-            "total_vehicles": total_vehicles,
-            "active_vehicles": active_vehicles,
-            "period_days": period_days
-        }
+        return _format_occupation(row.total_vehicles, row.active_vehicles, period_days)
     
+    @cached_analytics("cost_per_km", "trips", "routes")
     def get_average_cost_per_km(self, tenant_id: int, period_days: int = 30) -> Dict[str, Any]:
         """Calcular custo médio por km rodado"""
         
         start_date = datetime.now() - timedelta(days=period_days)
         
-        # Viagens completadas no período
-        completed_trips = self.db.query(Trip).filter(
-            and_(
-                Trip.tenant_id == tenant_id,
-                Trip.status == TripStatus.COMPLETED,
-                Trip.created_at >= start_date
-            )
-        ).all()
-        
-        total_cost = 0
-        total_distance = 0
-        
-        for trip in completed_trips:
-            # Calcular custo total da viagem
-            trip_cost = (
-                (trip.actual_fuel_cost or 0) +
-                (trip.actual_toll_cost or 0) +
-                (trip.daily_allowance_cost or 0) +
-                (trip.other_costs or 0)
-            )
-            
-            # Obter distância da rota
-            route_distance = trip.route.estimated_distance if trip.route else 0
-            
-            total_cost += trip_cost
-            total_distance += route_distance
+        if settings.ANALYTICS_CUBE_ENABLED:
+            totals = _trip_cube(self.db, tenant_id).cost_per_km_totals(start_date)
+            return _format_cost_per_km(*totals, period_days)
         
-        avg_cost_per_km = (total_cost / total_distance) if total_distance > 0 else 0
+        row = self.db.execute(
+            _trip_stats(tenant_id, start_date, _cost_per_km_columns(start_date))
+        ).one()
         
-        return {
-            "average_cost_per_km": round(avg_cost_per_km, 2),
-            "total_cost": round(total_cost, 2),
-            "total_distance": round(total_distance, 2),
-            "completed_trips": len(completed_trips),
-            "period_days": period_days
-        }
+        return _format_cost_per_km(row.cost_total, row.cost_distance, row.cost_trips, period_days)
     
+    @cached_analytics("future_earnings", "trips")
     def get_future_earnings_projection(self, tenant_id: int, months: int = 6) -> Dict[str, Any]:
-        """Projeção de ganhos futuros"""
-        
-        # Calcular média de receita mensal dos últimos 3 meses
-        three_months_ago = datetime.now() - timedelta(days=90)
-        
-        monthly_revenues = []
-        for i in range(3):
-            month_start = three_months_ago + timedelta(days=i*30)
-            month_end = month_start + timedelta(days=30)
-            
-            month_revenue = self.db.query(func.sum(Trip.freight_revenue)).filter(
-                and_(
-                    Trip.tenant_id == tenant_id,
-                    Trip.created_at >= month_start,
-                    Trip.created_at < month_end
-                )
-            ).scalar() or 0
-            
-            monthly_revenues.append(month_revenue)
-        
-        avg_monthly_revenue = sum(monthly_revenues) / len(monthly_revenues) if monthly_revenues else 0
-        
-        # Projeção para os próximos meses
+        """Projeção de ganhos futuros (Holt-Winters com intervalos de previsão)"""
+        
+        # Calculada em lote pelo job noturno; aqui normalmente só uma leitura do Redis
+        from services.forecasting import RevenueForecastService  # import tardio (NumPy)
+        forecast = RevenueForecastService(self.db).get_forecast(tenant_id)
+        average = forecast["average_monthly_revenue"]
+        
         projections = []
-        for i in range(months):
-            month_date = datetime.now() + timedelta(days=i*30)
-            projected_revenue = avg_monthly_revenue * (1 + (i * 0.05))  # 5% de crescimento mensal
-            
-            projections.append({
-                "month": month_date.strftime("%Y-%m"),
-                "projected_revenue": round(projected_revenue, 2),
-                "growth_rate": round(5 * (i + 1), 2)
-            })
+        for point in forecast["forecast"][:months]:
+            growth_rate = (point["projected_revenue"] / average - 1) * 100 if average > 0 else 0
+            projections.append({**point, "growth_rate": round(growth_rate, 2)})
         
         return {
-            "average_monthly_revenue": round(avg_monthly_revenue, 2),
+            "average_monthly_revenue": average,
             "projections": projections,
-            "total_projected_revenue": round(sum(p["projected_revenue"] for p in projections), 2)
+            "total_projected_revenue": round(sum(p["projected_revenue"] for p in projections), 2),
+            "method": forecast["method"],
+            "history_months": forecast["history_months"],
+            "generated_at": forecast["generated_at"]
         }
     
+    @cached_analytics("on_time_delivery", "trips", "routes")
     def get_on_time_delivery_analysis(self, tenant_id: int, period_days: int = 30) -> Dict[str, Any]:
         """Análise de viagens no prazo vs atrasadas"""
         
         start_date = datetime.now() - timedelta(days=period_days)
         
-        # Viagens completadas no período
-        completed_trips = self.db.query(Trip).filter(
-            and_(
-                Trip.tenant_id == tenant_id,
-                Trip.status == TripStatus.COMPLETED,
-                Trip.created_at >= start_date
-            )
-        ).all()
-        
-        on_time_count = 0
-        delayed_count = 0
+        row = self.db.execute(
+            _trip_stats(tenant_id, start_date, _on_time_columns(start_date))
+        ).one()
+        route_rows = self.get_on_time_by_route(tenant_id, period_days)
         
-        for trip in completed_trips:
-            if trip.actual_arrival and trip.estimated_arrival:
-                if trip.actual_arrival <= trip.estimated_arrival:
-                    on_time_count += 1
-                else:
-                    delayed_count += 1
-        
-        total_trips = on_time_count + delayed_count
-        on_time_rate = (on_time_count / total_trips * 100) if total_trips > 0 else 0
-        
-        return {
-            "on_time_rate": round(on_time_rate, 2),
-            "on_time_trips": on_time_count,
-            "delayed_trips": delayed_count,
-            "total_trips": total_trips,
-            "period_days": period_days
-        }
+        return _format_on_time(row, route_rows, period_days)
     
+    @cached_analytics("maintenance_costs", "maintenances", "vehicles")
     def get_maintenance_cost_analysis(self, tenant_id: int, period_days: int = 90) -> Dict[str, Any]:
         """Análise de custos de manutenção"""
         
         start_date = datetime.now() - timedelta(days=period_days)
         
-        # Manutenções no período
-        maintenances = self.db.query(Maintenance).join(Vehicle).filter(
-            and_(
-                Vehicle.tenant_id == tenant_id,
-                Maintenance.maintenance_date >= start_date
-            )
-        ).all()
-        
-        preventive_cost = 0
-        corrective_cost = 0
-        
-        for maintenance in maintenances:
-            if maintenance.maintenance_type == MaintenanceType.PREVENTIVE:
-                preventive_cost += maintenance.cost
-            else:
-                corrective_cost += maintenance.cost
-        
-        total_cost = preventive_cost + corrective_cost
+        row = self.db.execute(_maintenance_stats(tenant_id, start_date)).one()
         
-        return {
-            "total_maintenance_cost": round(total_cost, 2),
-            "preventive_cost": round(preventive_cost, 2),
-            "corrective_cost": round(corrective_cost, 2),
-            "preventive_percentage": round((preventive_cost / total_cost * 100) if total_cost > 0 else 0, 2),
-            "corrective_percentage": round((corrective_cost / total_cost * 100) if total_cost > 0 else 0, 2),
-            "total_maintenances": len(maintenances),
-            "period_days": period_days
-        }
+        return _format_maintenance(row, period_days)
     
+    @cached_analytics("driver_performance", "drivers", "trips")
     def get_driver_performance_metrics(self, tenant_id: int, period_days: int = 30) -> List[Dict[str, Any]]:
         """Métricas de performance dos motoristas"""
         
         start_date = datetime.now() - timedelta(days=period_days)
         
+        if settings.ANALYTICS_CUBE_ENABLED:
+            return _format_driver_performance(_trip_cube(self.db, tenant_id).driver_stats(start_date))
+        
         # Estatísticas por motorista
         driver_stats = self.db.query(
             Driver.id,
             Driver.name,
             func.count(Trip.id).label('total_trips'),
-            func.count(
-                func.case((Trip.status == TripStatus.COMPLETED, 1))
+            func.count(Trip.id).filter(
+                Trip.status == TripStatus.COMPLETED
             ).label('completed_trips'),
             func.sum(func.coalesce(Trip.freight_revenue, 0)).label('total_revenue'),
             func.avg(func.coalesce(Trip.actual_fuel_cost, 0)).label('avg_fuel_cost')
@@ -253,31 +377,67 @@ class AnalyticsService:
             )
         ).group_by(Driver.id, Driver.name).all()
         
-        results = []
-        for stat in driver_stats:
-            completion_rate = (stat.completed_trips / stat.total_trips * 100) if stat.total_trips > 0 else 0
-            
-            results.append({
-                "driver_id": stat.id,
-                "driver_name": stat.name,
-                "total_trips": stat.total_trips,
-                "completed_trips": stat.completed_trips,
-                "completion_rate": round(completion_rate, 2),
-                "total_revenue": round(float(stat.total_revenue or 0), 2),
-                "average_fuel_cost": round(float(stat.avg_fuel_cost or 0), 2)
-            })
-        
-        return results
+        return _format_driver_performance(driver_stats)
+    
+    def get_on_time_by_route(self, tenant_id: int, period_days: int = 30) -> List[Any]:
+        """Linhas de pontualidade por rota (formatadas em get_on_time_delivery_analysis)"""
+        
+        start_date = datetime.now() - timedelta(days=period_days)
+        return self.db.execute(_on_time_by_route(tenant_id, start_date)).all()
+    
+    def get_summary_kpis(self, tenant_id: int) -> Dict[str, Any]:
+        """KPIs agregados de viagens e manutenções em uma única consulta com CTEs"""
+        
+        now = datetime.now()
+        retention_start = now - timedelta(days=90)
+        recent_start = now - timedelta(days=30)
+        
+        trip_stats = _trip_stats(tenant_id, retention_start, [
+            *_retention_columns(retention_start),
+            *_occupation_columns(recent_start),
+            *_cost_per_km_columns(recent_start),
+            *_on_time_columns(recent_start),
+        ]).cte("trip_stats")
+        maintenance_stats = _maintenance_stats(tenant_id, retention_start).cte("maintenance_stats")
+        
+        row = self.db.execute(
+            select(
+                trip_stats,
+                maintenance_stats,
+                _total_vehicles(tenant_id).label("total_vehicles"),
+                _total_old_clients(tenant_id, retention_start).label("total_old_clients"),
+            ).select_from(trip_stats).join(maintenance_stats, true())
+        ).one()
+        
+        return {
+            "customer_retention": _format_retention(row.total_old_clients, row.retained_clients, 90),
+            "fleet_occupation": _format_occupation(row.total_vehicles, row.active_vehicles, 30),
+            "cost_per_km": _format_cost_per_km(row.cost_total, row.cost_distance, row.cost_trips, 30),
+            "on_time_delivery": _format_on_time(row, [], 30),  # por rota: consulta à parte
+            "maintenance_costs": _format_maintenance(row, 90),
+        }
     
+    @cached_analytics("comprehensive", "clients", "drivers", "maintenances", "routes", "trips", "vehicles")
     def get_comprehensive_analytics(self, tenant_id: int) -> Dict[str, Any]:
         """Analytics completo com todos os KPIs"""
         
+        # Consultas independentes em conexões separadas: latência ~ a da mais lenta
+        results = run_concurrently({
+            "summary": lambda db: AnalyticsService(db).get_summary_kpis(tenant_id),
+            "on_time_by_route": lambda db: AnalyticsService(db).get_on_time_by_route(tenant_id),
+            "driver_performance": lambda db: AnalyticsService(db).get_driver_performance_metrics(tenant_id),
+            "future_earnings": lambda db: AnalyticsService(db).get_future_earnings_projection(tenant_id),
+        }, tenant_id=tenant_id)
+        
+        summary = results["summary"]
+        summary["on_time_delivery"]["by_route"] = _format_route_breakdown(results["on_time_by_route"])
+        
         return {
-            "customer_retention": self.get_customer_retention_rate(tenant_id),
-            "fleet_occupation": self.get_fleet_occupation_rate(tenant_id),
-            "cost_per_km": self.get_average_cost_per_km(tenant_id),
-            "future_earnings": self.get_future_earnings_projection(tenant_id),
-            "on_time_delivery": self.get_on_time_delivery_analysis(tenant_id),
-            "maintenance_costs": self.get_maintenance_cost_analysis(tenant_id),
-            "driver_performance": self.get_driver_performance_metrics(tenant_id)
+            "customer_retention": summary["customer_retention"],
+            "fleet_occupation": summary["fleet_occupation"],
+            "cost_per_km": summary["cost_per_km"],
+            "future_earnings": results["future_earnings"],
+            "on_time_delivery": summary["on_time_delivery"],
+            "maintenance_costs": summary["maintenance_costs"],
+            "driver_performance": results["driver_performance"]
         }
\ No newline at end of file
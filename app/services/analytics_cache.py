@@ -0,0 +1,135 @@
+import functools
+import hashlib
+import inspect
+import json
+import time
+import uuid
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional
+from core.config import settings
+from core.data_version import read_versions
+from core.logging import get_logger
+from core.metrics import ANALYTICS_CACHE_REQUESTS
+from core.redis_client import redis_client
+
+logger = get_logger("analytics.cache")
+
+CACHE_KEY = "tms:analytics:{tenant_id}:{kpi}:{digest}"
+LOCK_SUFFIX = ":lock"
+
+# Libera o lock apenas se ainda pertence a quem o adquiriu (pode ter expirado)
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_lock = redis_client.register_script(RELEASE_SCRIPT)
+
+
+def _cache_key(tenant_id: int, kpi: str, params: Dict[str, Any], versions: Iterable[str]) -> str:
+    """Chave com parâmetros, versões de dados e dia: uma escrita no tenant gera chave nova"""
+    parts = [json.dumps(params, sort_keys=True, default=str), ",".join(versions), date.today().isoformat()]
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    return CACHE_KEY.format(tenant_id=tenant_id, kpi=kpi, digest=digest)
+
+
+def _read(key: str) -> Optional[Any]:
+    cached = redis_client.get(key)
+    return json.loads(cached) if cached is not None else None
+
+
+def _compute_and_store(key: str, compute: Callable[[], Any]) -> Any:
+    result = compute()
+    try:
+        redis_client.set(key, json.dumps(result), ex=settings.ANALYTICS_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Falha ao gravar analytics no cache", key=key, error=str(e))
+    return result
+
+
+def get_or_compute(tenant_id: int, kpi: str, params: Dict[str, Any], tables: Iterable[str],
+                   compute: Callable[[], Any]) -> Any:
+    """Resultado do cache ou recalculado por um único worker (lock + espera dos demais)"""
+    try:
+        key = _cache_key(tenant_id, kpi, params, read_versions(tenant_id, tables))
+        cached = _read(key)
+    except Exception as e:
+        logger.warning("Cache de analytics indisponível", kpi=kpi, error=str(e))
+        ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="bypass").inc()
+        return compute()
+
+    if cached is not None:
+        ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="hit").inc()
+        return cached
+
+    lock_key = key + LOCK_SUFFIX
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.ANALYTICS_CACHE_WAIT_SECONDS
+
+    while True:
+        try:
+            acquired = redis_client.set(
+                lock_key, token, nx=True, px=int(settings.ANALYTICS_CACHE_LOCK_TTL_SECONDS * 1000)
+            )
+        except Exception as e:
+            logger.warning("Lock de analytics indisponível", kpi=kpi, error=str(e))
+            ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="bypass").inc()
+            return compute()
+
+        if acquired:
+            try:
+                # Outro worker pode ter gravado entre a leitura e o lock
+                cached = _read(key)
+                if cached is not None:
+                    ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="hit").inc()
+                    return cached
+                ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="miss").inc()
+                return _compute_and_store(key, compute)
+            finally:
+                try:
+                    _release_lock(keys=[lock_key], args=[token])
+                except Exception as e:
+                    logger.warning("Falha ao liberar lock de analytics", kpi=kpi, error=str(e))
+
+        # Outro worker está calculando: aguarda o resultado (ou o lock expirar)
+        time.sleep(settings.ANALYTICS_CACHE_POLL_INTERVAL_SECONDS)
+        try:
+            cached = _read(key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="wait").inc()
+            return cached
+        if time.monotonic() >= deadline:
+            logger.warning("Tempo de espera do cache de analytics esgotado", kpi=kpi, tenant_id=tenant_id)
+            ANALYTICS_CACHE_REQUESTS.labels(kpi=kpi, result="timeout").inc()
+            return compute()
+
+
+def cached_analytics(kpi: str, *tables: str):
+    """Decorator para métodos do AnalyticsService (tenant_id como primeiro argumento)
+
+    tables: tabelas cujas escritas invalidam o resultado (versões de dados do tenant)
+    """
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, tenant_id: int, *args, **kwargs):
+            if not settings.ANALYTICS_CACHE_ENABLED:
+                return method(self, tenant_id, *args, **kwargs)
+
+            bound = signature.bind(self, tenant_id, *args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name not in ("self", "tenant_id")}
+            return get_or_compute(
+                tenant_id, kpi, params, tables,
+                lambda: method(self, tenant_id, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,382 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.data_version import read_versions
+from core.logging import get_logger
+from models.client import Client
+from models.driver import Driver
+from models.route import Route
+from models.trip import Trip, TripStatus
+from models.vehicle import Vehicle
+
+logger = get_logger("analytics.cube")
+
+# Colunas do cubo (uma linha por viagem) e tipos dos arrays
+TRIP_COLUMNS = {
+    "id": np.int64,
+    "client_id": np.int64,
+    "driver_id": np.int64,
+    "vehicle_id": np.int64,
+    "route_id": np.int64,
+    "status": np.int8,
+    "created_at": np.float64,  # epoch em segundos
+    "estimated_arrival": np.float64,
+    "actual_arrival": np.float64,  # NaN quando ausente
+    "fuel_cost": np.float64,  # custos/receita: NULL vira 0, como nos coalesce do SQL
+    "toll_cost": np.float64,
+    "allowance_cost": np.float64,
+    "other_costs": np.float64,
+    "freight_revenue": np.float64,
+}
+STATUS_CODES = {status: code for code, status in enumerate(TripStatus)}
+COMPLETED = STATUS_CODES[TripStatus.COMPLETED]
+
+DIMENSION_TABLES = ("routes", "clients", "vehicles", "drivers")
+VERSION_TABLES = ("trips",) + DIMENSION_TABLES
+
+DriverStats = namedtuple(
+    "DriverStats",
+    ["id", "name", "total_trips", "completed_trips", "total_revenue", "avg_fuel_cost"]
+)
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else math.nan
+
+
+def _trip_columns_query(tenant_id: int):
+    changed_at = func.coalesce(Trip.updated_at, Trip.created_at)
+    return select(
+        Trip.id,
+        Trip.client_id,
+        Trip.driver_id,
+        Trip.vehicle_id,
+        Trip.route_id,
+        Trip.status,
+        Trip.created_at,
+        Trip.estimated_arrival,
+        Trip.actual_arrival,
+        Trip.actual_fuel_cost,
+        Trip.actual_toll_cost,
+        Trip.daily_allowance_cost,
+        Trip.other_costs,
+        Trip.freight_revenue,
+        changed_at.label("changed_at")
+    ).where(Trip.tenant_id == tenant_id), changed_at
+
+
+def _rows_to_columns(rows) -> Dict[str, np.ndarray]:
+    """Converter linhas do banco em arrays por coluna"""
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in TRIP_COLUMNS.items()}
+
+    (ids, client_ids, driver_ids, vehicle_ids, route_ids, statuses, created, estimated,
+     actual, fuel, toll, allowance, other, revenue, _) = zip(*rows)
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "client_id": np.array(client_ids, dtype=np.int64),
+        "driver_id": np.array(driver_ids, dtype=np.int64),
+        "vehicle_id": np.array(vehicle_ids, dtype=np.int64),
+        "route_id": np.array(route_ids, dtype=np.int64),
+        "status": np.array([STATUS_CODES.get(status, -1) for status in statuses], dtype=np.int8),
+        "created_at": np.array([_epoch(value) for value in created], dtype=np.float64),
+        "estimated_arrival": np.array([_epoch(value) for value in estimated], dtype=np.float64),
+        "actual_arrival": np.array([_epoch(value) for value in actual], dtype=np.float64),
+        "fuel_cost": np.nan_to_num(np.array(fuel, dtype=np.float64)),
+        "toll_cost": np.nan_to_num(np.array(toll, dtype=np.float64)),
+        "allowance_cost": np.nan_to_num(np.array(allowance, dtype=np.float64)),
+        "other_costs": np.nan_to_num(np.array(other, dtype=np.float64)),
+        "freight_revenue": np.nan_to_num(np.array(revenue, dtype=np.float64)),
+    }
+
+
+class TripCube:
+    """Fatos de viagem de um tenant em arrays NumPy (colunar), com dimensões pequenas
+
+    - Carregado na primeira consulta; depois atualizado de forma incremental pela
+      marca d'água coalesce(updated_at, created_at), só quando a versão de dados muda
+    - Exclusões são detectadas pela contagem de linhas (recarga completa)
+    """
+
+    def __init__(self, tenant_id: int):
+        self.tenant_id = tenant_id
+        self.lock = threading.RLock()
+        self.columns: Dict[str, np.ndarray] = {}
+        self.size = 0
+        # Posições da coluna id em ordem crescente; None quando a coluna já está ordenada
+        self.id_order: Optional[np.ndarray] = None
+        self.watermark: Optional[datetime] = None
+        self.versions: Optional[List[str]] = None
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+
+        # Dimensões
+        self.route_ids = np.empty(0, dtype=np.int64)
+        self.route_distances = np.empty(0, dtype=np.float64)
+        self.client_created_at = np.empty(0, dtype=np.float64)
+        self.total_vehicles = 0
+        self.driver_names: Dict[int, str] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at > 0
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            sum(array.nbytes for array in self.columns.values())
+            + (self.id_order.nbytes if self.id_order is not None else 0)
+            + self.route_ids.nbytes + self.route_distances.nbytes + self.client_created_at.nbytes
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name][:self.size]
+
+    # Carga e atualização
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Atualizar o cubo se os dados do tenant mudaram desde a última carga"""
+        with self.lock:
+            now = time.monotonic()
+            try:
+                versions = read_versions(self.tenant_id, VERSION_TABLES)
+            except Exception as e:
+                logger.warning("Versões de dados indisponíveis", error=str(e))
+                versions = None
+
+            full_reload_due = now - self.loaded_at >= settings.ANALYTICS_CUBE_FULL_RELOAD_SECONDS
+            if self.loaded and not full_reload_due:
+                if versions is not None and versions == self.versions:
+                    return
+                if versions is None and now - self.checked_at < settings.ANALYTICS_CUBE_FALLBACK_TTL_SECONDS:
+                    return
+
+            if not self.loaded or full_reload_due:
+                self._load_all(db)
+            else:
+                # versions[0] é a época do Redis; se mudou, todas as tabelas contam como alteradas
+                if versions is None or self.versions is None or versions[0] != self.versions[0]:
+                    changed = set(VERSION_TABLES)
+                else:
+                    changed = {
+                        table for table, new, old in zip(VERSION_TABLES, versions[1:], self.versions[1:])
+                        if new != old
+                    }
+                if "trips" in changed:
+                    self._load_trips_incremental(db)
+                if changed & set(DIMENSION_TABLES):
+                    self._load_dimensions(db)
+
+            # Versões lidas antes das consultas: escritas concorrentes forçam nova atualização
+            self.versions = versions
+            self.checked_at = now
+
+    def _load_all(self, db: Session) -> None:
+        started = time.perf_counter()
+        query, _ = _trip_columns_query(self.tenant_id)
+        rows = db.execute(query.order_by(Trip.id)).all()
+
+        columns = _rows_to_columns(rows)
+        self.columns = columns
+        self.size = len(rows)
+        self.id_order = None  # consulta ordenada por id
+        self.watermark = max((row.changed_at for row in rows if row.changed_at), default=None)
+        self._load_dimensions(db)
+        self.loaded_at = time.monotonic()
+
+        logger.info(
+            "Cubo de viagens carregado",
+            tenant_id=self.tenant_id,
+            trips=self.size,
+            bytes=self.nbytes,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+
+    def _load_trips_incremental(self, db: Session) -> None:
+        query, changed_at = _trip_columns_query(self.tenant_id)
+        if self.watermark is not None:
+            # Sobreposição cobre transações que confirmaram depois com timestamp anterior
+            since = self.watermark.timestamp() - settings.ANALYTICS_CUBE_WATERMARK_OVERLAP_SECONDS
+            query = query.where(changed_at >= datetime.fromtimestamp(since, tz=self.watermark.tzinfo))
+        rows = db.execute(query).all()
+
+        if rows:
+            self._upsert(_rows_to_columns(rows))
+            latest = max((row.changed_at for row in rows if row.changed_at), default=None)
+            if latest is not None and (self.watermark is None or latest > self.watermark):
+                self.watermark = latest
+
+        total = db.execute(
+            select(func.count(Trip.id)).where(Trip.tenant_id == self.tenant_id)
+        ).scalar()
+        if total != self.size:
+            # Viagens excluídas não aparecem pela marca d'água
+            self._load_all(db)
+
+    def _positions(self, trip_ids: np.ndarray) -> np.ndarray:
+        """Linha de cada viagem no cubo (-1 se ausente), por busca binária na coluna id"""
+        ids = self.columns["id"][:self.size] if self.size else np.empty(0, dtype=np.int64)
+        sorted_ids = ids if self.id_order is None else ids[self.id_order]
+        index = np.searchsorted(sorted_ids, trip_ids)
+        found = index < len(sorted_ids)
+        found[found] = sorted_ids[index[found]] == trip_ids[found]
+        rows = index if self.id_order is None else self.id_order[np.minimum(index, len(sorted_ids) - 1)]
+        return np.where(found, rows, -1)
+
+    def _upsert(self, batch: Dict[str, np.ndarray]) -> None:
+        positions = self._positions(batch["id"])
+        existing = positions >= 0
+        for name in TRIP_COLUMNS:
+            self.columns[name][positions[existing]] = batch[name][existing]
+
+        new_rows = np.flatnonzero(~existing)
+        if not len(new_rows):
+            return
+        new_rows = new_rows[np.argsort(batch["id"][new_rows], kind="stable")]
+
+        required = self.size + len(new_rows)
+        capacity = len(self.columns["id"])
+        if required > capacity:
+            new_capacity = max(required, capacity * 2, 1024)
+            for name, dtype in TRIP_COLUMNS.items():
+                grown = np.empty(new_capacity, dtype=dtype)
+                grown[:self.size] = self.columns[name][:self.size]
+                self.columns[name] = grown
+
+        # Ids novos normalmente são maiores que os existentes (sequência): a coluna segue
+        # ordenada; senão (commit fora de ordem), guarda-se a permutação ordenada
+        still_sorted = (
+            self.id_order is None
+            and (not self.size or batch["id"][new_rows[0]] > self.columns["id"][self.size - 1])
+        )
+        for name in TRIP_COLUMNS:
+            self.columns[name][self.size:required] = batch[name][new_rows]
+        self.size = required
+        if not still_sorted:
+            self.id_order = np.argsort(self.columns["id"][:self.size], kind="stable")
+
+    def _load_dimensions(self, db: Session) -> None:
+        routes = db.execute(
+            select(Route.id, Route.estimated_distance).where(Route.tenant_id == self.tenant_id).order_by(Route.id)
+        ).all()
+        self.route_ids = np.array([row[0] for row in routes], dtype=np.int64)
+        self.route_distances = np.nan_to_num(np.array([row[1] for row in routes], dtype=np.float64))
+
+        clients = db.execute(select(Client.created_at).where(Client.tenant_id == self.tenant_id)).all()
+        self.client_created_at = np.array([_epoch(row[0]) for row in clients], dtype=np.float64)
+
+        self.total_vehicles = db.execute(
+            select(func.count(Vehicle.id)).where(Vehicle.tenant_id == self.tenant_id)
+        ).scalar()
+
+        drivers = db.execute(select(Driver.id, Driver.name).where(Driver.tenant_id == self.tenant_id)).all()
+        self.driver_names = {row[0]: row[1] for row in drivers}
+
+    # KPIs vetorizados (mesma semântica das consultas SQL do AnalyticsService)
+
+    def retention_counts(self, start_date: datetime) -> Tuple[int, int]:
+        """(clientes antigos, clientes com viagens no período)"""
+        start = start_date.timestamp()
+        with self.lock:
+            recent = self.column("created_at") >= start
+            retained = np.unique(self.column("client_id")[recent]).size
+            total_old_clients = int((self.client_created_at <= start).sum())
+        return total_old_clients, int(retained)
+
+    def occupation_counts(self, start_date: datetime) -> Tuple[int, int]:
+        """(veículos do tenant, veículos com viagens no período)"""
+        start = start_date.timestamp()
+        with self.lock:
+            recent = self.column("created_at") >= start
+            active = np.unique(self.column("vehicle_id")[recent]).size
+            total_vehicles = self.total_vehicles
+        return total_vehicles, int(active)
+
+    def cost_per_km_totals(self, start_date: datetime) -> Tuple[float, float, int]:
+        """(custo total, distância total, viagens) das viagens concluídas no período"""
+        start = start_date.timestamp()
+        with self.lock:
+            mask = (self.column("created_at") >= start) & (self.column("status") == COMPLETED)
+            total_cost = float(
+                self.column("fuel_cost")[mask].sum()
+                + self.column("toll_cost")[mask].sum()
+                + self.column("allowance_cost")[mask].sum()
+                + self.column("other_costs")[mask].sum()
+            )
+
+            route_ids = self.column("route_id")[mask]
+            distance = 0.0
+            if self.route_ids.size and route_ids.size:
+                position = np.clip(np.searchsorted(self.route_ids, route_ids), 0, self.route_ids.size - 1)
+                found = self.route_ids[position] == route_ids
+                distance = float(self.route_distances[position][found].sum())
+        return total_cost, distance, int(mask.sum())
+
+    def driver_stats(self, start_date: datetime) -> List[DriverStats]:
+        """Totais por motorista (agrupamento com np.unique + bincount)"""
+        start = start_date.timestamp()
+        with self.lock:
+            driver_ids = np.array(list(self.driver_names), dtype=np.int64)
+            mask = (self.column("created_at") >= start) & np.isin(self.column("driver_id"), driver_ids)
+            if not mask.any():
+                return []
+
+            ids, group = np.unique(self.column("driver_id")[mask], return_inverse=True)
+            total = np.bincount(group)
+            completed = np.bincount(group, weights=(self.column("status")[mask] == COMPLETED))
+            revenue = np.bincount(group, weights=self.column("freight_revenue")[mask])
+            fuel = np.bincount(group, weights=self.column("fuel_cost")[mask])
+            names = self.driver_names
+
+        return [
+            DriverStats(int(driver_id), names[int(driver_id)], int(total[i]), int(completed[i]),
+                        float(revenue[i]), float(fuel[i] / total[i]))
+            for i, driver_id in enumerate(ids)
+        ]
+
+
+class CubeRegistry:
+    """Cubos por tenant no processo, com despejo LRU acima do orçamento de memória"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._cubes: "OrderedDict[int, TripCube]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, tenant_id: int) -> TripCube:
+        with self._lock:
+            cube = self._cubes.get(tenant_id)
+            if cube is None:
+                cube = self._cubes[tenant_id] = TripCube(tenant_id)
+            self._cubes.move_to_end(tenant_id)
+
+        cube.ensure_fresh(db)
+        self._evict()
+        return cube
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = sum(cube.nbytes for cube in self._cubes.values())
+            while total > self.max_bytes and len(self._cubes) > 1:
+                tenant_id, cube = self._cubes.popitem(last=False)
+                total -= cube.nbytes
+                logger.info("Cubo de viagens despejado", tenant_id=tenant_id, bytes=cube.nbytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cubes.clear()
+
+
+cube_registry = CubeRegistry(settings.ANALYTICS_CUBE_MAX_BYTES)
+
+
+def get_trip_cube(db: Session, tenant_id: int) -> TripCube:
+    """Cubo atualizado do tenant (carrega na primeira chamada)"""
+    return cube_registry.get(db, tenant_id)
@@ -35,7 +35,7 @@ class AuthService:
     def create_access_token_for_user(user: User):
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.username, "role": user.role.value},
+            data={"sub": user.username, "role": user.role.value, "tenant_id": user.tenant_id},
             expires_delta=access_token_expires
         )
         return access_token
\ No newline at end of file
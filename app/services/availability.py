@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.driver import Driver
+from models.maintenance import Maintenance
+from models.trip_booking import TripBooking
+from models.vehicle import Vehicle
+from services.booking import resource_booked
+
+
+class AvailabilityService:
+    """Motoristas e veículos livres numa janela de tempo
+
+    Cada candidato é testado com NOT EXISTS nos índices GiST das reservas
+    (ex_trip_bookings_*): custo por candidato O(log n) nas viagens ativas.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, tenant_id: int, start: datetime, end: datetime, min_capacity: Optional[float] = None,
+               limit: Optional[int] = None) -> Dict[str, Any]:
+        # CNH válida até o fim da janela
+        drivers = self.db.query(Driver).filter(
+            Driver.tenant_id == tenant_id,
+            Driver.is_active == True,
+            Driver.cnh_expiry >= end.date(),
+            ~resource_booked(TripBooking.driver_id, Driver.id, start, end)
+        ).order_by(Driver.name, Driver.id)
+
+        in_maintenance = select(Maintenance.vehicle_id).where(
+            Maintenance.tenant_id == tenant_id,
+            Maintenance.maintenance_date >= start.date(),
+            Maintenance.maintenance_date <= end.date(),
+            Maintenance.is_completed == False
+        )
+        vehicles = self.db.query(Vehicle).filter(
+            Vehicle.tenant_id == tenant_id,
+            Vehicle.is_active == True,
+            Vehicle.id.notin_(in_maintenance),
+            ~resource_booked(TripBooking.vehicle_id, Vehicle.id, start, end)
+        )
+        if min_capacity is not None:
+            vehicles = vehicles.filter(Vehicle.capacity >= min_capacity)
+        # Menor veículo que comporta a carga primeiro
+        vehicles = vehicles.order_by(Vehicle.capacity, Vehicle.plate, Vehicle.id)
+
+        if limit is not None:
+            drivers = drivers.limit(limit)
+            vehicles = vehicles.limit(limit)
+        return {"start": start, "end": end, "drivers": drivers.all(), "vehicles": vehicles.all()}
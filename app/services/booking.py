@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+from sqlalchemy import exists, func, literal_column, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.trip import Trip
+from models.trip_booking import TripBooking
+
+# SQLSTATE de violação de restrição de exclusão (ex_trip_bookings_*)
+EXCLUSION_VIOLATION = "23P01"
+
+
+def _naive_utc(value):
+    # Colunas de reserva são timestamp sem fuso (UTC): tsrange não aceita timestamptz
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def booking_period(start, end):
+    # Mesma expressão das restrições de exclusão, para que o planner use os índices GiST
+    start, end = _naive_utc(start), _naive_utc(end)
+    return func.tsrange(start, func.greatest(end, start), literal_column("'[)'"))
+
+
+def _resource(value):
+    return func.int4range(value, value, literal_column("'[]'"))
+
+
+def overlaps(start, end):
+    """Reserva (viagem ativa) sobreposta à janela"""
+    return booking_period(TripBooking.departure_date, TripBooking.estimated_arrival).op("&&")(booking_period(start, end))
+
+
+def booked_trips(db: Session, bookings) -> List[Trip]:
+    """Viagens das reservas de uma consulta em TripBooking, em ordem de saída
+
+    Duas etapas: as reservas pelos índices GiST e depois as viagens pelo id e pela lista
+    de departure_date, que poda as partições de trips já no planejamento.
+    """
+    rows = bookings.with_entities(TripBooking.trip_id, TripBooking.departure_date).all()
+    if not rows:
+        return []
+    return db.query(Trip).filter(
+        Trip.id.in_({row.trip_id for row in rows}),
+        Trip.departure_date.in_({row.departure_date for row in rows})
+    ).order_by(Trip.departure_date).all()
+
+
+def resource_booked(column, resource_id, start: datetime, end: datetime):
+    """EXISTS de reserva do recurso sobreposta à janela (correlacionável: NOT EXISTS = livre)
+
+    `column` é TripBooking.driver_id ou TripBooking.vehicle_id.
+    """
+    return exists().where(_resource(column) == _resource(resource_id), overlaps(start, end))
+
+
+def booking_conflicts(db: Session, driver_id: Optional[int], vehicle_id: Optional[int],
+                      start: datetime, end: datetime, exclude_trip_id: Optional[int] = None) -> List[Trip]:
+    """Viagens ativas do motorista ou do veículo que se sobrepõem à janela (busca nos índices GiST)"""
+    resources = []
+    if driver_id is not None:
+        resources.append(_resource(TripBooking.driver_id) == _resource(driver_id))
+    if vehicle_id is not None:
+        resources.append(_resource(TripBooking.vehicle_id) == _resource(vehicle_id))
+    if not resources:
+        return []
+
+    bookings = db.query(TripBooking).filter(
+        or_(*resources),
+        overlaps(start, end)
+    )
+    if exclude_trip_id is not None:
+        bookings = bookings.filter(TripBooking.trip_id != exclude_trip_id)
+    return booked_trips(db, bookings)
+
+
+def describe_conflicts(conflicts: Iterable[Trip], driver_id: Optional[int], vehicle_id: Optional[int]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "trip_id": trip.id,
+            "resource": "driver" if trip.driver_id == driver_id else "vehicle",
+            "departure_date": trip.departure_date.isoformat(),
+            "estimated_arrival": trip.estimated_arrival.isoformat(),
+        }
+        for trip in conflicts
+    ]
+
+
+def is_booking_conflict(error: IntegrityError) -> bool:
+    """Commit barrado pelas restrições de exclusão (reserva concorrente do mesmo recurso)"""
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
+
+
+class _Timeline:
+    """Intervalos disjuntos de um recurso, ordenados pelo início"""
+    __slots__ = ("starts", "ends", "items")
+
+    def __init__(self):
+        self.starts: List[Any] = []
+        self.ends: List[Any] = []
+        self.items: List[Any] = []
+
+    def conflict(self, start, end) -> Optional[Any]:
+        # Disjuntos e ordenados: basta o último intervalo que começa antes do fim pedido
+        i = bisect_left(self.starts, end)
+        if i and self.ends[i - 1] > start:
+            return self.items[i - 1]
+        return None
+
+    def insert(self, start, end, item) -> None:
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.items.insert(i, item)
+
+
+class BookingIndex:
+    """Índice de intervalos em memória para planejamento em lote (despacho, importações)
+
+    Por recurso (ex.: ("driver", 7)) guarda as janelas ocupadas, que não se sobrepõem;
+    consulta e reserva em O(log n) por busca binária. Janelas vazias (fim <= início)
+    nunca conflitam, como os tsrange vazios no banco.
+    """
+
+    def __init__(self):
+        self._timelines: Dict[Hashable, _Timeline] = defaultdict(_Timeline)
+
+    @classmethod
+    def from_trips(cls, trips: Iterable[Trip]) -> "BookingIndex":
+        """Índice das viagens ativas já gravadas (disjuntas pelas restrições de exclusão)"""
+        index = cls()
+        for trip in trips:
+            index.book(
+                [("driver", trip.driver_id), ("vehicle", trip.vehicle_id)],
+                trip.departure_date, trip.estimated_arrival, trip.id
+            )
+        return index
+
+    def conflict(self, resources: Iterable[Hashable], start, end) -> Optional[Tuple[Hashable, Any]]:
+        """(recurso, item) da primeira reserva sobreposta, ou None"""
+        if end <= start:
+            return None
+        for resource in resources:
+            timeline = self._timelines.get(resource)
+            item = timeline.conflict(start, end) if timeline is not None else None
+            if item is not None:
+                return resource, item
+        return None
+
+    def book(self, resources: List[Hashable], start, end, item) -> Optional[Tuple[Hashable, Any]]:
+        """Reservar a janela em todos os recursos; com conflito, nada é reservado e ele é retornado"""
+        conflict = self.conflict(resources, start, end)
+        if conflict is not None or end <= start:
+            return conflict
+        for resource in resources:
+            self._timelines[resource].insert(start, end, item)
+        return None
@@ -0,0 +1,442 @@
+import math
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session, joinedload
+from core.config import settings
+from core import live_events
+from core.data_version import bump_versions
+from core.logging import get_logger
+from models.driver import Driver
+from models.maintenance import Maintenance
+from models.route import Route
+from models.trip import Trip, TripStatus
+from models.trip_booking import TripBooking
+from models.vehicle import Vehicle
+from services.booking import BookingIndex, booked_trips, overlaps
+from services.distance_matrix import DistanceMatrixService
+from services.vrp import VRPInstance, VRPSolution, solve_parallel
+
+logger = get_logger("dispatch")
+
+# Viagens podem terminar no dia seguinte ao da saída
+HORIZON_HOURS = 48.0
+
+
+def _place_key(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def _hours(value: datetime, day_start: datetime) -> float:
+    return (value - day_start).total_seconds() / 3600
+
+
+def place_coordinates(routes: List[Route]) -> Dict[str, Tuple[float, float]]:
+    """Coordenadas conhecidas dos locais (rotas com latitude/longitude cadastradas)"""
+    coordinates = {}
+    for route in routes:
+        if route.origin_latitude is not None and route.origin_longitude is not None:
+            coordinates.setdefault(_place_key(route.origin), (route.origin_latitude, route.origin_longitude))
+        if route.destination_latitude is not None and route.destination_longitude is not None:
+            coordinates.setdefault(
+                _place_key(route.destination), (route.destination_latitude, route.destination_longitude)
+            )
+    return coordinates
+
+
+def road_distance_matrix(routes: List[Route],
+                         distance_service: Optional[DistanceMatrixService] = None) -> Tuple[Dict[str, int], np.ndarray]:
+    """Distâncias entre os locais das rotas cadastradas (caminho mais curto no grafo de rotas)
+
+    Com distance_service, locais com coordenadas ganham ligações da matriz de distâncias
+    (cacheada). Pares sem ligação conhecida ficam com np.inf (o solver não encadeia essas viagens).
+    """
+    places: Dict[str, int] = {}
+    for route in routes:
+        places.setdefault(_place_key(route.origin), len(places))
+        places.setdefault(_place_key(route.destination), len(places))
+
+    matrix = np.full((len(places), len(places)), np.inf)
+    np.fill_diagonal(matrix, 0.0)
+    for route in routes:
+        a, b = places[_place_key(route.origin)], places[_place_key(route.destination)]
+        distance = min(matrix[a, b], route.estimated_distance)
+        matrix[a, b] = matrix[b, a] = distance
+
+    coordinates = place_coordinates(routes) if distance_service is not None else {}
+    if len(coordinates) > 1:
+        located = [places[key] for key in coordinates]
+        points = list(coordinates.values())
+        distances, _ = distance_service.matrix(points, points)
+        np.fmin(matrix[np.ix_(located, located)], distances, out=distances)
+        matrix[np.ix_(located, located)] = distances
+
+    # Floyd-Warshall vetorizado
+    for k in range(len(places)):
+        np.minimum(matrix, matrix[:, k, None] + matrix[None, k, :], out=matrix)
+    return places, matrix
+
+
+def _fits(bookings: BookingIndex, resource, windows: List[Tuple[datetime, datetime]]) -> bool:
+    return all(bookings.conflict([resource], start, end) is None for start, end in windows)
+
+
+class DispatchOptimizer:
+    """Otimização do despacho diário: viagens planejadas -> veículos, motoristas e horários"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _load(self, tenant_id: int, day: date):
+        day_start = datetime.combine(day, time.min)
+        trips = self.db.query(Trip).options(joinedload(Trip.route)).filter(
+            Trip.tenant_id == tenant_id,
+            Trip.status == TripStatus.PLANNED,
+            Trip.departure_date >= day_start,
+            Trip.departure_date < day_start + timedelta(days=1)
+        ).order_by(Trip.departure_date, Trip.id).all()
+
+        in_maintenance = select(Maintenance.vehicle_id).where(
+            Maintenance.tenant_id == tenant_id,
+            Maintenance.maintenance_date == day,
+            Maintenance.is_completed == False
+        )
+        vehicles = self.db.query(Vehicle).filter(
+            Vehicle.tenant_id == tenant_id,
+            Vehicle.is_active == True,
+            Vehicle.id.notin_(in_maintenance)
+        ).order_by(Vehicle.id).all()
+
+        drivers = self.db.query(Driver).filter(
+            Driver.tenant_id == tenant_id,
+            Driver.is_active == True,
+            Driver.cnh_expiry >= day
+        ).order_by(Driver.id).all()
+
+        routes = self.db.query(Route).filter(Route.tenant_id == tenant_id, Route.is_active == True).all()
+        routes += [trip.route for trip in trips if not trip.route.is_active]
+        return day_start, trips, vehicles, drivers, routes
+
+    def _busy_trips(self, tenant_id: int, day_start: datetime, trips: List[Trip]) -> List[Trip]:
+        """Viagens ativas fora do plano (em trânsito, outros dias) que ocupam a janela do despacho"""
+        window_end = day_start + timedelta(hours=HORIZON_HOURS)
+        return booked_trips(self.db, self.db.query(TripBooking).filter(
+            TripBooking.tenant_id == tenant_id,
+            TripBooking.trip_id.notin_([trip.id for trip in trips]),
+            overlaps(day_start, window_end)
+        ))
+
+    def _fit_bookings(self, busy: List[Trip], trips: List[Trip], instance: VRPInstance, solution: VRPSolution,
+                      windows: List[List[Tuple[datetime, datetime]]], route_vehicles: List[int],
+                      route_drivers: List[Optional[Driver]], vehicles: List[Vehicle], drivers: List[Driver]):
+        """Encaixar o plano nas reservas já gravadas; retorna (rotas, viagens fora do plano)
+
+        Viagem em conflito vai, no mesmo horário, para um veículo e motorista livres; sem
+        recurso livre fica fora do plano. Viagens fora do plano mantêm veículo, motorista
+        e horário atuais, então também ocupam a agenda: repete até o plano caber junto com elas.
+        """
+        plan = []
+        left_out = set(solution.unassigned)
+        for jobs, route_windows, vehicle_index, driver in zip(solution.routes, windows, route_vehicles, route_drivers):
+            if driver is None:
+                # Mais rotas que motoristas habilitados
+                left_out.update(jobs)
+            else:
+                plan.append((list(jobs), list(route_windows), vehicle_index, driver))
+
+        while True:
+            bookings = BookingIndex.from_trips(busy + [trips[job] for job in left_out])
+            conflicts = []
+            for jobs, route_windows, vehicle_index, driver in plan:
+                resources = [("driver", driver.id), ("vehicle", vehicles[vehicle_index].id)]
+                for position in reversed(range(len(jobs))):
+                    job = jobs[position]
+                    departure, arrival = route_windows[position]
+                    if job in left_out or bookings.book(resources, departure, arrival, trips[job].id):
+                        del jobs[position], route_windows[position]
+                        if job not in left_out:
+                            conflicts.append((job, departure, arrival))
+            plan = [route for route in plan if route[0]]
+            if not conflicts:
+                return plan, left_out
+
+            dropped = False
+            for job, departure, arrival in conflicts:
+                # De preferência numa rota do plano cujo veículo e motorista estão livres no horário
+                route = next((
+                    route for route in plan
+                    if vehicles[route[2]].capacity >= instance.demand[job]
+                    and bookings.conflict(
+                        [("driver", route[3].id), ("vehicle", vehicles[route[2]].id)], departure, arrival
+                    ) is None
+                ), None)
+                if route is not None:
+                    jobs, route_windows, vehicle_index, driver = route
+                    bookings.book([("driver", driver.id), ("vehicle", vehicles[vehicle_index].id)], departure, arrival, trips[job].id)
+                    position = bisect_left([window[0] for window in route_windows], departure)
+                    jobs.insert(position, job)
+                    route_windows.insert(position, (departure, arrival))
+                    continue
+                vehicle_index = next((
+                    index for index, vehicle in enumerate(vehicles)
+                    if vehicle.capacity >= instance.demand[job]
+                    and bookings.conflict([("vehicle", vehicle.id)], departure, arrival) is None
+                ), None)
+                driver = next((
+                    driver for driver in drivers
+                    if bookings.conflict([("driver", driver.id)], departure, arrival) is None
+                ), None)
+                if vehicle_index is None or driver is None:
+                    left_out.add(job)
+                    dropped = True
+                    continue
+                bookings.book([("driver", driver.id), ("vehicle", vehicles[vehicle_index].id)], departure, arrival, trips[job].id)
+                plan.append(([job], [(departure, arrival)], vehicle_index, driver))
+            if not dropped:
+                return plan, left_out
+
+    def build_instance(self, day_start: datetime, trips: List[Trip], vehicles: List[Vehicle],
+                       routes: List[Route]) -> Tuple[VRPInstance, np.ndarray]:
+        places, matrix = road_distance_matrix(routes, DistanceMatrixService(self.db))
+        slack = settings.VRP_DEPARTURE_SLACK_MINUTES / 60
+        departure = np.array([_hours(trip.departure_date, day_start) for trip in trips])
+        duration = np.array([
+            _hours(trip.estimated_arrival, trip.departure_date)
+            if trip.estimated_arrival > trip.departure_date else trip.route.estimated_time
+            for trip in trips
+        ])
+
+        instance = VRPInstance(
+            pickup=np.array([places[_place_key(trip.route.origin)] for trip in trips]),
+            dropoff=np.array([places[_place_key(trip.route.destination)] for trip in trips]),
+            demand=np.array([trip.cargo_weight or 0.0 for trip in trips]),
+            earliest=np.maximum(departure - slack, 0.0),
+            latest=departure + slack,
+            service=duration,
+            capacities=np.array([vehicle.capacity for vehicle in vehicles], dtype=float),
+            matrix=matrix,
+            job_distance=np.array([trip.route.estimated_distance for trip in trips]),
+            preferred=departure,
+            speed_kmh=settings.VRP_AVERAGE_SPEED_KMH,
+            horizon=HORIZON_HOURS,
+            cost_per_km=settings.VRP_COST_PER_KM,
+            vehicle_fixed_cost=settings.VRP_VEHICLE_FIXED_COST,
+            cumulative_load=False,
+            neighbors=settings.VRP_NEIGHBORS,
+        )
+        return instance, matrix
+
+    def _current_plan(self, trips: List[Trip], instance: VRPInstance) -> Dict[str, Any]:
+        """Custo do despacho atual (feito à mão), para comparação"""
+        by_vehicle = defaultdict(list)
+        for index, trip in enumerate(trips):
+            by_vehicle[trip.vehicle_id].append(index)
+
+        deadhead = 0.0
+        for indexes in by_vehicle.values():
+            for a, b in zip(indexes, indexes[1:]):
+                deadhead += instance.matrix[instance.dropoff[a], instance.pickup[b]]
+        known = math.isfinite(deadhead)
+        return {
+            "vehicles_used": len(by_vehicle),
+            "deadhead_km": round(deadhead, 2) if known else None,
+            "estimated_cost": round(
+                deadhead * settings.VRP_COST_PER_KM + len(by_vehicle) * settings.VRP_VEHICLE_FIXED_COST, 2
+            ) if known else None,
+        }
+
+    def _assign_vehicles(self, solution: VRPSolution, instance: VRPInstance, vehicles: List[Vehicle],
+                         windows: List[List[Tuple[datetime, datetime]]], fixed: BookingIndex) -> List[int]:
+        """Veículos do solver; rotas que colidem com reservas fixas trocam com um ocioso ou com outra rota"""
+        loads = [float(instance.demand[jobs].max()) for jobs in solution.routes]
+
+        def fits(r: int, index: int) -> bool:
+            return vehicles[index].capacity >= loads[r] and _fits(fixed, ("vehicle", vehicles[index].id), windows[r])
+
+        assigned = list(solution.vehicles)
+        idle = [index for index in range(len(vehicles)) if index not in set(assigned)]
+        for r, current in enumerate(assigned):
+            if fits(r, current):
+                continue
+            candidate = next((index for index in idle if fits(r, index)), None)
+            if candidate is not None:
+                assigned[r] = candidate
+                idle.remove(candidate)
+                idle.append(current)
+                continue
+            for other, other_current in enumerate(assigned):
+                if other != r and fits(r, other_current) and fits(other, current):
+                    assigned[r], assigned[other] = other_current, current
+                    break
+        return assigned
+
+    def _assign_drivers(self, solution: VRPSolution, trips: List[Trip], drivers: List[Driver],
+                        windows: List[List[Tuple[datetime, datetime]]], fixed: BookingIndex) -> List[Optional[Driver]]:
+        """Mantém o motorista que já fazia a maioria das viagens da rota, quando disponível
+
+        Motoristas com reservas fixas (fora do plano) sobrepostas à rota não são considerados.
+        """
+        free = {driver.id: driver for driver in drivers}
+        assigned: List[Optional[Driver]] = [None] * len(solution.routes)
+        order = sorted(range(len(solution.routes)), key=lambda r: -len(solution.routes[r]))
+        for r in order:
+            for driver_id, _ in Counter(trips[job].driver_id for job in solution.routes[r]).most_common():
+                if driver_id in free and _fits(fixed, ("driver", driver_id), windows[r]):
+                    assigned[r] = free.pop(driver_id)
+                    break
+        for r in order:
+            if assigned[r] is None:
+                driver_id = next((d for d in free if _fits(fixed, ("driver", d), windows[r])), None)
+                if driver_id is not None:
+                    assigned[r] = free.pop(driver_id)
+        return assigned
+
+    def optimize(self, tenant_id: int, day: date, time_budget: Optional[float] = None,
+                 apply: bool = False) -> Dict[str, Any]:
+        """Plano de despacho do dia; com apply=True grava veículos, motoristas e horários"""
+        day_start, trips, vehicles, drivers, routes = self._load(tenant_id, day)
+        time_budget = min(time_budget or settings.VRP_TIME_BUDGET_SECONDS, settings.VRP_MAX_TIME_BUDGET_SECONDS)
+        result: Dict[str, Any] = {
+            "date": day.isoformat(),
+            "trips": len(trips),
+            "vehicles_available": len(vehicles),
+            "drivers_available": len(drivers),
+            "routes": [],
+            "unassigned_trip_ids": [trip.id for trip in trips] if trips and not vehicles else [],
+            "applied": False,
+        }
+        if not trips or not vehicles:
+            return result
+
+        instance, matrix = self.build_instance(day_start, trips, vehicles, routes)
+        # Reservas que o plano não move: viagens ativas fora dele
+        busy = self._busy_trips(tenant_id, day_start, trips)
+        # O solver pode levar até VRP_MAX_TIME_BUDGET_SECONDS: encerrar a transação de leitura e
+        # devolver a conexão ao pool antes. close() desanexa os objetos sem expirá-los (o que já
+        # foi carregado continua acessível); a sessão abre outra transação se usada de novo.
+        self.db.close()
+        solution = solve_parallel(
+            instance, time_budget, settings.VRP_PARALLEL_STARTS, settings.VRP_PROCESS_WORKERS
+        )
+        windows = [
+            [
+                (day_start + timedelta(hours=start), day_start + timedelta(hours=start + instance.service[job]))
+                for job, start in zip(jobs, starts)
+            ]
+            for jobs, starts in zip(solution.routes, solution.start_times)
+        ]
+        # Fixas: reservas fora do plano e viagens que o solver não alocou
+        fixed = BookingIndex.from_trips(busy + [trips[job] for job in solution.unassigned])
+        route_vehicles = self._assign_vehicles(solution, instance, vehicles, windows, fixed)
+        route_drivers = self._assign_drivers(solution, trips, drivers, windows, fixed)
+        plan, left_out = self._fit_bookings(
+            busy, trips, instance, solution, windows, route_vehicles, route_drivers, vehicles, drivers
+        )
+
+        plan_routes = []
+        unassigned = [trips[job].id for job in left_out]
+        loaded_total = deadhead_total = 0.0
+        for jobs, route_windows, vehicle_index, driver in plan:
+            vehicle = vehicles[vehicle_index]
+            deadhead = sum(
+                matrix[instance.dropoff[a], instance.pickup[b]] for a, b in zip(jobs, jobs[1:])
+            )
+            loaded = sum(instance.job_distance[job] for job in jobs)
+            deadhead_total += deadhead
+            loaded_total += loaded
+            plan_routes.append({
+                "vehicle_id": vehicle.id,
+                "vehicle_plate": vehicle.plate,
+                "driver_id": driver.id,
+                "driver_name": driver.name,
+                "max_cargo_weight": round(float(instance.demand[jobs].max()), 2),
+                "deadhead_km": round(float(deadhead), 2),
+                "loaded_km": round(float(loaded), 2),
+                "trips": [
+                    {
+                        "trip_id": trips[job].id,
+                        "route_id": trips[job].route_id,
+                        "origin": trips[job].route.origin,
+                        "destination": trips[job].route.destination,
+                        "departure_date": departure,
+                        "estimated_arrival": arrival,
+                    }
+                    for job, (departure, arrival) in zip(jobs, route_windows)
+                ],
+            })
+
+        result.update({
+            "routes": plan_routes,
+            "unassigned_trip_ids": sorted(unassigned),
+            "deadhead_km": round(float(deadhead_total), 2),
+            "loaded_km": round(float(loaded_total), 2),
+            "estimated_cost": round(
+                float(deadhead_total) * settings.VRP_COST_PER_KM
+                + len(plan_routes) * settings.VRP_VEHICLE_FIXED_COST, 2
+            ),
+            "current": self._current_plan(trips, instance),
+            "solver": {
+                "iterations": solution.iterations,
+                "elapsed_seconds": round(solution.elapsed, 3),
+                "seed": solution.seed,
+            },
+        })
+
+        if apply:
+            self._apply(tenant_id, trips, plan_routes)
+            result["applied"] = True
+
+        logger.info(
+            "Despacho otimizado",
+            tenant_id=tenant_id,
+            date=day.isoformat(),
+            trips=len(trips),
+            routes=len(plan_routes),
+            unassigned=len(result["unassigned_trip_ids"]),
+            elapsed_seconds=round(solution.elapsed, 3),
+            applied=apply
+        )
+        return result
+
+    def _apply(self, tenant_id: int, trips: List[Trip], plan_routes: List[Dict[str, Any]]) -> None:
+        """Gravar o plano em um UPDATE executemany (não um por viagem via ORM)
+
+        departure_date faz parte da PK da tabela particionada: o UPDATE por PK do ORM
+        usaria a data nova no WHERE. Aqui a viagem é localizada pelo id e pela data atual
+        (uma partição); mudar de mês move a linha de partição.
+        """
+        current_departure = {trip.id: trip.departure_date for trip in trips}
+        values = [
+            {
+                "trip_id": planned["trip_id"],
+                "current_departure": current_departure[planned["trip_id"]],
+                "new_vehicle_id": route["vehicle_id"],
+                "new_driver_id": route["driver_id"],
+                "new_departure": planned["departure_date"],
+                "new_arrival": planned["estimated_arrival"],
+            }
+            for route in plan_routes
+            for planned in route["trips"]
+        ]
+        trips_table = Trip.__table__
+        self.db.execute(
+            update(trips_table)
+            .where(
+                trips_table.c.id == bindparam("trip_id"),
+                trips_table.c.departure_date == bindparam("current_departure")
+            )
+            .values(
+                vehicle_id=bindparam("new_vehicle_id"),
+                driver_id=bindparam("new_driver_id"),
+                departure_date=bindparam("new_departure"),
+                estimated_arrival=bindparam("new_arrival")
+            ),
+            values
+        )
+        self.db.commit()
+        # UPDATE em massa não passa pelos hooks de flush da sessão
+        bump_versions([("trips", tenant_id)])
+        live_events.publish(tenant_id, changed=["trips"])
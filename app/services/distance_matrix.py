@@ -0,0 +1,248 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import SessionLocal
+from core.logging import get_logger
+from core.metrics import DISTANCE_MATRIX_PAIRS
+from models.distance_cache import DistanceCacheEntry
+
+logger = get_logger("distance_matrix")
+
+EARTH_RADIUS_KM = 6371.0088
+# Linhas por INSERT ... ON CONFLICT
+UPSERT_CHUNK = 1000
+
+Point = Tuple[float, float]  # (latitude, longitude)
+
+
+def point_key(point: Point) -> str:
+    """Chave do ponto no cache: 5 casas decimais (~1 m)"""
+    return f"{point[0]:.5f},{point[1]:.5f}"
+
+
+def _rounded(point: Point) -> Point:
+    return round(float(point[0]), 5), round(float(point[1]), 5)
+
+
+class RoutingBackendError(Exception):
+    pass
+
+
+class HaversineBackend:
+    """Substituto local do serviço de rotas: linha reta x fator de estrada, velocidade média fixa
+
+    Mesma interface do OSRMBackend (tabela origens x destinos em km e horas).
+    """
+    name = "haversine"
+
+    def table(self, sources: Sequence[Point], destinations: Sequence[Point]) -> Tuple[np.ndarray, np.ndarray]:
+        src = np.radians(np.asarray(sources, dtype=float))
+        dst = np.radians(np.asarray(destinations, dtype=float))
+        dlat = dst[None, :, 0] - src[:, None, 0]
+        dlon = dst[None, :, 1] - src[:, None, 1]
+        a = np.sin(dlat / 2) ** 2 + np.cos(src[:, None, 0]) * np.cos(dst[None, :, 0]) * np.sin(dlon / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * settings.ROUTING_ROAD_FACTOR
+        return distance, distance / settings.ROUTING_AVERAGE_SPEED_KMH
+
+
+class OSRMBackend:
+    """Cliente da API table do OSRM (servidor próprio com dados do OpenStreetMap)"""
+    name = "osrm"
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or settings.OSRM_URL).rstrip("/")
+
+    def table(self, sources: Sequence[Point], destinations: Sequence[Point]) -> Tuple[np.ndarray, np.ndarray]:
+        import httpx  # import tardio: só carregado quando o OSRM está habilitado
+
+        points = list(sources) + list(destinations)
+        coordinates = ";".join(f"{lon:.6f},{lat:.6f}" for lat, lon in points)
+        params = {
+            "sources": ";".join(str(i) for i in range(len(sources))),
+            "destinations": ";".join(str(i) for i in range(len(sources), len(points))),
+            "annotations": "distance,duration",
+        }
+        try:
+            response = httpx.get(
+                f"{self.base_url}/table/v1/driving/{coordinates}",
+                params=params,
+                timeout=settings.ROUTING_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise RoutingBackendError(str(e)) from e
+        if body.get("code") != "Ok":
+            raise RoutingBackendError(body.get("message") or body.get("code") or "resposta inválida")
+
+        # Pares sem rota encontrada vêm como null -> NaN
+        distance = np.array(body["distances"], dtype=float) / 1000
+        duration = np.array(body["durations"], dtype=float) / 3600
+        return distance, duration
+
+
+def get_backend():
+    if settings.ROUTING_BACKEND == "osrm" and settings.OPENSTREETMAP_ENABLED:
+        return OSRMBackend()
+    return HaversineBackend()
+
+
+class DistanceMatrixService:
+    """Matriz de distâncias (km) e durações (h) entre pontos, com cache persistente por par
+
+    Pares já calculados (e não expirados) nunca voltam ao backend; os faltantes são
+    agrupados em requisições de até ROUTING_BATCH_SIZE pontos.
+    """
+
+    def __init__(self, db: Session, backend=None):
+        self.db = db
+        self.backend = backend or get_backend()
+        self.fallback = HaversineBackend()
+
+    def _load_cached(self, origin_keys: List[str], destination_keys: List[str]) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        cached = {}
+        now = datetime.now(timezone.utc)
+        # Blocos para não estourar o limite de parâmetros do IN
+        for start in range(0, len(origin_keys), UPSERT_CHUNK):
+            rows = self.db.execute(
+                select(
+                    DistanceCacheEntry.origin_key,
+                    DistanceCacheEntry.destination_key,
+                    DistanceCacheEntry.distance_km,
+                    DistanceCacheEntry.duration_hours
+                ).where(
+                    DistanceCacheEntry.origin_key.in_(origin_keys[start:start + UPSERT_CHUNK]),
+                    DistanceCacheEntry.destination_key.in_(destination_keys),
+                    DistanceCacheEntry.expires_at > now
+                )
+            )
+            for origin_key, destination_key, distance, duration in rows:
+                cached[(origin_key, destination_key)] = (distance, duration)
+        return cached
+
+    def _store(self, rows: List[Dict]) -> None:
+        # Sessão própria e curta: o commit do cache não encerra a transação do chamador,
+        # que expiraria as viagens, veículos e rotas já carregados (um SELECT por objeto)
+        db = SessionLocal()
+        try:
+            for start in range(0, len(rows), UPSERT_CHUNK):
+                stmt = pg_insert(DistanceCacheEntry).values(rows[start:start + UPSERT_CHUNK])
+                db.execute(stmt.on_conflict_do_update(
+                    constraint="uq_distance_cache_pair",
+                    set_={
+                        "distance_km": stmt.excluded.distance_km,
+                        "duration_hours": stmt.excluded.duration_hours,
+                        "source": stmt.excluded.source,
+                        "computed_at": stmt.excluded.computed_at,
+                        "expires_at": stmt.excluded.expires_at,
+                    }
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def _compute_block(self, sources: List[Point], destinations: List[Point], use_backend: bool):
+        """Bloco origens x destinos no backend; falhas e pares sem rota caem no cálculo local"""
+        fallback_distance, fallback_duration = self.fallback.table(sources, destinations)
+        if isinstance(self.backend, HaversineBackend):
+            return fallback_distance, fallback_duration, np.zeros(fallback_distance.shape, dtype=bool), True
+        if not use_backend:
+            # Backend já falhou nesta matriz: não insiste em cada bloco
+            return fallback_distance, fallback_duration, np.ones(fallback_distance.shape, dtype=bool), False
+        try:
+            distance, duration = self.backend.table(sources, destinations)
+        except RoutingBackendError as e:
+            logger.warning("Backend de rotas indisponível; usando estimativa local",
+                           backend=self.backend.name, pairs=fallback_distance.size, error=str(e))
+            return fallback_distance, fallback_duration, np.ones(fallback_distance.shape, dtype=bool), False
+        missing = np.isnan(distance) | np.isnan(duration)
+        distance = np.where(missing, fallback_distance, distance)
+        duration = np.where(missing, fallback_duration, duration)
+        return distance, duration, missing, True
+
+    def matrix(self, origins: Sequence[Point], destinations: Sequence[Point]) -> Tuple[np.ndarray, np.ndarray]:
+        """Distâncias e durações origens x destinos (arrays len(origins) x len(destinations))"""
+        distance = np.zeros((len(origins), len(destinations)))
+        duration = np.zeros((len(origins), len(destinations)))
+        if not len(origins) or not len(destinations):
+            return distance, duration
+
+        origin_points = {point_key(p): _rounded(p) for p in origins}
+        destination_points = {point_key(p): _rounded(p) for p in destinations}
+        origin_keys, destination_keys = list(origin_points), list(destination_points)
+        values = self._load_cached(origin_keys, destination_keys)
+
+        missing = {(o, d) for o in origin_keys for d in destination_keys if (o, d) not in values}
+        DISTANCE_MATRIX_PAIRS.labels(result="hit").inc(len(origin_keys) * len(destination_keys) - len(missing))
+
+        if missing:
+            computed_at = datetime.now(timezone.utc)
+            expires_at = computed_at + timedelta(days=settings.DISTANCE_CACHE_TTL_DAYS)
+            fallback_expires_at = computed_at + timedelta(hours=settings.DISTANCE_CACHE_FALLBACK_TTL_HOURS)
+            half = max(settings.ROUTING_BATCH_SIZE // 2, 1)
+            use_backend = True
+            rows = []
+            computed = fallbacks = 0
+
+            # Origens agrupadas pelos destinos que lhes faltam: cada bloco só tem pares fora do
+            # cache, então nada já calculado é pedido de novo ao backend nem sobrescrito
+            groups: Dict[Tuple[str, ...], List[str]] = {}
+            for o in origin_keys:
+                wanted = tuple(d for d in destination_keys if (o, d) in missing)
+                if wanted:
+                    groups.setdefault(wanted, []).append(o)
+
+            for wanted, group_origins in groups.items():
+                for i in range(0, len(group_origins), half):
+                    block_origins = group_origins[i:i + half]
+                    for j in range(0, len(wanted), half):
+                        block_destinations = wanted[j:j + half]
+                        block_distance, block_duration, fallback, use_backend = self._compute_block(
+                            [origin_points[o] for o in block_origins],
+                            [destination_points[d] for d in block_destinations],
+                            use_backend
+                        )
+                        for a, o in enumerate(block_origins):
+                            for b, d in enumerate(block_destinations):
+                                pair_distance = float(block_distance[a, b])
+                                pair_duration = float(block_duration[a, b])
+                                is_fallback = bool(fallback[a, b])
+                                if is_fallback:
+                                    fallbacks += 1
+                                else:
+                                    computed += 1
+                                values[(o, d)] = (pair_distance, pair_duration)
+                                rows.append({
+                                    "origin_key": o,
+                                    "destination_key": d,
+                                    "distance_km": pair_distance,
+                                    "duration_hours": pair_duration,
+                                    "source": self.fallback.name if is_fallback else self.backend.name,
+                                    "computed_at": computed_at,
+                                    "expires_at": fallback_expires_at if is_fallback else expires_at,
+                                })
+            self._store(rows)
+            DISTANCE_MATRIX_PAIRS.labels(result="computed").inc(computed)
+            DISTANCE_MATRIX_PAIRS.labels(result="fallback").inc(fallbacks)
+            logger.info(
+                "Matriz de distâncias calculada",
+                backend=self.backend.name,
+                cached_pairs=len(origin_keys) * len(destination_keys) - len(missing),
+                computed_pairs=computed,
+                fallback_pairs=fallbacks
+            )
+
+        for a, origin in enumerate(origins):
+            o = point_key(origin)
+            for b, destination in enumerate(destinations):
+                distance[a, b], duration[a, b] = values[(o, point_key(destination))]
+        return distance, duration
+
+    def distance(self, origin: Point, destination: Point) -> Tuple[float, float]:
+        """Distância (km) e duração (h) de um único par"""
+        distance, duration = self.matrix([origin], [destination])
+        return float(distance[0, 0]), float(duration[0, 0])
@@ -0,0 +1,254 @@
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.logging import get_logger
+from core.redis_client import redis_client
+from models.tenant import Tenant
+from models.trip import Trip
+
+logger = get_logger("forecasting")
+
+SEASON_LENGTH = 12
+CACHE_KEY = "tms:forecast:revenue:{tenant_id}"
+
+# Grade de parâmetros de suavização avaliada em paralelo (vetorizada) para cada tenant
+ALPHAS = (0.1, 0.3, 0.5, 0.7, 0.9)
+BETAS = (0.01, 0.1, 0.3)
+GAMMAS = (0.1, 0.3)
+Z_80 = 1.2816
+Z_95 = 1.9600
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def holt_winters_forecast(series: np.ndarray, start: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """Holt-Winters aditivo vetorizado para várias séries mensais
+
+    series: (tenants, meses) receita mensal; start: índice do primeiro mês de cada série.
+    Séries com 24+ meses usam sazonalidade anual; as demais, Holt (nível + tendência).
+    Os parâmetros são escolhidos por tenant pelo menor erro de previsão um passo à frente.
+    """
+    tenants, months = series.shape
+    rows = np.arange(tenants)
+    history = months - start
+    seasonal = history >= 2 * SEASON_LENGTH
+
+    grid = np.array(np.meshgrid(ALPHAS, BETAS, GAMMAS, indexing="ij")).reshape(3, -1)
+    alpha = grid[0][None, :]
+    beta = grid[1][None, :]
+    gamma = grid[2][None, :] * seasonal[:, None]
+
+    # Estado inicial sem sazonalidade: nível no primeiro mês, tendência pelos dois primeiros
+    first = series[rows, start]
+    second = series[rows, np.minimum(start + 1, months - 1)]
+    level0 = first
+    trend0 = np.where(history >= 2, second - first, 0.0)
+    fit_start = start + 1
+
+    # Estado inicial sazonal: médias das duas primeiras temporadas
+    window_index = np.minimum(start[:, None] + np.arange(2 * SEASON_LENGTH)[None, :], months - 1)
+    window = np.take_along_axis(series, window_index, axis=1)
+    first_mean = window[:, :SEASON_LENGTH].mean(axis=1)
+    second_mean = window[:, SEASON_LENGTH:].mean(axis=1)
+    seasonal_trend = (second_mean - first_mean) / SEASON_LENGTH
+    level0 = np.where(seasonal, first_mean + seasonal_trend * (SEASON_LENGTH - 1) / 2, level0)
+    trend0 = np.where(seasonal, seasonal_trend, trend0)
+    fit_start = np.where(seasonal, start + SEASON_LENGTH, fit_start)
+
+    season0 = np.zeros((tenants, SEASON_LENGTH))
+    positions = window_index[:, :SEASON_LENGTH] % SEASON_LENGTH
+    # Desvios da primeira temporada em relação à reta de tendência (nível médio no centro dela)
+    centered = np.arange(SEASON_LENGTH) - (SEASON_LENGTH - 1) / 2
+    deviations = window[:, :SEASON_LENGTH] - first_mean[:, None] - seasonal_trend[:, None] * centered[None, :]
+    season0[rows[:, None], positions] = np.where(seasonal[:, None], deviations, 0.0)
+
+    combos = grid.shape[1]
+    level = np.repeat(level0[:, None], combos, axis=1)
+    trend = np.repeat(trend0[:, None], combos, axis=1)
+    season = np.repeat(season0[:, None, :], combos, axis=1)
+    sse = np.zeros((tenants, combos))
+    errors = np.zeros(tenants)
+
+    for t in range(months):
+        active = t >= fit_start
+        if not active.any():
+            continue
+        y = series[:, t][:, None]
+        position = t % SEASON_LENGTH
+        previous_season = season[:, :, position]
+
+        error = y - (level + trend + previous_season)
+        new_level = alpha * (y - previous_season) + (1 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        new_season = gamma * (y - new_level) + (1 - gamma) * previous_season
+
+        mask = active[:, None]
+        level = np.where(mask, new_level, level)
+        trend = np.where(mask, new_trend, trend)
+        season[:, :, position] = np.where(mask, new_season, previous_season)
+        sse += np.where(mask, error ** 2, 0.0)
+        errors += active
+
+    best = sse.argmin(axis=1)
+    level = level[rows, best]
+    trend = trend[rows, best]
+    season = season[rows, best]
+    alpha = alpha[0, best]
+    beta = beta[0, best]
+    gamma = gamma[rows, best]
+    sigma = np.sqrt(sse[rows, best] / np.maximum(errors - 1, 1))
+
+    steps = np.arange(1, horizon + 1)
+    future_positions = (months - 1 + steps) % SEASON_LENGTH
+    mean = level[:, None] + steps[None, :] * trend[:, None] + season[:, future_positions]
+
+    # Variância h passos à frente do ETS(A,A,A): sigma² (1 + soma dos c_j²)
+    lags = steps[None, :-1]
+    c = alpha[:, None] * (1 + lags * beta[:, None]) + gamma[:, None] * (lags % SEASON_LENGTH == 0)
+    spread = np.sqrt(1 + np.concatenate([np.zeros((tenants, 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    spread = sigma[:, None] * spread
+
+    # Um único mês: nível constante (naive); com dois ou mais a tendência já é ajustada
+    method = np.where(seasonal, "holt_winters", np.where(history >= 2, "holt", "naive"))
+    return {
+        "mean": np.maximum(mean, 0.0),
+        "lower_80": np.maximum(mean - Z_80 * spread, 0.0),
+        "upper_80": np.maximum(mean + Z_80 * spread, 0.0),
+        "lower_95": np.maximum(mean - Z_95 * spread, 0.0),
+        "upper_95": np.maximum(mean + Z_95 * spread, 0.0),
+        "method": method,
+        "history": history,
+    }
+
+
+class RevenueForecastService:
+    """Previsão de receita mensal por tenant, calculada em lote e mantida no Redis"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load_monthly_revenue(self, tenant_ids: Optional[Sequence[int]], today: date):
+        """Série mensal de receita (meses completos) de vários tenants em uma consulta"""
+        current_month = _month_index(today)
+        first_month = current_month - settings.FORECAST_HISTORY_MONTHS
+        window_start = date(first_month // 12, first_month % 12 + 1, 1)
+        window_end = date(today.year, today.month, 1)
+
+        month = func.date_trunc("month", Trip.created_at)
+        query = select(
+            Trip.tenant_id,
+            month.label("month"),
+            func.sum(func.coalesce(Trip.freight_revenue, 0)).label("revenue")
+        ).where(
+            Trip.created_at >= window_start,
+            Trip.created_at < window_end
+        ).group_by(Trip.tenant_id, month)
+        if tenant_ids is not None:
+            query = query.where(Trip.tenant_id.in_(tenant_ids))
+
+        rows = self.db.execute(query).all()
+        ids = sorted({row.tenant_id for row in rows})
+        position = {tenant_id: i for i, tenant_id in enumerate(ids)}
+
+        series = np.zeros((len(ids), settings.FORECAST_HISTORY_MONTHS))
+        start = np.full(len(ids), settings.FORECAST_HISTORY_MONTHS - 1)
+        for row in rows:
+            i = position[row.tenant_id]
+            t = _month_index(row.month) - first_month
+            series[i, t] = float(row.revenue or 0)
+            start[i] = min(start[i], t)
+        return ids, series, start, current_month
+
+    def compute(self, tenant_ids: Optional[Sequence[int]] = None, today: Optional[date] = None) -> Dict[int, Dict[str, Any]]:
+        """Ajustar o modelo para os tenants (todos, se None) e montar os resultados"""
+        today = today or date.today()
+        ids, series, start, current_month = self.load_monthly_revenue(tenant_ids, today)
+        generated_at = datetime.now(timezone.utc).isoformat()
+        horizon = settings.FORECAST_HORIZON_MONTHS
+
+        results: Dict[int, Dict[str, Any]] = {}
+        if ids:
+            fitted = holt_winters_forecast(series, start, horizon)
+            recent_average = series[:, -3:].mean(axis=1)
+            for i, tenant_id in enumerate(ids):
+                results[tenant_id] = {
+                    "generated_at": generated_at,
+                    "method": str(fitted["method"][i]),
+                    "history_months": int(fitted["history"][i]),
+                    "average_monthly_revenue": round(float(recent_average[i]), 2),
+                    "forecast": [
+                        {
+                            "month": _month_label(current_month + h),
+                            "projected_revenue": round(float(fitted["mean"][i, h]), 2),
+                            "lower_80": round(float(fitted["lower_80"][i, h]), 2),
+                            "upper_80": round(float(fitted["upper_80"][i, h]), 2),
+                            "lower_95": round(float(fitted["lower_95"][i, h]), 2),
+                            "upper_95": round(float(fitted["upper_95"][i, h]), 2),
+                        }
+                        for h in range(horizon)
+                    ],
+                }
+
+        # Tenants sem receita na janela: previsão zerada
+        for tenant_id in tenant_ids or []:
+            results.setdefault(tenant_id, {
+                "generated_at": generated_at,
+                "method": "no_history",
+                "history_months": 0,
+                "average_monthly_revenue": 0.0,
+                "forecast": [
+                    {
+                        "month": _month_label(current_month + h),
+                        "projected_revenue": 0.0,
+                        "lower_80": 0.0,
+                        "upper_80": 0.0,
+                        "lower_95": 0.0,
+                        "upper_95": 0.0,
+                    }
+                    for h in range(horizon)
+                ],
+            })
+        return results
+
+    def store(self, results: Dict[int, Dict[str, Any]]) -> None:
+        pipe = redis_client.pipeline(transaction=False)
+        for tenant_id, result in results.items():
+            pipe.set(
+                CACHE_KEY.format(tenant_id=tenant_id),
+                json.dumps(result),
+                ex=settings.FORECAST_CACHE_TTL_SECONDS
+            )
+        pipe.execute()
+
+    def refresh_all(self) -> int:
+        """Recalcular e gravar a previsão de todos os tenants ativos (job noturno)"""
+        tenant_ids = [row[0] for row in self.db.query(Tenant.id).filter(Tenant.is_active == True).all()]
+        results = self.compute(tenant_ids)
+        self.store(results)
+        return len(results)
+
+    def get_forecast(self, tenant_id: int) -> Dict[str, Any]:
+        """Previsão do tenant a partir do cache; calcula e grava se ausente"""
+        try:
+            cached = redis_client.get(CACHE_KEY.format(tenant_id=tenant_id))
+            if cached:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning("Cache de previsão indisponível", error=str(e))
+
+        result = self.compute([tenant_id])[tenant_id]
+        try:
+            self.store({tenant_id: result})
+        except Exception as e:
+            logger.warning("Falha ao gravar previsão no cache", error=str(e))
+        return result
@@ -0,0 +1,223 @@
+import re
+import time
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.logging import get_logger
+from models.geocode_cache import GeocodeCacheEntry
+
+logger = get_logger("geocoding")
+
+Coordinates = Optional[Tuple[float, float]]  # None = endereço não encontrado
+
+# Abreviações comuns em endereços brasileiros (após remover acentos e pontuação)
+ABBREVIATIONS = {
+    "r": "rua",
+    "av": "avenida",
+    "avda": "avenida",
+    "al": "alameda",
+    "rod": "rodovia",
+    "estr": "estrada",
+    "trav": "travessa",
+    "tv": "travessa",
+    "pca": "praca",
+    "pc": "praca",
+    "lgo": "largo",
+    "jd": "jardim",
+    "jard": "jardim",
+    "vl": "vila",
+    "pq": "parque",
+    "dr": "doutor",
+    "prof": "professor",
+    "cel": "coronel",
+    "sta": "santa",
+    "sto": "santo",
+    "n": "",
+    "no": "",  # "nº" após a normalização
+}
+
+
+def _clean(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    words = re.sub(r"[^\w]+", " ", text).split()
+    return " ".join(word for word in (ABBREVIATIONS.get(word, word) for word in words) if word)
+
+
+def normalize_address(address: Optional[str], city: Optional[str] = None, state: Optional[str] = None,
+                      zip_code: Optional[str] = None) -> str:
+    """Chave do endereço no cache: sem acentos/pontuação, abreviações expandidas, CEP só dígitos"""
+    digits = re.sub(r"\D", "", zip_code or "")
+    return "|".join([_clean(address), _clean(city), _clean(state), digits])
+
+
+def format_query(address: Optional[str], city: Optional[str] = None, state: Optional[str] = None,
+                 zip_code: Optional[str] = None) -> str:
+    parts = [address, city, state, zip_code, settings.GEOCODING_COUNTRY]
+    return ", ".join(part.strip() for part in parts if part and part.strip())
+
+
+class GeocodingError(Exception):
+    """Falha transitória do provedor (o endereço fica pendente para a próxima execução)"""
+
+
+class NominatimGeocoder:
+    """Busca no Nominatim (OpenStreetMap); a política de uso limita a 1 requisição/s"""
+    name = "nominatim"
+
+    def geocode(self, query: str) -> Coordinates:
+        import httpx  # import tardio: só carregado pelo job de geocodificação
+
+        try:
+            response = httpx.get(
+                f"{settings.NOMINATIM_URL.rstrip('/')}/search",
+                params={"q": query, "format": "jsonv2", "limit": 1, "countrycodes": settings.GEOCODING_COUNTRY_CODES},
+                headers={"User-Agent": settings.GEOCODING_USER_AGENT},
+                timeout=settings.GEOCODING_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            results = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+
+class GoogleGeocoder:
+    """Geocoding API do Google Maps (GOOGLE_MAPS_API_KEY)"""
+    name = "google"
+
+    def geocode(self, query: str) -> Coordinates:
+        import httpx
+
+        try:
+            response = httpx.get(
+                "https://maps.googleapis.com/maps/api/geocode/json",
+                params={"address": query, "key": settings.GOOGLE_MAPS_API_KEY, "region": settings.GEOCODING_COUNTRY_CODES},
+                timeout=settings.GEOCODING_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+        if body.get("status") == "ZERO_RESULTS":
+            return None
+        if body.get("status") != "OK":
+            raise GeocodingError(body.get("error_message") or body.get("status") or "resposta inválida")
+        location = body["results"][0]["geometry"]["location"]
+        return float(location["lat"]), float(location["lng"])
+
+
+def get_geocoder():
+    """Provedor configurado, ou None quando nenhum está habilitado"""
+    if settings.GEOCODING_PROVIDER == "google" and settings.GOOGLE_MAPS_API_KEY:
+        return GoogleGeocoder()
+    if settings.GEOCODING_PROVIDER == "nominatim" and settings.OPENSTREETMAP_ENABLED:
+        return NominatimGeocoder()
+    return None
+
+
+def cached_coordinates(db: Session, keys: Iterable[str]) -> Dict[str, Coordinates]:
+    """Endereços já geocodificados (ausentes do dict = nunca consultados)"""
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(GeocodeCacheEntry.address_key, GeocodeCacheEntry.latitude, GeocodeCacheEntry.longitude)
+        .where(GeocodeCacheEntry.address_key.in_(keys))
+    )
+    return {
+        key: (latitude, longitude) if latitude is not None and longitude is not None else None
+        for key, latitude, longitude in rows
+    }
+
+
+class GeocodingService:
+    """Endereços -> coordenadas pelo cache persistente
+
+    Nas requisições usa-se apenas cached_coordinates(); resolve() chama o provedor
+    para os endereços ausentes, respeitando GEOCODING_RATE_LIMIT_PER_SECOND.
+    """
+
+    def __init__(self, db: Session, geocoder=None):
+        self.db = db
+        self.geocoder = geocoder or get_geocoder()
+        self._last_request = 0.0
+        self.requests = 0  # chamadas feitas ao provedor
+
+    def _throttle(self) -> None:
+        interval = 1.0 / settings.GEOCODING_RATE_LIMIT_PER_SECOND
+        wait = self._last_request + interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def _store(self, key: str, query: str, coordinates: Coordinates) -> None:
+        stmt = pg_insert(GeocodeCacheEntry).values(
+            address_key=key,
+            query=query,
+            latitude=coordinates[0] if coordinates else None,
+            longitude=coordinates[1] if coordinates else None,
+            provider=self.geocoder.name
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[GeocodeCacheEntry.address_key],
+            set_={
+                "query": stmt.excluded.query,
+                "latitude": stmt.excluded.latitude,
+                "longitude": stmt.excluded.longitude,
+                "provider": stmt.excluded.provider,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        ))
+        # Commit por endereço: o que já foi pago ao provedor não se perde se o job parar
+        self.db.commit()
+
+    def resolve(self, queries: Dict[str, str], limit: Optional[int] = None) -> Dict[str, Coordinates]:
+        """Coordenadas dos endereços {chave: texto}; consulta o provedor só para os ausentes do cache
+
+        Para na primeira falha transitória (os demais ficam para a próxima execução).
+        """
+        resolved = cached_coordinates(self.db, queries)
+        missing = [key for key in queries if key not in resolved]
+        if limit is not None:
+            missing = missing[:limit]
+        if not missing or self.geocoder is None:
+            return resolved
+
+        for key in missing:
+            self._throttle()
+            self.requests += 1
+            try:
+                coordinates = self.geocoder.geocode(queries[key])
+            except GeocodingError as e:
+                logger.warning("Falha na geocodificação; lote interrompido",
+                               provider=self.geocoder.name, pending=len(missing), error=str(e))
+                break
+            self._store(key, queries[key], coordinates)
+            resolved[key] = coordinates
+        return resolved
+
+
+def client_address_key(client) -> str:
+    return normalize_address(client.address, client.city, client.state, client.zip_code)
+
+
+def apply_cached_coordinates(db: Session, client) -> None:
+    """Preencher as coordenadas do cliente pelo cache (sem chamadas externas)
+
+    Sem entrada no cache, o cliente fica pendente para o job de geocodificação.
+    """
+    key = client_address_key(client)
+    cached = cached_coordinates(db, [key])
+    if key not in cached:
+        client.latitude = client.longitude = client.geocoded_at = None
+        return
+    coordinates = cached[key]
+    client.latitude, client.longitude = coordinates if coordinates else (None, None)
+    client.geocoded_at = datetime.now(timezone.utc)
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List, Optional
 from models.maintenance import Maintenance, MaintenanceType
@@ -113,20 +113,11 @@ class MaintenanceService:
         db: Session, 
         maintenance_id: int
     ) -> Optional[MaintenanceWithVehicle]:
-        result = db.query(
-            Maintenance, 
-            Vehicle.plate, 
-            Vehicle.model, 
-            Vehicle.brand
-        ).join(Vehicle).filter(Maintenance.id == maintenance_id).first()
+        maintenance = db.query(Maintenance).options(
+            joinedload(Maintenance.vehicle)
+        ).filter(Maintenance.id == maintenance_id).first()
         
-        if not result:
+        if not maintenance:
             return None
         
-        maintenance, plate, model, brand = result
-        return MaintenanceWithVehicle(
-            **maintenance.__dict__,
-            vehicle_plate=plate,
-            vehicle_model=model,
-            vehicle_brand=brand
-        )
\ No newline at end of file
+        return MaintenanceWithVehicle.model_validate(maintenance)
\ No newline at end of file
@@ -1,6 +1,5 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-import httpx
 from core.config import settings
 from core.logging import get_logger
 import json
@@ -57,6 +56,8 @@ class EmailService:
                 data["template_id"] = template_id
                 data["personalizations"][0]["dynamic_template_data"] = template_data
             
+            import httpx  # import tardio: só carregado quando há envio
+            
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     f"{self.base_url}/mail/send",
@@ -134,6 +135,8 @@ class WhatsAppService:
                 "Body": message
             }
             
+            import httpx
+            
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     url,
@@ -0,0 +1,125 @@
+import re
+from datetime import date, datetime
+from typing import Iterable, List, Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from core.logging import get_logger
+
+logger = get_logger("partitions")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y%m}"
+
+
+def existing_partitions(db: Session, table: str) -> Set[date]:
+    """Meses que já têm partição ({tabela}_AAAAMM) anexada à tabela"""
+    rows = db.execute(text("""
+        SELECT child.relname FROM pg_inherits
+          JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+          JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+         WHERE parent.relname = :table
+    """), {"table": table}).scalars()
+    pattern = re.compile(rf"^{re.escape(table)}_(\d{{4}})(\d{{2}})$")
+    months = set()
+    for name in rows:
+        match = pattern.match(name)
+        if match:
+            months.add(date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def has_default_partition(db: Session, table: str) -> bool:
+    return db.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+              JOIN pg_class parent ON parent.oid = pg_partitioned_table.partrelid
+             WHERE parent.relname = :table AND pg_partitioned_table.partdefid <> 0
+        )
+    """), {"table": table}).scalar()
+
+
+def partition_key(db: Session, table: str) -> str:
+    """Coluna da chave de partição (RANGE de uma coluna)"""
+    return db.execute(text("""
+        SELECT attname FROM pg_partitioned_table
+          JOIN pg_class parent ON parent.oid = pg_partitioned_table.partrelid
+          JOIN pg_attribute ON attrelid = partrelid AND attnum = partattrs[0]
+         WHERE parent.relname = :table
+    """), {"table": table}).scalar_one()
+
+
+def _month_bounds(month: date):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'", f"'{add_months(month, 1):%Y-%m-%d} 00:00:00+00'"
+
+
+def _create_partition(db: Session, table: str, month: date, move_from_default: bool) -> str:
+    name = partition_name(table, month)
+    lower, upper = _month_bounds(month)
+    if move_from_default:
+        # Linhas do mês caídas na partição default impediriam a criação: saem e voltam pela nova
+        key = partition_key(db, table)
+        db.execute(text(
+            f"CREATE TEMP TABLE partition_move AS "
+            f"WITH moved AS (DELETE FROM {default_partition_name(table)} "
+            f"WHERE {key} >= {lower} AND {key} < {upper} RETURNING *) SELECT * FROM moved"
+        ))
+    db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM ({lower}) TO ({upper})"))
+    if move_from_default:
+        db.execute(text(f"INSERT INTO {table} SELECT * FROM partition_move"))
+        db.execute(text("DROP TABLE partition_move"))
+    return name
+
+
+def ensure_monthly_partitions(db: Session, table: str, months: Iterable[date]) -> List[str]:
+    """Criar as partições mensais que faltam (idempotente; commit ao final)
+
+    Um advisory lock por tabela serializa criadores concorrentes (consumidores e beat).
+    Limites com "+00": em colunas timestamptz o mês é em UTC; em timestamp o fuso é ignorado.
+    Com partição default ({tabela}_default), as linhas do mês que estavam nela são movidas.
+    """
+    months = sorted({month_start(month) for month in months})
+    if not months:
+        return []
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": table})
+    existing = existing_partitions(db, table)
+    missing = [month for month in months if month not in existing]
+    default = bool(missing) and has_default_partition(db, table)
+    created = [_create_partition(db, table, month, default) for month in missing]
+    db.commit()
+    if created:
+        logger.info("Partições criadas", table=table, partitions=created)
+    return created
+
+
+def drop_monthly_partitions_before(db: Session, table: str, cutoff: date) -> List[str]:
+    """Remover as partições de meses anteriores a `cutoff` (retenção)"""
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": table})
+    dropped = []
+    for month in sorted(existing_partitions(db, table)):
+        if month >= month_start(cutoff):
+            break
+        name = partition_name(table, month)
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    db.commit()
+    if dropped:
+        logger.info("Partições removidas", table=table, partitions=dropped)
+    return dropped
+
+
+def current_month() -> date:
+    return month_start(datetime.utcnow())
@@ -0,0 +1,167 @@
+import glob
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from core.config import settings
+from core.redis_client import redis_client, async_redis_client
+
+PROGRESS_KEY = "tms:report:{task_id}"  # hash com o estado atual
+CANCEL_KEY = "tms:report:{task_id}:cancel"
+CHANNEL = "tms:report-progress:{task_id}"  # pub/sub das atualizações (endpoint SSE)
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+FINAL_STATES = {COMPLETED, FAILED, CANCELLED}
+
+# Fração do progresso reservada à leitura das linhas; o restante é a escrita do arquivo
+ROWS_SHARE = 90
+
+
+class ReportCancelled(Exception):
+    pass
+
+
+def partial_path(task_id: str) -> str:
+    """Arquivo em construção; renomeado para o nome final só ao concluir"""
+    return os.path.join(settings.REPORTS_DIR, f".{task_id}.part")
+
+
+def remove_partial_files(task_id: str) -> int:
+    removed = 0
+    for path in glob.glob(os.path.join(settings.REPORTS_DIR, f".{task_id}*.part")):
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+# Grava os campos só se o relatório ainda não chegou a um estado final (ARGV[1] = "1" força):
+# uma conclusão ou atualização atrasada do worker não sobrescreve um cancelamento
+STORE_SCRIPT = """
+local key = KEYS[1]
+local status = redis.call('HGET', key, 'status')
+if ARGV[1] ~= '1' and (status == 'COMPLETED' or status == 'FAILED' or status == 'CANCELLED') then
+    return {0, redis.call('HGETALL', key)}
+end
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', key, ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', key, ARGV[2])
+return {1, redis.call('HGETALL', key)}
+"""
+
+_store_script = redis_client.register_script(STORE_SCRIPT)
+
+
+def _store(task_id: str, fields: Dict[str, Any], force: bool = False) -> Tuple[bool, Dict[str, str]]:
+    """Gravar campos no hash e publicar o estado completo; retorna (gravado, estado)"""
+    fields = {name: "" if value is None else value for name, value in fields.items()}
+    fields["updated_at"] = datetime.utcnow().isoformat()
+    args = ["1" if force else "0", settings.REPORT_PROGRESS_TTL_SECONDS]
+    for name, value in fields.items():
+        args.extend((name, value))
+    applied, flat = _store_script(keys=[PROGRESS_KEY.format(task_id=task_id)], args=args)
+    state = dict(zip(flat[::2], flat[1::2]))
+    if applied:
+        redis_client.publish(CHANNEL.format(task_id=task_id), json.dumps(state))
+    return bool(applied), state
+
+
+def register_report(task_id: str, user_id: int) -> None:
+    """Estado inicial, gravado antes de enfileirar a tarefa"""
+    _store(task_id, {"task_id": task_id, "user_id": user_id, "status": PENDING, "progress": 0,
+                     "message": "Aguardando worker"})
+
+
+def read_progress(task_id: str) -> Optional[Dict[str, str]]:
+    return redis_client.hgetall(PROGRESS_KEY.format(task_id=task_id)) or None
+
+
+async def read_progress_async(task_id: str) -> Optional[Dict[str, str]]:
+    return await async_redis_client.hgetall(PROGRESS_KEY.format(task_id=task_id)) or None
+
+
+def request_cancel(task_id: str) -> Dict[str, Any]:
+    """Sinalizar o cancelamento; o worker interrompe na próxima atualização de progresso"""
+    redis_client.set(CANCEL_KEY.format(task_id=task_id), "1", ex=settings.REPORT_PROGRESS_TTL_SECONDS)
+    return _store(task_id, {"status": CANCELLED, "message": "Cancelado pelo usuário"})[1]
+
+
+class ReportProgress:
+    """Progresso de um relatório pela contagem de linhas, publicado com taxa limitada
+
+    advance() é chamado por linha e custa só um incremento; o Redis é atualizado no
+    máximo a cada REPORT_PROGRESS_INTERVAL_SECONDS, quando também se verifica o
+    pedido de cancelamento.
+    """
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.rows_total = 0
+        self.rows_done = 0
+        self._last_emit = 0.0
+
+    def cancel_requested(self) -> bool:
+        return bool(redis_client.exists(CANCEL_KEY.format(task_id=self.task_id)))
+
+    def _check_cancel(self) -> None:
+        if self.cancel_requested():
+            raise ReportCancelled(self.task_id)
+
+    def _emit(self, progress: int, message: str, status: str = RUNNING) -> None:
+        self._check_cancel()
+        self._last_emit = time.monotonic()
+        applied, _ = _store(self.task_id, {
+            "status": status,
+            "progress": progress,
+            "message": message,
+            "rows_processed": self.rows_done,
+            "rows_total": self.rows_total,
+        })
+        if not applied:
+            raise ReportCancelled(self.task_id)
+
+    def start(self, rows_total: int) -> None:
+        self.rows_total = rows_total
+        self._emit(0, "Coletando dados")
+
+    def advance(self, rows: int = 1) -> None:
+        self.rows_done += rows
+        if time.monotonic() - self._last_emit >= settings.REPORT_PROGRESS_INTERVAL_SECONDS:
+            done = min(self.rows_done, self.rows_total)
+            self._emit(done * ROWS_SHARE // self.rows_total if self.rows_total else ROWS_SHARE, "Coletando dados")
+
+    def writing(self) -> None:
+        self._emit(ROWS_SHARE, "Gerando arquivo")
+
+    def complete(self, download_url: str, filename: str) -> None:
+        """Marcar como concluído; cancelado durante a escrita, o arquivo final é removido"""
+        applied = not self.cancel_requested() and _store(self.task_id, {
+            "status": COMPLETED,
+            "progress": 100,
+            "message": "Concluído",
+            "rows_processed": self.rows_done,
+            "download_url": download_url,
+            "filename": filename,
+        })[0]
+        if not applied:
+            try:
+                os.remove(os.path.join(settings.REPORTS_DIR, filename))
+            except FileNotFoundError:
+                pass
+            raise ReportCancelled(self.task_id)
+
+    def cancelled(self) -> None:
+        remove_partial_files(self.task_id)
+        _store(self.task_id, {"status": CANCELLED, "message": "Cancelado pelo usuário"}, force=True)
+
+    def fail(self, error: str) -> None:
+        remove_partial_files(self.task_id)
+        _store(self.task_id, {"status": FAILED, "message": "Falha na geração", "error": error})
@@ -0,0 +1,189 @@
+import io
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import orjson
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.logging import get_logger
+from core.redis_client import async_redis_client, redis_client
+from services.partitions import add_months, ensure_monthly_partitions, existing_partitions, month_start
+
+logger = get_logger("telemetry")
+
+POSITIONS_TABLE = "vehicle_positions"
+LATEST_KEY = "tms:telemetry:latest:{tenant_id}"  # vehicle_id -> JSON da última posição
+LATEST_TS_KEY = "tms:telemetry:latest_ts:{tenant_id}"  # vehicle_id -> recorded_at em ms
+
+# (tenant_id, vehicle_id, recorded_at em ms, latitude, longitude, speed_kmh)
+PositionRow = Tuple[int, int, int, float, float, Optional[float]]
+
+# Atualiza só quando a posição é mais recente: lotes chegam fora de ordem entre consumidores
+LATEST_SCRIPT = """
+for i = 1, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[2], ARGV[i])
+    if not current or tonumber(current) < tonumber(ARGV[i + 1]) then
+        redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 2])
+    end
+end
+return 0
+"""
+
+_update_latest = redis_client.register_script(LATEST_SCRIPT)
+
+COPY_NULL = "\\N"
+
+STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS vehicle_positions_staging (
+    tenant_id integer, vehicle_id integer, recorded_ms bigint,
+    latitude double precision, longitude double precision, speed_kmh double precision
+) ON COMMIT DELETE ROWS
+"""
+
+# Veículos desconhecidos ou de outro tenant são descartados; reentregas do stream não duplicam
+INSERT_SQL = """
+WITH valid AS MATERIALIZED (
+    SELECT s.* FROM vehicle_positions_staging s
+      JOIN vehicles v ON v.id = s.vehicle_id AND v.tenant_id = s.tenant_id
+), inserted AS (
+    INSERT INTO vehicle_positions (tenant_id, vehicle_id, recorded_at, latitude, longitude, speed_kmh)
+    SELECT tenant_id, vehicle_id, to_timestamp(recorded_ms / 1000.0), latitude, longitude, speed_kmh
+      FROM valid
+    ON CONFLICT DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM valid), (SELECT count(*) FROM inserted)
+"""
+
+LATEST_SQL = """
+SELECT DISTINCT ON (s.vehicle_id) s.tenant_id, s.vehicle_id, s.recorded_ms, s.latitude, s.longitude, s.speed_kmh
+  FROM vehicle_positions_staging s
+  JOIN vehicles v ON v.id = s.vehicle_id AND v.tenant_id = s.tenant_id
+ ORDER BY s.vehicle_id, s.recorded_ms DESC
+"""
+
+
+def to_millis(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # horário sem fuso: UTC
+    return int(value.timestamp() * 1000)
+
+
+def from_millis(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+
+
+async def enqueue_positions(tenant_id: int, points: Sequence[Tuple[int, int, float, float, Optional[float]]]) -> bool:
+    """Anexar um lote (vehicle_id, ms, lat, lon, velocidade) ao stream; False = fila cheia
+
+    Um lote por entrada do stream; o limite em GPS_STREAM_MAX_ENTRIES mantém a memória do
+    Redis limitada quando os consumidores não acompanham (o cliente reenvia após o 503).
+    """
+    if await async_redis_client.xlen(settings.GPS_STREAM_KEY) >= settings.GPS_STREAM_MAX_ENTRIES:
+        return False
+    await async_redis_client.xadd(
+        settings.GPS_STREAM_KEY,
+        {"tenant_id": tenant_id, "positions": orjson.dumps(points)}
+    )
+    return True
+
+
+def decode_entry(fields: Dict[str, str]) -> List[PositionRow]:
+    tenant_id = int(fields["tenant_id"])
+    return [
+        (tenant_id, int(vehicle_id), int(recorded_ms), float(latitude), float(longitude),
+         None if speed is None else float(speed))
+        for vehicle_id, recorded_ms, latitude, longitude, speed in orjson.loads(fields["positions"])
+    ]
+
+
+def _copy_buffer(rows: List[PositionRow]) -> io.StringIO:
+    buffer = io.StringIO()
+    buffer.writelines(
+        f"{tenant_id}\t{vehicle_id}\t{recorded_ms}\t{latitude!r}\t{longitude!r}\t{COPY_NULL if speed is None else repr(speed)}\n"
+        for tenant_id, vehicle_id, recorded_ms, latitude, longitude, speed in rows
+    )
+    buffer.seek(0)
+    return buffer
+
+
+class PositionWriter:
+    """Grava lotes de posições com COPY numa tabela temporária + INSERT ... SELECT
+
+    Uma instância por consumidor: guarda os meses que já têm partição para só
+    consultar o catálogo quando chega um mês novo.
+    """
+
+    def __init__(self):
+        self._months: Set[date] = set()
+
+    def _ensure_partitions(self, db: Session, rows: List[PositionRow]) -> None:
+        first = month_start(from_millis(min(row[2] for row in rows)))
+        last = month_start(from_millis(max(row[2] for row in rows)))
+        months = [first]
+        while months[-1] < last:
+            months.append(add_months(months[-1], 1))
+        if self._months.issuperset(months):
+            return
+        if not self._months:
+            self._months = existing_partitions(db, POSITIONS_TABLE)
+        missing = [month for month in months if month not in self._months]
+        if missing:
+            ensure_monthly_partitions(db, POSITIONS_TABLE, missing)
+        self._months.update(months)
+
+    def write(self, db: Session, rows: List[PositionRow]) -> Dict[str, Any]:
+        """Gravar as posições (commit ao final); retorna contagens e a última posição por veículo"""
+        if not rows:
+            return {"stored": 0, "duplicates": 0, "unknown_vehicle": 0, "latest": []}
+        self._ensure_partitions(db, rows)
+
+        db.execute(text(STAGING_DDL))
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY vehicle_positions_staging (tenant_id, vehicle_id, recorded_ms, latitude, longitude, speed_kmh) FROM STDIN",
+                _copy_buffer(rows)
+            )
+        finally:
+            cursor.close()
+        valid, stored = db.execute(text(INSERT_SQL)).one()
+        latest = db.execute(text(LATEST_SQL)).all()
+        db.commit()  # ON COMMIT DELETE ROWS esvazia a tabela temporária
+        return {
+            "stored": stored,
+            "duplicates": valid - stored,
+            "unknown_vehicle": len(rows) - valid,
+            "latest": latest,
+        }
+
+
+def update_latest_positions(latest: Sequence[Tuple]) -> None:
+    """Atualizar o cache de última posição por veículo (um script por tenant)"""
+    by_tenant: Dict[int, List[Any]] = {}
+    for tenant_id, vehicle_id, recorded_ms, latitude, longitude, speed in latest:
+        by_tenant.setdefault(tenant_id, []).extend([
+            vehicle_id,
+            recorded_ms,
+            orjson.dumps({
+                "vehicle_id": vehicle_id,
+                "recorded_at": from_millis(recorded_ms),
+                "latitude": latitude,
+                "longitude": longitude,
+                "speed_kmh": speed,
+            }),
+        ])
+    pipe = redis_client.pipeline(transaction=False)
+    for tenant_id, args in by_tenant.items():
+        _update_latest(
+            keys=[LATEST_KEY.format(tenant_id=tenant_id), LATEST_TS_KEY.format(tenant_id=tenant_id)],
+            args=args,
+            client=pipe
+        )
+    pipe.execute()
+
+
+async def latest_positions(tenant_id: int) -> List[Dict[str, Any]]:
+    values = await async_redis_client.hvals(LATEST_KEY.format(tenant_id=tenant_id))
+    return sorted((orjson.loads(value) for value in values), key=lambda position: position["vehicle_id"])
@@ -0,0 +1,636 @@
+import math
+import multiprocessing
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+
+# Solver heurístico de roteirização (VRP com capacidade e janelas de tempo).
+# Módulo sem dependência de banco: é importado pelos processos do pool.
+
+DEPOT = -1
+EPS = 1e-9
+
+
+@dataclass
+class VRPInstance:
+    """Instância do problema; tempos em horas desde o início do dia, distâncias em km
+
+    Cada parada tem local de início (pickup) e de término (dropoff): para entregas
+    simples são iguais; para viagens completas (origem -> destino) são diferentes.
+    """
+    pickup: np.ndarray
+    dropoff: np.ndarray
+    demand: np.ndarray
+    earliest: np.ndarray  # início mais cedo do atendimento
+    latest: np.ndarray  # início mais tarde do atendimento
+    service: np.ndarray  # duração do atendimento (ou da viagem)
+    capacities: np.ndarray  # um valor por veículo disponível
+    coords: Optional[np.ndarray] = None  # (locais, 2) em km: distância euclidiana
+    matrix: Optional[np.ndarray] = None  # (locais, locais) em km; np.inf = sem caminho conhecido
+    depot: Optional[int] = None  # None: rotas abertas (sem ida/volta à base)
+    job_distance: Optional[np.ndarray] = None  # km percorridos dentro de cada parada (só relatório)
+    preferred: Optional[np.ndarray] = None  # horário desejado; sem ele, o mais cedo possível
+    speed_kmh: float = 60.0
+    horizon: float = 24.0  # fim da jornada
+    cost_per_km: float = 1.0
+    vehicle_fixed_cost: float = 0.0
+    cumulative_load: bool = True  # False: cada viagem descarrega antes da próxima
+    neighbors: int = 20
+
+    @property
+    def size(self) -> int:
+        return len(self.pickup)
+
+
+@dataclass
+class VRPSolution:
+    routes: List[List[int]]
+    start_times: List[List[float]]
+    vehicles: List[int]  # índice em capacities
+    unassigned: List[int]
+    distance: float  # km sem carga (deslocamentos entre paradas e base)
+    cost: float
+    initial_cost: float
+    iterations: int
+    elapsed: float
+    seed: int
+    stats: Dict[str, float] = field(default_factory=dict)
+
+
+def _nearest(instance: VRPInstance, k: int, chunk: int = 512):
+    """k sucessores e k predecessores mais próximos de cada parada (por blocos)"""
+    n = instance.size
+    k = min(k, n - 1)
+    if k <= 0:
+        empty = [[] for _ in range(n)]
+        return empty, empty
+
+    def block(rows, transpose: bool):
+        if instance.coords is not None:
+            a = instance.coords[instance.dropoff[rows]] if not transpose else instance.coords[instance.pickup[rows]]
+            b = instance.coords[instance.pickup] if not transpose else instance.coords[instance.dropoff]
+            d = np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+        elif not transpose:
+            d = instance.matrix[np.ix_(instance.dropoff[rows], instance.pickup)]
+        else:
+            d = instance.matrix[np.ix_(instance.dropoff, instance.pickup[rows])].T
+        d = np.array(d, dtype=np.float64)
+        d[np.arange(len(rows)), rows] = np.inf
+        best = np.argpartition(d, k, axis=1)[:, :k]
+        order = np.take_along_axis(d, best, axis=1).argsort(axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        finite = np.isfinite(np.take_along_axis(d, best, axis=1))
+        return [row[mask].tolist() for row, mask in zip(best, finite)]
+
+    # Distância euclidiana com paradas simples é simétrica: predecessores = sucessores
+    symmetric = instance.coords is not None and np.array_equal(instance.pickup, instance.dropoff)
+    successors, predecessors = [], []
+    for begin in range(0, n, chunk):
+        rows = np.arange(begin, min(begin + chunk, n))
+        successors += block(rows, transpose=False)
+        if not symmetric:
+            predecessors += block(rows, transpose=True)
+    return successors, predecessors if not symmetric else successors
+
+
+class _Solver:
+    """Savings (Clarke-Wright) + busca local (relocate, swap, 2-opt*) com verificação O(1)"""
+
+    def __init__(self, instance: VRPInstance, seed: int):
+        self.inst = instance
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.n = instance.size
+        self.pickup = instance.pickup.tolist()
+        self.dropoff = instance.dropoff.tolist()
+        self.demand = instance.demand.astype(float).tolist()
+        self.earliest = instance.earliest.astype(float).tolist()
+        self.latest = instance.latest.astype(float).tolist()
+        self.service = instance.service.astype(float).tolist()
+        self.capacity = float(instance.capacities.max()) if len(instance.capacities) else 0.0
+        self.horizon = instance.horizon
+        self.inv_speed = 1.0 / instance.speed_kmh
+        self.fixed = instance.vehicle_fixed_cost / instance.cost_per_km  # custo fixo em km equivalentes
+        self.cumulative = instance.cumulative_load
+        if instance.coords is not None:
+            self.xs = instance.coords[:, 0].tolist()
+            self.ys = instance.coords[:, 1].tolist()
+            self.matrix = None
+            self.d = self._d_coords
+        else:
+            self.matrix = instance.matrix.tolist()
+            self.d = self._d_matrix
+
+        # Estado das rotas: paradas, início do atendimento, início mais tarde, carga acumulada
+        self.routes: Dict[int, List[int]] = {}
+        self.start: Dict[int, List[float]] = {}
+        self.slack: Dict[int, List[float]] = {}
+        self.prefix: Dict[int, List[float]] = {}
+        self.suffix: Dict[int, List[float]] = {}
+        self.route_of = [0] * self.n
+        self.pos = [0] * self.n
+        self.vehicle_of: Dict[int, int] = {}  # preenchido após a construção
+        self.route_capacity: Dict[int, float] = {}
+        self.touched = set()  # rotas alteradas pelo último movimento
+
+    # Distâncias e tempos
+
+    def loc_distance(self, a: int, b: int) -> float:
+        if self.matrix is not None:
+            return self.matrix[a][b]
+        return math.hypot(self.xs[a] - self.xs[b], self.ys[a] - self.ys[b])
+
+    def _d_depot(self, i: int, j: int) -> float:
+        depot = self.inst.depot
+        if i == DEPOT:
+            return 0.0 if depot is None or j == DEPOT else self.loc_distance(depot, self.pickup[j])
+        return 0.0 if depot is None else self.loc_distance(self.dropoff[i], depot)
+
+    # d(i, j): distância do fim da parada i ao início da parada j (DEPOT = base);
+    # especializada por tipo de distância porque é a chamada mais frequente da busca local
+
+    def _d_coords(self, i: int, j: int) -> float:
+        if i >= 0 and j >= 0:
+            a, b = self.dropoff[i], self.pickup[j]
+            return math.hypot(self.xs[a] - self.xs[b], self.ys[a] - self.ys[b])
+        return self._d_depot(i, j)
+
+    def _d_matrix(self, i: int, j: int) -> float:
+        if i >= 0 and j >= 0:
+            return self.matrix[self.dropoff[i]][self.pickup[j]]
+        return self._d_depot(i, j)
+
+    def t(self, i: int, j: int) -> float:
+        return self.d(i, j) * self.inv_speed
+
+    # Rotas
+
+    def _job(self, r: int, k: int) -> int:
+        route = self.routes[r]
+        return route[k] if 0 <= k < len(route) else DEPOT
+
+    def _finish(self, r: int, k: int) -> float:
+        return self.start[r][k] + self.service[self.routes[r][k]] if k >= 0 else 0.0
+
+    def _reaches(self, prev: int, finish: float, r: int, k: int) -> bool:
+        """Chegando de prev (terminado em finish), a posição k da rota r ainda é viável?"""
+        route = self.routes[r]
+        if k >= len(route):
+            return finish + self.t(prev, DEPOT) <= self.horizon + EPS
+        job = route[k]
+        return max(self.earliest[job], finish + self.t(prev, job)) <= self.slack[r][k] + EPS
+
+    def _schedule(self, jobs: List[int]):
+        """Horários (início mais cedo e mais tarde) de uma sequência; None se inviável"""
+        start = []
+        finish = 0.0
+        prev = DEPOT
+        for job in jobs:
+            begin = max(self.earliest[job], finish + self.t(prev, job))
+            if begin > self.latest[job] + EPS:
+                return None
+            start.append(begin)
+            finish = begin + self.service[job]
+            prev = job
+        if finish + self.t(prev, DEPOT) > self.horizon + EPS:
+            return None
+
+        slack = [0.0] * len(jobs)
+        bound = self.horizon - self.t(prev, DEPOT)
+        for k in range(len(jobs) - 1, -1, -1):
+            job = jobs[k]
+            slack[k] = min(self.latest[job], bound - self.service[job])
+            if k:
+                bound = slack[k] - self.t(jobs[k - 1], job)
+        return start, slack
+
+    def _loads(self, jobs: List[int]):
+        prefix, suffix = [], [0.0] * len(jobs)
+        total = 0.0
+        for job in jobs:
+            total = total + self.demand[job] if self.cumulative else max(total, self.demand[job])
+            prefix.append(total)
+        total = 0.0
+        for k in range(len(jobs) - 1, -1, -1):
+            total = total + self.demand[jobs[k]] if self.cumulative else max(total, self.demand[jobs[k]])
+            suffix[k] = total
+        return prefix, suffix
+
+    def _cap(self, r: int) -> float:
+        return self.route_capacity.get(r, self.capacity)
+
+    def _combine(self, a: float, b: float) -> float:
+        return a + b if self.cumulative else max(a, b)
+
+    def _load(self, r: int) -> float:
+        return self.prefix[r][-1]
+
+    def _prefix_load(self, r: int, k: int) -> float:
+        return self.prefix[r][k] if k >= 0 else 0.0
+
+    def _suffix_load(self, r: int, k: int) -> float:
+        suffix = self.suffix[r]
+        return suffix[k] if k < len(suffix) else 0.0
+
+    def _set_route(self, r: int, jobs: List[int], schedule=None) -> None:
+        self.touched.add(r)
+        if not jobs:
+            for table in (self.routes, self.start, self.slack, self.prefix, self.suffix,
+                          self.vehicle_of, self.route_capacity):
+                table.pop(r, None)
+            return
+        schedule = schedule or self._schedule(jobs)
+        self.routes[r] = jobs
+        self.start[r], self.slack[r] = schedule
+        self.prefix[r], self.suffix[r] = self._loads(jobs)
+        for k, job in enumerate(jobs):
+            self.route_of[job] = r
+            self.pos[job] = k
+
+    def preferred_starts(self, r: int) -> List[float]:
+        """Horários da rota o mais próximos possível dos desejados, sem perder a viabilidade"""
+        preferred = self.inst.preferred
+        if preferred is None:
+            return self.start[r]
+        starts = []
+        finish, prev = 0.0, DEPOT
+        for job, latest in zip(self.routes[r], self.slack[r]):
+            lower = max(self.earliest[job], finish + self.t(prev, job))
+            begin = min(max(float(preferred[job]), lower), latest)
+            starts.append(begin)
+            finish, prev = begin + self.service[job], job
+        return starts
+
+    def route_distance(self, jobs: List[int]) -> float:
+        prev, total = DEPOT, 0.0
+        for job in jobs:
+            total += self.d(prev, job)
+            prev = job
+        return total + self.d(prev, DEPOT)
+
+    def objective(self) -> float:
+        return sum(self.route_distance(jobs) + self.fixed for jobs in self.routes.values())
+
+    # Construção: savings
+
+    def construct(self, successors: List[List[int]]) -> List[int]:
+        """Rotas iniciais por savings; retorna paradas que não cabem em rota alguma"""
+        unassigned = []
+        next_id = 0
+        for job in range(self.n):
+            schedule = self._schedule([job])
+            if schedule is None or self.demand[job] > self.capacity + EPS:
+                unassigned.append(job)
+                self.route_of[job] = DEPOT
+                continue
+            self._set_route(next_id, [job], schedule)
+            next_id += 1
+
+        noise = 0.0 if self.seed == 0 else 0.1
+        savings = []
+        for i in range(self.n):
+            if self.route_of[i] == DEPOT:
+                continue
+            back = self.d(i, DEPOT)
+            for j in successors[i]:
+                if self.route_of[j] == DEPOT:
+                    continue
+                saving = back + self.d(DEPOT, j) - self.d(i, j) + self.fixed
+                if noise:
+                    saving *= 1 + noise * (self.rng.random() - 0.5)
+                if saving > EPS:
+                    savings.append((saving, i, j))
+        savings.sort(reverse=True)
+
+        for _, i, j in savings:
+            ra, rb = self.route_of[i], self.route_of[j]
+            if ra == rb or self.routes[ra][-1] != i or self.routes[rb][0] != j:
+                continue
+            if self._combine(self._load(ra), self._load(rb)) > self.capacity + EPS:
+                continue
+            if not self._reaches(i, self._finish(ra, len(self.routes[ra]) - 1), rb, 0):
+                continue
+            self._set_route(ra, self.routes[ra] + self.routes[rb])
+            self._set_route(rb, [])
+        return unassigned
+
+    # Busca local
+
+    def _removal_gain(self, u: int) -> Optional[float]:
+        """Redução de distância ao retirar u da rota (None se a rota ficaria inviável)"""
+        r, k = self.route_of[u], self.pos[u]
+        p, q = self._job(r, k - 1), self._job(r, k + 1)
+        if not self._reaches(p, self._finish(r, k - 1), r, k + 1):
+            return None
+        gain = self.d(p, u) + self.d(u, q) - self.d(p, q)
+        if len(self.routes[r]) == 1:
+            gain += self.fixed
+        return gain
+
+    def _insertion(self, u: int, r: int, k: int) -> Optional[float]:
+        """Custo de inserir u antes da posição k da rota r (None se inviável)"""
+        p, q = self._job(r, k - 1), self._job(r, k)
+        begin = max(self.earliest[u], self._finish(r, k - 1) + self.t(p, u))
+        if begin > self.latest[u] + EPS or not self._reaches(u, begin + self.service[u], r, k):
+            return None
+        return self.d(p, u) + self.d(u, q) - self.d(p, q)
+
+    def _try_relocate(self, u: int, candidates) -> bool:
+        ru = self.route_of[u]
+        gain = None
+        for v, after in candidates:
+            rv = self.route_of[v]
+            if rv == DEPOT:
+                continue
+            k = self.pos[v] + 1 if after else self.pos[v]
+            if rv == ru:
+                if self._try_intra_move(u, k):
+                    return True
+                continue
+            if self._combine(self._load(rv), self.demand[u]) > self._cap(rv) + EPS:
+                continue
+            if gain is None:
+                gain = self._removal_gain(u)
+                if gain is None:
+                    return False
+            cost = self._insertion(u, rv, k)
+            if cost is not None and cost < gain - EPS:
+                source = self.routes[ru][:]
+                source.pop(self.pos[u])
+                target = self.routes[rv][:]
+                target.insert(k, u)
+                self._set_route(rv, target)
+                self._set_route(ru, source)
+                return True
+        return False
+
+    def _try_intra_move(self, u: int, k: int) -> bool:
+        """Mover u para antes da posição k da própria rota"""
+        r = self.route_of[u]
+        jobs = self.routes[r]
+        current = self.pos[u]
+        if k in (current, current + 1):
+            return False
+        p, q = self._job(r, current - 1), self._job(r, current + 1)
+        x, y = self._job(r, k - 1), self._job(r, k)
+        delta = self.d(p, q) - self.d(p, u) - self.d(u, q) + self.d(x, u) + self.d(u, y) - self.d(x, y)
+        if delta >= -EPS:
+            return False
+        candidate = jobs[:current] + jobs[current + 1:]
+        candidate.insert(k if k < current else k - 1, u)
+        schedule = self._schedule(candidate)
+        if schedule is None:
+            return False
+        self._set_route(r, candidate, schedule)
+        return True
+
+    def _try_swap(self, u: int, w: int) -> bool:
+        ru, rw = self.route_of[u], self.route_of[w]
+        if ru == rw or rw == DEPOT:
+            return False
+        ku, kw = self.pos[u], self.pos[w]
+        if not self.cumulative:
+            load_u = max(self._prefix_load(ru, ku - 1), self._suffix_load(ru, ku + 1), self.demand[w])
+            load_w = max(self._prefix_load(rw, kw - 1), self._suffix_load(rw, kw + 1), self.demand[u])
+        else:
+            load_u = self._load(ru) - self.demand[u] + self.demand[w]
+            load_w = self._load(rw) - self.demand[w] + self.demand[u]
+        if load_u > self._cap(ru) + EPS or load_w > self._cap(rw) + EPS:
+            return False
+
+        def replace(r, k, old, new):
+            p, q = self._job(r, k - 1), self._job(r, k + 1)
+            begin = max(self.earliest[new], self._finish(r, k - 1) + self.t(p, new))
+            if begin > self.latest[new] + EPS or not self._reaches(new, begin + self.service[new], r, k + 1):
+                return None
+            return self.d(p, new) + self.d(new, q) - self.d(p, old) - self.d(old, q)
+
+        delta_u = replace(ru, ku, u, w)
+        if delta_u is None:
+            return False
+        delta_w = replace(rw, kw, w, u)
+        if delta_w is None or delta_u + delta_w >= -EPS:
+            return False
+        a, b = self.routes[ru][:], self.routes[rw][:]
+        a[ku], b[kw] = w, u
+        self._set_route(ru, a)
+        self._set_route(rw, b)
+        return True
+
+    def _try_two_opt_star(self, u: int, w: int) -> bool:
+        """Trocar as caudas: ... u -> w ... e ... v -> (sucessor antigo de u) ..."""
+        ru, rw = self.route_of[u], self.route_of[w]
+        if ru == rw or rw == DEPOT:
+            return False
+        i, j = self.pos[u], self.pos[w] - 1
+        u_next, v = self._job(ru, i + 1), self._job(rw, j)
+        if self._combine(self._prefix_load(ru, i), self._suffix_load(rw, j + 1)) > self._cap(ru) + EPS:
+            return False
+        if self._combine(self._prefix_load(rw, j), self._suffix_load(ru, i + 1)) > self._cap(rw) + EPS:
+            return False
+        delta = self.d(u, w) + self.d(v, u_next) - self.d(u, u_next) - self.d(v, w)
+        if j < 0 and i + 1 >= len(self.routes[ru]):
+            delta -= self.fixed  # a rota de w fica vazia
+        if delta >= -EPS:
+            return False
+        if not self._reaches(u, self._finish(ru, i), rw, j + 1):
+            return False
+        if not self._reaches(v, self._finish(rw, j), ru, i + 1):
+            return False
+        a = self.routes[ru][:i + 1] + self.routes[rw][j + 1:]
+        b = self.routes[rw][:j + 1] + self.routes[ru][i + 1:]
+        self._set_route(ru, a)
+        self._set_route(rw, b)
+        return True
+
+    def improve(self, successors, predecessors, deadline: float) -> int:
+        """Primeira melhora até ótimo local ou fim do orçamento de tempo
+
+        Fila de paradas a examinar ("don't look bits"): depois de um movimento,
+        só as paradas das rotas alteradas voltam para a fila.
+        """
+        order = [job for job in range(self.n) if self.route_of[job] != DEPOT]
+        self.rng.shuffle(order)
+        queue = deque(order)
+        queued = [False] * self.n
+        for job in order:
+            queued[job] = True
+
+        moves = checks = 0
+        while queue:
+            checks += 1
+            if checks % 256 == 0 and time.monotonic() >= deadline:
+                break
+            u = queue.popleft()
+            queued[u] = False
+            if self.route_of[u] == DEPOT:
+                continue
+
+            self.touched.clear()
+            candidates = [(v, True) for v in predecessors[u]] + [(w, False) for w in successors[u]]
+            improved = self._try_relocate(u, candidates) or any(
+                self._try_two_opt_star(u, w) or self._try_swap(u, w) for w in successors[u]
+            )
+            if not improved:
+                continue
+            moves += 1
+            for r in self.touched:
+                for job in self.routes.get(r, ()):
+                    if not queued[job]:
+                        queued[job] = True
+                        queue.append(job)
+        return moves
+
+    def assign_vehicles(self, capacities: List[float]) -> List[int]:
+        """Rotas mais carregadas primeiro, cada uma no menor veículo livre que a comporta
+
+        Rotas sem veículo são desfeitas; retorna as paradas que ficaram de fora.
+        """
+        free = sorted(range(len(capacities)), key=lambda v: capacities[v])
+        dropped = []
+        for r in sorted(self.routes, key=lambda r: -self._load(r)):
+            vehicle = next((v for v in free if capacities[v] >= self._load(r) - EPS), None)
+            if vehicle is None:
+                dropped += self.routes[r]
+                for job in self.routes[r]:
+                    self.route_of[job] = DEPOT
+                self._set_route(r, [])
+                continue
+            free.remove(vehicle)
+            self.vehicle_of[r] = vehicle
+            self.route_capacity[r] = capacities[vehicle]
+        self.free_vehicles = free
+        return dropped
+
+    def repair(self, jobs: List[int], capacities: List[float], successors, predecessors) -> List[int]:
+        """Inserir paradas de fora na melhor posição vizinha viável, ou em um veículo livre"""
+        unassigned = []
+        next_id = max(self.routes, default=-1) + 1
+        for u in sorted(jobs, key=lambda job: -self.demand[job]):
+            best = None
+            candidates = [(v, True) for v in predecessors[u]] + [(w, False) for w in successors[u]]
+            for v, after in candidates:
+                r = self.route_of[v]
+                if r == DEPOT or self._combine(self._load(r), self.demand[u]) > self._cap(r) + EPS:
+                    continue
+                k = self.pos[v] + 1 if after else self.pos[v]
+                cost = self._insertion(u, r, k)
+                if cost is not None and (best is None or cost < best[0]):
+                    best = (cost, r, k)
+            if best is not None:
+                _, r, k = best
+                jobs_r = self.routes[r][:]
+                jobs_r.insert(k, u)
+                self._set_route(r, jobs_r)
+                continue
+
+            schedule = self._schedule([u])
+            vehicle = next((v for v in self.free_vehicles if capacities[v] >= self.demand[u] - EPS), None)
+            if schedule is None or vehicle is None:
+                unassigned.append(u)
+                continue
+            self.free_vehicles.remove(vehicle)
+            self._set_route(next_id, [u], schedule)
+            self.vehicle_of[next_id] = vehicle
+            self.route_capacity[next_id] = capacities[vehicle]
+            next_id += 1
+        return unassigned
+
+
+def solve(instance: VRPInstance, time_budget: float, seed: int = 0) -> VRPSolution:
+    """Resolver a instância dentro do orçamento de tempo (segundos)
+
+    1. Savings e busca local com a capacidade do maior veículo
+    2. Alocação de veículos; paradas que sobraram são reinseridas (reparo)
+    3. Busca local com a capacidade de cada veículo até o fim do orçamento
+    """
+    started = time.monotonic()
+    deadline = started + time_budget
+    solver = _Solver(instance, seed)
+    capacities = instance.capacities.astype(float).tolist()
+
+    successors, predecessors = _nearest(instance, instance.neighbors)
+    neighbors_done = time.monotonic()
+    infeasible = solver.construct(successors)
+    initial_cost = solver.objective() * instance.cost_per_km
+    construct_done = time.monotonic()
+
+    iterations = solver.improve(successors, predecessors, started + time_budget * 0.7)
+    dropped = solver.assign_vehicles(capacities)
+    unassigned = solver.repair(dropped, capacities, successors, predecessors)
+    iterations += solver.improve(successors, predecessors, deadline)
+
+    routes = list(solver.routes)
+    distance = sum(solver.route_distance(solver.routes[r]) for r in routes)
+    finished = time.monotonic()
+    return VRPSolution(
+        routes=[solver.routes[r] for r in routes],
+        start_times=[solver.preferred_starts(r) for r in routes],
+        vehicles=[solver.vehicle_of[r] for r in routes],
+        unassigned=sorted(infeasible + unassigned),
+        distance=distance,
+        cost=(distance + solver.fixed * len(routes)) * instance.cost_per_km,
+        initial_cost=initial_cost,
+        iterations=iterations,
+        elapsed=finished - started,
+        seed=seed,
+        stats={
+            "neighbors_seconds": neighbors_done - started,
+            "construct_seconds": construct_done - neighbors_done,
+            "improve_seconds": finished - construct_done,
+        },
+    )
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: o processo da API tem threads (fork copiaria locks em estado inconsistente)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Descartar um pool quebrado (worker morto: OOM, crash); o próximo uso cria outro"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _solve_in_pool(instance: VRPInstance, time_budget: float, starts: int, workers: int) -> List[VRPSolution]:
+    pool = _get_pool(workers)
+    try:
+        futures = [pool.submit(solve, instance, time_budget, seed) for seed in range(starts)]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+
+def solve_parallel(instance: VRPInstance, time_budget: float, starts: int, workers: int) -> VRPSolution:
+    """Várias execuções (sementes diferentes) no pool de processos; fica a de menor custo
+
+    Pool quebrado é recriado e a chamada repetida uma vez; se quebrar de novo,
+    uma única execução roda no próprio processo.
+    """
+    try:
+        solutions = _solve_in_pool(instance, time_budget, starts, workers)
+    except BrokenProcessPool:
+        try:
+            solutions = _solve_in_pool(instance, time_budget, starts, workers)
+        except BrokenProcessPool:
+            solutions = [solve(instance, time_budget, 0)]
+    return min(solutions, key=lambda s: (len(s.unassigned), s.cost))
@@ -0,0 +1,24 @@
+import time
+from typing import Any, Dict
+from core.celery_app import celery_app
+from core.database import SessionLocal
+from core.logging import get_logger
+from services.forecasting import RevenueForecastService
+
+logger = get_logger("tasks.analytics")
+
+
+@celery_app.task
+def refresh_revenue_forecasts() -> Dict[str, Any]:
+    """Recalcular a previsão de receita de todos os tenants (uma consulta + ajuste vetorizado)"""
+
+    start_time = time.perf_counter()
+    db = SessionLocal()
+    try:
+        tenants = RevenueForecastService(db).refresh_all()
+    finally:
+        db.close()
+
+    duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
+    logger.info("Previsões de receita atualizadas", tenants=tenants, duration_ms=duration_ms)
+    return {"tenants": tenants, "duration_ms": duration_ms}
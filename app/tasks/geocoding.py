@@ -0,0 +1,119 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import update
+from core.celery_app import celery_app
+from core.config import settings
+from core.data_version import bump_versions
+from core.database import SessionLocal
+from core.logging import get_logger
+from core.redis_client import redis_client
+from models.client import Client
+from models.tenant import Tenant
+from services.geocoding import GeocodingService, format_query, normalize_address
+
+logger = get_logger("tasks.geocoding")
+
+LOCK_KEY = "tms:geocoding:lock"
+# Clientes pendentes lidos por vez
+PAGE_SIZE = 1000
+
+
+def _apply(db, model, rows, resolved, geocoded_at) -> int:
+    """Gravar as coordenadas resolvidas em um UPDATE executemany"""
+    values = []
+    for row_id, key in rows:
+        if key not in resolved:
+            continue
+        coordinates = resolved[key]
+        values.append({
+            "id": row_id,
+            "latitude": coordinates[0] if coordinates else None,
+            "longitude": coordinates[1] if coordinates else None,
+            "geocoded_at": geocoded_at,
+        })
+    if values:
+        db.execute(update(model), values)
+        db.commit()
+    return len(values)
+
+
+@celery_app.task
+def geocode_pending_addresses(limit: Optional[int] = None) -> Dict[str, Any]:
+    """Geocodificar clientes e tenants pendentes (endereço novo ou alterado)
+
+    Endereços já presentes no cache são aplicados sem chamadas externas; no máximo
+    `limit` (GEOCODING_BATCH_SIZE) endereços novos vão ao provedor por execução.
+    """
+    # Uma execução por vez: o limite de requisições do provedor é global
+    if not redis_client.set(LOCK_KEY, "1", nx=True, ex=celery_app.conf.task_time_limit):
+        logger.info("Geocodificação já em andamento")
+        return {"skipped": True}
+
+    start_time = time.perf_counter()
+    budget = settings.GEOCODING_BATCH_SIZE if limit is None else limit
+    db = SessionLocal()
+    try:
+        service = GeocodingService(db)
+        geocoded_at = datetime.now(timezone.utc)
+        clients_updated = 0
+        tenants_touched = set()
+
+        last_id = 0
+        while True:
+            page = db.query(
+                Client.id, Client.tenant_id, Client.address, Client.city, Client.state, Client.zip_code
+            ).filter(
+                Client.geocoded_at.is_(None),
+                Client.id > last_id
+            ).order_by(Client.id).limit(PAGE_SIZE).all()
+            if not page:
+                break
+            last_id = page[-1].id
+
+            queries = {}
+            rows = []
+            for client in page:
+                key = normalize_address(client.address, client.city, client.state, client.zip_code)
+                queries.setdefault(key, format_query(client.address, client.city, client.state, client.zip_code))
+                rows.append((client.id, key))
+
+            requests_before = service.requests
+            resolved = service.resolve(queries, limit=budget)
+            budget = max(budget - (service.requests - requests_before), 0)
+            updated = _apply(db, Client, rows, resolved, geocoded_at)
+            clients_updated += updated
+            if updated:
+                tenants_touched.update(client.tenant_id for client in page)
+
+        tenants = db.query(Tenant.id, Tenant.address).filter(
+            Tenant.geocoded_at.is_(None),
+            Tenant.address.isnot(None)
+        ).all()
+        tenant_rows = [(tenant.id, normalize_address(tenant.address)) for tenant in tenants]
+        resolved = service.resolve(
+            {normalize_address(tenant.address): format_query(tenant.address) for tenant in tenants},
+            limit=budget
+        )
+        tenants_updated = _apply(db, Tenant, tenant_rows, resolved, geocoded_at)
+    finally:
+        db.close()
+        redis_client.delete(LOCK_KEY)
+
+    # UPDATE em massa não passa pelos hooks de flush da sessão
+    bump_versions([("clients", tenant_id) for tenant_id in tenants_touched])
+
+    duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
+    logger.info(
+        "Geocodificação em lote concluída",
+        clients=clients_updated,
+        tenants=tenants_updated,
+        provider_requests=service.requests,
+        duration_ms=duration_ms
+    )
+    return {
+        "clients": clients_updated,
+        "tenants": tenants_updated,
+        "provider_requests": service.requests,
+        "duration_ms": duration_ms,
+    }
@@ -0,0 +1,297 @@
+import asyncio
+from datetime import date, timedelta
+from typing import Optional, Dict, Any, List, Iterable
+from sqlalchemy import and_, exists, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from core.celery_app import celery_app
+from core.database import SessionLocal
+from core.config import settings
+from core.logging import get_logger
+from models.alert import AlertDispatch
+from models.driver import Driver
+from models.maintenance import Maintenance
+from models.user import User, UserRole
+from models.vehicle import Vehicle
+
+logger = get_logger("tasks.maintenance")
+
+ALERT_MAINTENANCE_DUE = "maintenance_due"
+ALERT_CNH_EXPIRY = "cnh_expiry"
+
+
+def _not_alerted(alert_type: str, entity_id, reference_date):
+    """Filtro anti-join: entidade ainda sem alerta para a data de referência"""
+    return ~exists().where(
+        and_(
+            AlertDispatch.alert_type == alert_type,
+            AlertDispatch.entity_id == entity_id,
+            AlertDispatch.reference_date == reference_date
+        )
+    )
+
+
+def _claim_alerts(db: Session, alert_type: str, rows: Iterable[Dict[str, Any]]) -> set:
+    """Registrar alertas como enviados; retorna apenas os ids reservados por esta execução"""
+    values = [
+        {
+            "tenant_id": row["tenant_id"],
+            "alert_type": alert_type,
+            "entity_id": row["entity_id"],
+            "reference_date": row["reference_date"]
+        }
+        for row in rows
+    ]
+    if not values:
+        return set()
+
+    # ON CONFLICT garante que varreduras concorrentes não disparem o mesmo alerta
+    stmt = pg_insert(AlertDispatch).values(values).on_conflict_do_nothing(
+        constraint="uq_alert_dispatches_entity"
+    ).returning(AlertDispatch.entity_id)
+    claimed = {entity_id for (entity_id,) in db.execute(stmt)}
+    db.commit()
+    return claimed
+
+
+def _release_alerts(db: Session, alert_type: str, rows: Iterable[Dict[str, Any]]) -> None:
+    """Desfazer a reserva de alertas não enviados, para a próxima varredura tentar de novo"""
+    keys = [(row["entity_id"], row["reference_date"]) for row in rows]
+    if not keys:
+        return
+    db.query(AlertDispatch).filter(
+        AlertDispatch.alert_type == alert_type,
+        tuple_(AlertDispatch.entity_id, AlertDispatch.reference_date).in_(keys)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def _load_admin_emails(db: Session, tenant_ids: Iterable[int], cache: Dict[int, List[str]]) -> None:
+    """Carregar emails dos administradores dos tenants ainda não presentes no cache"""
+    missing = [tenant_id for tenant_id in set(tenant_ids) if tenant_id not in cache]
+    if not missing:
+        return
+
+    for tenant_id in missing:
+        cache[tenant_id] = []
+
+    rows = db.query(User.tenant_id, User.email).filter(
+        User.tenant_id.in_(missing),
+        User.role == UserRole.ADMIN,
+        User.is_active == True
+    ).all()
+    for tenant_id, email in rows:
+        cache[tenant_id].append(email)
+
+
+def _queue_batch(
+    db: Session,
+    alert_type: str,
+    rows: List[Dict[str, Any]],
+    admin_cache: Dict[int, List[str]]
+) -> int:
+    """Reservar e enfileirar um lote de alertas; retorna quantos foram enfileirados
+
+    A reserva evita envios duplicados entre varreduras concorrentes; alertas que
+    não chegam a ser enviados têm a reserva desfeita e voltam na próxima varredura.
+    """
+    claimed = _claim_alerts(db, alert_type, rows)
+    if not claimed:
+        return 0
+
+    _load_admin_emails(db, (row["tenant_id"] for row in rows), admin_cache)
+
+    alerts = []
+    queued_rows = []
+    skipped = []
+    for row in rows:
+        if row["entity_id"] not in claimed:
+            continue
+        admin_emails = admin_cache.get(row["tenant_id"])
+        if not admin_emails:
+            logger.warning("Tenant sem administradores para alerta",
+                           tenant_id=row["tenant_id"], alert_type=alert_type)
+            skipped.append(row)
+            continue
+        alert = dict(row["payload"])
+        alert["admin_emails"] = admin_emails
+        alert["entity_id"] = row["entity_id"]
+        alert["reference_date"] = row["reference_date"].isoformat()
+        alerts.append(alert)
+        queued_rows.append(row)
+
+    _release_alerts(db, alert_type, skipped)
+    if alerts:
+        try:
+            dispatch_alert_batch.delay(alert_type, alerts)
+        except Exception:
+            # Broker indisponível: nada foi enfileirado
+            _release_alerts(db, alert_type, queued_rows)
+            raise
+    return len(alerts)
+
+
+@celery_app.task
+def scan_due_maintenances(days_ahead: Optional[int] = None) -> Dict[str, Any]:
+    """Varrer manutenções pendentes que vencem nos próximos dias (todos os tenants)"""
+
+    days_ahead = days_ahead or settings.MAINTENANCE_ALERT_DAYS_AHEAD
+    start_date = date.today()
+    end_date = start_date + timedelta(days=days_ahead)
+    batch_size = settings.ALERT_SCAN_BATCH_SIZE
+
+    db = SessionLocal()
+    try:
+        admin_cache: Dict[int, List[str]] = {}
+        last_key = None
+        scanned = 0
+        queued = 0
+
+        while True:
+            # Range em (maintenance_date, id) usa o índice parcial ix_maintenances_pending_date_id
+            query = db.query(
+                Maintenance.id,
+                Maintenance.tenant_id,
+                Maintenance.maintenance_type,
+                Maintenance.maintenance_date,
+                Vehicle.plate
+            ).join(Vehicle, Vehicle.id == Maintenance.vehicle_id).filter(
+                Maintenance.is_completed == False,
+                Maintenance.maintenance_date >= start_date,
+                Maintenance.maintenance_date <= end_date,
+                _not_alerted(ALERT_MAINTENANCE_DUE, Maintenance.id, Maintenance.maintenance_date)
+            )
+            if last_key:
+                query = query.filter(tuple_(Maintenance.maintenance_date, Maintenance.id) > last_key)
+
+            batch = query.order_by(Maintenance.maintenance_date, Maintenance.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_key = (batch[-1].maintenance_date, batch[-1].id)
+            scanned += len(batch)
+
+            rows = [
+                {
+                    "tenant_id": row.tenant_id,
+                    "entity_id": row.id,
+                    "reference_date": row.maintenance_date,
+                    "payload": {
+                        "vehicle_plate": row.plate,
+                        "maintenance_type": str(row.maintenance_type),
+                        "due_date": row.maintenance_date.isoformat()
+                    }
+                }
+                for row in batch
+            ]
+            queued += _queue_batch(db, ALERT_MAINTENANCE_DUE, rows, admin_cache)
+
+        logger.info("Varredura de manutenções concluída", scanned=scanned, queued=queued)
+        return {"scanned": scanned, "queued": queued, "days_ahead": days_ahead}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def scan_expiring_cnh(days_ahead: Optional[int] = None) -> Dict[str, Any]:
+    """Varrer motoristas ativos com CNH vencendo nos próximos dias (todos os tenants)"""
+
+    days_ahead = days_ahead or settings.CNH_EXPIRY_ALERT_DAYS_AHEAD
+    start_date = date.today()
+    end_date = start_date + timedelta(days=days_ahead)
+    batch_size = settings.ALERT_SCAN_BATCH_SIZE
+
+    db = SessionLocal()
+    try:
+        admin_cache: Dict[int, List[str]] = {}
+        last_key = None
+        scanned = 0
+        queued = 0
+
+        while True:
+            # Range em (cnh_expiry, id) usa o índice parcial ix_drivers_cnh_expiry_id
+            query = db.query(
+                Driver.id,
+                Driver.tenant_id,
+                Driver.cnh_number,
+                Driver.cnh_expiry
+            ).filter(
+                Driver.is_active == True,
+                Driver.cnh_expiry >= start_date,
+                Driver.cnh_expiry <= end_date,
+                _not_alerted(ALERT_CNH_EXPIRY, Driver.id, Driver.cnh_expiry)
+            )
+            if last_key:
+                query = query.filter(tuple_(Driver.cnh_expiry, Driver.id) > last_key)
+
+            batch = query.order_by(Driver.cnh_expiry, Driver.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_key = (batch[-1].cnh_expiry, batch[-1].id)
+            scanned += len(batch)
+
+            rows = [
+                {
+                    "tenant_id": row.tenant_id,
+                    "entity_id": row.id,
+                    "reference_date": row.cnh_expiry,
+                    "payload": {
+                        "document_type": "CNH",
+                        "document_number": row.cnh_number,
+                        "expiry_date": row.cnh_expiry.isoformat()
+                    }
+                }
+                for row in batch
+            ]
+            queued += _queue_batch(db, ALERT_CNH_EXPIRY, rows, admin_cache)
+
+        logger.info("Varredura de CNHs concluída", scanned=scanned, queued=queued)
+        return {"scanned": scanned, "queued": queued, "days_ahead": days_ahead}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def dispatch_alert_batch(alert_type: str, alerts: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Enviar um lote de alertas com concorrência limitada"""
+    from services.notifications import NotificationService
+
+    service = NotificationService()
+    semaphore = asyncio.Semaphore(settings.ALERT_DISPATCH_CONCURRENCY)
+
+    async def send(alert: Dict[str, Any]) -> Dict[str, bool]:
+        async with semaphore:
+            if alert_type == ALERT_MAINTENANCE_DUE:
+                return await service.send_maintenance_alert(
+                    alert["vehicle_plate"],
+                    alert["maintenance_type"],
+                    date.fromisoformat(alert["due_date"]),
+                    alert["admin_emails"]
+                )
+            return await service.send_document_expiry_alert(
+                alert["document_type"],
+                alert["document_number"],
+                date.fromisoformat(alert["expiry_date"]),
+                alert["admin_emails"]
+            )
+
+    async def send_all():
+        return await asyncio.gather(*(send(alert) for alert in alerts), return_exceptions=True)
+
+    results = asyncio.run(send_all())
+
+    failed = [
+        alert for alert, result in zip(alerts, results)
+        if isinstance(result, Exception) or not all(result.values())
+    ]
+    if failed:
+        logger.warning("Falha ao enviar alertas", alert_type=alert_type, failed=len(failed), total=len(alerts))
+        db = SessionLocal()
+        try:
+            _release_alerts(db, alert_type, [
+                {"entity_id": alert["entity_id"], "reference_date": date.fromisoformat(alert["reference_date"])}
+                for alert in failed
+            ])
+        finally:
+            db.close()
+
+    return {"sent": len(alerts) - len(failed), "failed": len(failed)}
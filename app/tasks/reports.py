@@ -2,10 +2,9 @@ import os
 import json
 from datetime import datetime, date
 from typing import Optional, Dict, Any
-from celery import current_task
 from core.celery_app import celery_app
-from core.database import SessionLocal
-from sqlalchemy.orm import Session
+from core.database import tenant_session
+from sqlalchemy.orm import Session, contains_eager
 from models.trip import Trip, TripStatus
 from models.maintenance import Maintenance, MaintenanceType
 from models.client import Client
@@ -13,11 +12,18 @@ from models.driver import Driver
 from models.vehicle import Vehicle
 from models.route import Route
 from core.config import settings
+from core.logging import get_logger
+from services.report_progress import ReportCancelled, ReportProgress, partial_path
 
+logger = get_logger("tasks.reports")
 
-def get_db() -> Session:
-    """Obter sessão do banco de dados"""
-    db = SessionLocal()
+# Linhas buscadas por vez do cursor (yield_per)
+REPORT_FETCH_SIZE = 1000
+
+
+def get_db(tenant_id: Optional[int] = None) -> Session:
+    """Obter sessão do banco de dados (com escopo de tenant, se informado)"""
+    db = tenant_session(tenant_id)
     try:
         return db
     except Exception:
@@ -34,19 +40,18 @@ def generate_report_task(
     end_date: Optional[str] = None,
     client_id: Optional[int] = None,
     driver_id: Optional[int] = None,
-    vehicle_id: Optional[int] = None
+    vehicle_id: Optional[int] = None,
+    tenant_id: Optional[int] = None
 ) -> Dict[str, Any]:
-    """Tarefa para gerar relatórios em background"""
-    
+    """Tarefa para gerar relatórios em background
+
+    O progresso (linhas lidas) é publicado no Redis por ReportProgress; o cancelamento
+    é verificado a cada atualização e remove o arquivo parcial. As consultas ficam
+    restritas ao tenant que pediu o relatório.
+    """
+    progress = ReportProgress(self.request.id)
+    db = get_db(tenant_id)
     try:
-        # Atualizar progresso
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'progress': 10, 'message': 'Iniciando geração do relatório'}
-        )
-        
-        db = get_db()
-        
         # Converter datas
         start_dt = None
         end_dt = None
@@ -55,40 +60,25 @@ def generate_report_task(
         if end_date:
             end_dt = datetime.fromisoformat(end_date).date()
         
-        # Atualizar progresso
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'progress': 30, 'message': 'Coletando dados'}
-        )
-        
         # Coletar dados baseado no tipo de relatório
         if report_type == "trips":
-            data = generate_trips_report(db, start_dt, end_dt, client_id, driver_id, vehicle_id)
+            data = generate_trips_report(db, start_dt, end_dt, client_id, driver_id, vehicle_id, progress=progress)
         elif report_type == "maintenance":
-            data = generate_maintenance_report(db, start_dt, end_dt, vehicle_id)
+            data = generate_maintenance_report(db, start_dt, end_dt, vehicle_id, progress=progress)
         elif report_type == "financial":
-            data = generate_financial_report(db, start_dt, end_dt, client_id)
+            data = generate_financial_report(db, start_dt, end_dt, client_id, progress=progress)
         elif report_type == "profitability":
+            progress.start(0)
             data = generate_profitability_report(db, start_dt, end_dt)
         else:
             raise ValueError(f"Tipo de relatório não suportado: {report_type}")
         
-        # Atualizar progresso
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'progress': 70, 'message': 'Gerando arquivo'}
-        )
-        
         # Gerar arquivo
-        filename = generate_file(data, report_type, format)
-        
-        # Atualizar progresso
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'progress': 90, 'message': 'Finalizando'}
-        )
+        progress.writing()
+        filename = generate_file(data, report_type, format, task_id=self.request.id)
         
         download_url = f"/reports/download/{filename}"
+        progress.complete(download_url, filename)
         
         return {
             "status": "success",
@@ -97,15 +87,29 @@ def generate_report_task(
             "generated_at": datetime.now().isoformat()
         }
         
+    except ReportCancelled:
+        progress.cancelled()
+        logger.info("Relatório cancelado", task_id=self.request.id, rows=progress.rows_done)
+        return {"status": "cancelled"}
     except Exception as e:
-        current_task.update_state(
-            state='FAILURE',
-            meta={'error': str(e)}
-        )
+        if progress.cancel_requested():
+            # Arquivo parcial removido pelo cancelamento durante a escrita
+            progress.cancelled()
+            return {"status": "cancelled"}
+        progress.fail(str(e))
         raise
     finally:
-        if 'db' in locals():
-            db.close()
+        db.close()
+
+
+def _iterate(query, progress: Optional[ReportProgress]):
+    """Percorrer o resultado em lotes, contando as linhas no progresso"""
+    if progress is not None:
+        progress.start(query.order_by(None).count())
+    for row in query.yield_per(REPORT_FETCH_SIZE):
+        if progress is not None:
+            progress.advance()
+        yield row
 
 
 def generate_trips_report(
@@ -114,11 +118,15 @@ def generate_trips_report(
     end_date: Optional[date] = None,
     client_id: Optional[int] = None,
     driver_id: Optional[int] = None,
-    vehicle_id: Optional[int] = None
+    vehicle_id: Optional[int] = None,
+    progress: Optional[ReportProgress] = None
 ) -> Dict[str, Any]:
     """Gerar relatório de viagens"""
     
-    query = db.query(Trip).join(Client).join(Driver).join(Vehicle).join(Route)
+    query = db.query(Trip).join(Client).join(Driver).join(Vehicle).join(Route).options(
+        contains_eager(Trip.client), contains_eager(Trip.driver),
+        contains_eager(Trip.vehicle), contains_eager(Trip.route)
+    )
     
     if start_date:
         query = query.filter(Trip.departure_date >= start_date)
@@ -131,7 +139,7 @@ def generate_trips_report(
     if vehicle_id:
         query = query.filter(Trip.vehicle_id == vehicle_id)
     
-    trips = query.all()
+    trips = list(_iterate(query, progress))
     
     return {
         "report_type": "trips",
@@ -167,11 +175,12 @@ def generate_maintenance_report(
     db: Session,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    vehicle_id: Optional[int] = None
+    vehicle_id: Optional[int] = None,
+    progress: Optional[ReportProgress] = None
 ) -> Dict[str, Any]:
     """Gerar relatório de manutenções"""
     
-    query = db.query(Maintenance).join(Vehicle)
+    query = db.query(Maintenance).join(Vehicle).options(contains_eager(Maintenance.vehicle))
     
     if start_date:
         query = query.filter(Maintenance.maintenance_date >= start_date)
@@ -180,7 +189,7 @@ def generate_maintenance_report(
     if vehicle_id:
         query = query.filter(Maintenance.vehicle_id == vehicle_id)
     
-    maintenances = query.all()
+    maintenances = list(_iterate(query, progress))
     
     return {
         "report_type": "maintenance",
@@ -210,11 +219,12 @@ def generate_financial_report(
     db: Session,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    client_id: Optional[int] = None
+    client_id: Optional[int] = None,
+    progress: Optional[ReportProgress] = None
 ) -> Dict[str, Any]:
     """Gerar relatório financeiro"""
     
-    query = db.query(Trip).join(Client)
+    query = db.query(Trip).join(Client).options(contains_eager(Trip.client))
     
     if start_date:
         query = query.filter(Trip.departure_date >= start_date)
@@ -223,7 +233,7 @@ def generate_financial_report(
     if client_id:
         query = query.filter(Trip.client_id == client_id)
     
-    trips = query.all()
+    trips = list(_iterate(query, progress))
     
     total_revenue = sum(trip.freight_revenue or 0 for trip in trips)
     total_costs = sum(
@@ -289,34 +299,27 @@ def generate_profitability_report(
     }
 
 
-def generate_file(data: Dict[str, Any], report_type: str, format: str) -> str:
-    """Gerar arquivo do relatório"""
+def generate_file(data: Dict[str, Any], report_type: str, format: str, task_id: Optional[str] = None) -> str:
+    """Gerar arquivo do relatório
+
+    Com task_id, o conteúdo é escrito em um arquivo parcial e renomeado ao final:
+    um relatório cancelado ou interrompido nunca aparece com o nome definitivo.
+    """
+    
+    if format not in ("json", "excel", "pdf"):
+        raise ValueError(f"Formato não suportado: {format}")
     
     # Criar diretório se não existir
     os.makedirs(settings.REPORTS_DIR, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{report_type}_report_{timestamp}"
-    
-    if format == "json":
-        filepath = os.path.join(settings.REPORTS_DIR, f"{filename}.json")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return f"{filename}.json"
-    
-    elif format == "excel":
-        # Implementação do Excel seria mais complexa
-        filepath = os.path.join(settings.REPORTS_DIR, f"{filename}.json")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return f"{filename}.json"
-    
-    elif format == "pdf":
-        # Implementação do PDF seria mais complexa
-        filepath = os.path.join(settings.REPORTS_DIR, f"{filename}.json")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return f"{filename}.json"
+    # Excel e PDF ainda são gerados como JSON (implementação pendente)
+    filename = f"{report_type}_report_{timestamp}.json"
+    filepath = os.path.join(settings.REPORTS_DIR, filename)
+    target = partial_path(task_id) if task_id else filepath
     
-    else:
-        raise ValueError(f"Formato não suportado: {format}")
\ No newline at end of file
+    with open(target, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    if target != filepath:
+        os.replace(target, filepath)
+    return filename
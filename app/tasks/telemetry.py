@@ -0,0 +1,157 @@
+"""Consumidor do stream de posições GPS
+
+Processo dedicado (python -m tasks.telemetry), escalável horizontalmente: cada
+instância entra no grupo GPS_CONSUMER_GROUP e grava lotes de entradas com COPY.
+"""
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import redis
+from sqlalchemy.exc import DataError, IntegrityError, OperationalError
+from core.celery_app import celery_app
+from core.config import settings
+from core.database import SessionLocal
+from core.logging import get_logger, setup_logging, shutdown_logging
+from core.metrics import GPS_POSITIONS
+from core.redis_client import redis_client
+from services.partitions import add_months, current_month, drop_monthly_partitions_before, ensure_monthly_partitions
+from services.telemetry import POSITIONS_TABLE, PositionWriter, decode_entry, update_latest_positions
+
+logger = get_logger("tasks.telemetry")
+
+# Intervalo entre buscas por lotes de consumidores parados (XAUTOCLAIM)
+CLAIM_INTERVAL_SECONDS = 30
+# Espera após falha do banco antes de tentar de novo (as entradas ficam pendentes)
+ERROR_BACKOFF_SECONDS = 5
+
+
+def ensure_consumer_group() -> None:
+    try:
+        redis_client.xgroup_create(settings.GPS_STREAM_KEY, settings.GPS_CONSUMER_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _acknowledge(entry_ids: List[str]) -> None:
+    """Confirmar e remover do stream: o tamanho do stream é o backlog real"""
+    if not entry_ids:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.xack(settings.GPS_STREAM_KEY, settings.GPS_CONSUMER_GROUP, *entry_ids)
+    pipe.xdel(settings.GPS_STREAM_KEY, *entry_ids)
+    pipe.execute()
+
+
+def _write(writer: PositionWriter, rows) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        result = writer.write(db, rows)
+    finally:
+        db.close()
+    update_latest_positions(result["latest"])
+    GPS_POSITIONS.labels(result="stored").inc(result["stored"])
+    GPS_POSITIONS.labels(result="duplicate").inc(result["duplicates"])
+    GPS_POSITIONS.labels(result="unknown_vehicle").inc(result["unknown_vehicle"])
+    return result
+
+
+def process_entries(writer: PositionWriter, entries: List[Tuple[str, Dict[str, str]]]) -> int:
+    """Gravar as entradas lidas do stream em uma única transação; retorna posições gravadas
+
+    Entradas malformadas são descartadas. Se o lote é recusado pelo banco por causa
+    dos dados, as entradas são regravadas uma a uma para isolar a inválida; falhas de
+    conexão propagam e as entradas ficam pendentes para nova tentativa.
+    """
+    decoded = []
+    for entry_id, fields in entries:
+        if not fields:
+            continue  # removida do stream enquanto pendente
+        try:
+            decoded.append((entry_id, decode_entry(fields)))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error("Entrada de telemetria inválida descartada", entry_id=entry_id, error=str(e))
+    if not decoded:
+        _acknowledge([entry_id for entry_id, _ in entries])
+        return 0
+
+    try:
+        stored = _write(writer, [row for _, rows in decoded for row in rows])["stored"]
+    except (DataError, IntegrityError):
+        stored = 0
+        for entry_id, rows in decoded:
+            try:
+                stored += _write(writer, rows)["stored"]
+            except (DataError, IntegrityError) as e:
+                logger.error("Lote de telemetria recusado pelo banco", entry_id=entry_id, error=str(e.orig))
+    _acknowledge([entry_id for entry_id, _ in entries])
+    return stored
+
+
+def consume(consumer: Optional[str] = None, stop=lambda: False) -> None:
+    """Ler o stream no grupo de consumidores até stop() retornar True"""
+    consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+    ensure_consumer_group()
+    writer = PositionWriter()
+    last_claim = 0.0
+    logger.info("Consumidor de telemetria iniciado", consumer=consumer, group=settings.GPS_CONSUMER_GROUP)
+
+    while not stop():
+        try:
+            entries = []
+            if time.monotonic() - last_claim >= CLAIM_INTERVAL_SECONDS:
+                # Lotes entregues a consumidores que pararam antes do XACK
+                claimed = redis_client.xautoclaim(
+                    settings.GPS_STREAM_KEY, settings.GPS_CONSUMER_GROUP, consumer,
+                    min_idle_time=settings.GPS_CLAIM_IDLE_MS, start_id="0-0",
+                    count=settings.GPS_CONSUMER_BATCH_ENTRIES
+                )
+                entries = claimed[1]
+                last_claim = time.monotonic()
+            if not entries:
+                response = redis_client.xreadgroup(
+                    settings.GPS_CONSUMER_GROUP, consumer, {settings.GPS_STREAM_KEY: ">"},
+                    count=settings.GPS_CONSUMER_BATCH_ENTRIES, block=settings.GPS_CONSUMER_BLOCK_MS
+                )
+                entries = response[0][1] if response else []
+            if entries:
+                process_entries(writer, entries)
+        except (OperationalError, redis.ConnectionError) as e:
+            logger.warning("Falha ao gravar telemetria; nova tentativa", consumer=consumer, error=str(e))
+            time.sleep(ERROR_BACKOFF_SECONDS)
+
+    logger.info("Consumidor de telemetria encerrado", consumer=consumer)
+
+
+@celery_app.task
+def maintain_position_partitions() -> Dict[str, Any]:
+    """Criar as partições dos próximos meses e remover as que passaram da retenção"""
+    month = current_month()
+    db = SessionLocal()
+    try:
+        created = ensure_monthly_partitions(
+            db, POSITIONS_TABLE, [add_months(month, i) for i in range(settings.GPS_PARTITIONS_AHEAD_MONTHS + 1)]
+        )
+        dropped = drop_monthly_partitions_before(
+            db, POSITIONS_TABLE, add_months(month, -settings.GPS_RETENTION_MONTHS)
+        )
+    finally:
+        db.close()
+    return {"created": created, "dropped": dropped}
+
+
+def main() -> None:
+    setup_logging()
+    stopping = []
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stopping.append(True))
+    try:
+        consume(stop=lambda: bool(stopping))
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from typing import Any, Dict
+from core.celery_app import celery_app
+from core.config import settings
+from core.database import SessionLocal
+from models.trip import Trip
+from services.partitions import add_months, current_month, ensure_monthly_partitions
+
+
+@celery_app.task
+def maintain_trip_partitions() -> Dict[str, Any]:
+    """Criar as partições de viagens dos próximos meses
+
+    Viagens agendadas além do horizonte ficam em trips_default até a partição do mês
+    ser criada, quando são movidas para ela.
+    """
+    month = current_month()
+    db = SessionLocal()
+    try:
+        created = ensure_monthly_partitions(
+            db, Trip.__tablename__, [add_months(month, i) for i in range(settings.TRIPS_PARTITIONS_AHEAD_MONTHS + 1)]
+        )
+    finally:
+        db.close()
+    return {"created": created}
@@ -0,0 +1,72 @@
+import os
+import sys
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# Mesmos imports absolutos da aplicação (core, models, services...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import settings  # noqa: E402
+from models import Client, Driver, Route, Tenant, Trip, TripStatus, Vehicle  # noqa: E402
+from services.partitions import add_months, current_month  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Engine do DATABASE_URL; os testes que dependem dele são pulados sem PostgreSQL"""
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL indisponível")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """Sessão dentro de uma transação desfeita ao final (nada é gravado)"""
+    conn = engine.connect()
+    transaction = conn.begin()
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def fleet(db):
+    """Tenant com motorista, veículo e uma viagem planejada em cada um dos próximos 3 meses"""
+    tenant = Tenant(name="t", slug="test-fleet", company_name="t", cnpj="test-fleet")
+    db.add(tenant)
+    db.flush()
+    client = Client(tenant_id=tenant.id, name="c", document="test-fleet", contact_name="c", phone="1",
+                    address="a", city="c", state="SP", zip_code="1")
+    driver = Driver(tenant_id=tenant.id, name="d", cnh_number="test-fleet", cnh_expiry=date(2099, 1, 1),
+                    phone="1", address="a")
+    vehicle = Vehicle(tenant_id=tenant.id, plate="TEST-1", model="m", brand="b", year=2020, capacity=10,
+                      fuel_type="diesel")
+    route = Route(tenant_id=tenant.id, name="r", origin="A", destination="B", estimated_distance=10,
+                  estimated_time=1)
+    db.add_all([client, driver, vehicle, route])
+    db.flush()
+
+    this_month = current_month()
+    trips = []
+    for month in (this_month, add_months(this_month, 1), add_months(this_month, 2)):
+        departure = datetime(month.year, month.month, 10, 8)
+        trips.append(Trip(
+            tenant_id=tenant.id, client_id=client.id, driver_id=driver.id, vehicle_id=vehicle.id,
+            route_id=route.id, departure_date=departure, estimated_arrival=departure + timedelta(hours=2),
+            status=TripStatus.PLANNED, estimated_fuel_cost=1, estimated_toll_cost=1
+        ))
+    db.add_all(trips)
+    db.flush()
+    return tenant, driver, trips
@@ -0,0 +1,58 @@
+import numpy as np
+from services.analytics_cube import TRIP_COLUMNS, TripCube
+
+
+def _cube() -> TripCube:
+    cube = TripCube(tenant_id=1)
+    cube.columns = {name: np.empty(0, dtype=dtype) for name, dtype in TRIP_COLUMNS.items()}
+    return cube
+
+
+def _batch(ids, revenue):
+    batch = {name: np.zeros(len(ids), dtype=dtype) for name, dtype in TRIP_COLUMNS.items()}
+    batch["id"] = np.asarray(ids, dtype=np.int64)
+    batch["freight_revenue"] = np.asarray(revenue, dtype=np.float64)
+    return batch
+
+
+def _revenue_by_id(cube):
+    return dict(zip(cube.column("id").tolist(), cube.column("freight_revenue").tolist()))
+
+
+def test_upsert_updates_existing_and_appends_new():
+    cube = _cube()
+    cube._upsert(_batch([3, 1, 2], [30, 10, 20]))
+    cube._upsert(_batch([5, 2], [50, 21]))
+
+    assert cube.id_order is None  # ids novos maiores: a coluna segue ordenada
+    assert _revenue_by_id(cube) == {1: 10, 2: 21, 3: 30, 5: 50}
+
+    # Commit fora de ordem: id menor que o último já carregado
+    cube._upsert(_batch([4], [40]))
+    cube._upsert(_batch([4, 1, 6], [41, 11, 60]))
+
+    assert cube.id_order is not None
+    assert _revenue_by_id(cube) == {1: 11, 2: 21, 3: 30, 4: 41, 5: 50, 6: 60}
+    assert cube.size == 6
+
+
+def test_upsert_matches_dict_lookup():
+    rng = np.random.default_rng(0)
+    cube = _cube()
+    expected = {}
+    for _ in range(20):
+        ids = rng.choice(500, size=30, replace=False) + 1
+        revenue = rng.uniform(0, 100, size=30)
+        cube._upsert(_batch(ids, revenue))
+        expected.update(zip(ids.tolist(), revenue.tolist()))
+
+    assert _revenue_by_id(cube) == expected
+
+
+def test_nbytes_counts_id_order():
+    cube = _cube()
+    cube._upsert(_batch([2, 3], [0, 0]))
+    cube._upsert(_batch([1], [0]))
+    columns = sum(array.nbytes for array in cube.columns.values())
+
+    assert cube.nbytes == columns + cube.id_order.nbytes
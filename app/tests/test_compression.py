@@ -0,0 +1,29 @@
+import pytest
+import core.compression as compression
+from core.compression import choose_encoding
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("br;q=1.0, gzip;q=1.0", "br"),
+    ("br;q=0.1, gzip;q=1.0", "gzip"),
+    ("gzip;q=0.9, br;q=0.5", "gzip"),
+    ("gzip;q=0.5, br;q=0.9", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0.5, gzip", "gzip"),
+    ("*, br;q=0", "gzip"),
+    ("identity, gzip;q=0.5", None),
+    ("gzip;q=0, br;q=0", None),
+    ("deflate", None),
+    ("", None),
+])
+def test_choose_encoding_honours_quality(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    assert choose_encoding("br, gzip;q=0.5") == "gzip"
+    assert choose_encoding("br") is None
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import delete, inspect
+from core.database import SessionLocal
+from models.distance_cache import DistanceCacheEntry
+from services.distance_matrix import DistanceMatrixService, HaversineBackend, point_key
+
+POINTS = [(-23.5505, -46.6333), (-22.9068, -43.1729), (-19.9167, -43.9345)]
+
+
+@pytest.fixture
+def cache_cleanup():
+    yield
+    keys = [point_key(p) for p in POINTS]
+    db = SessionLocal()
+    try:
+        db.execute(delete(DistanceCacheEntry).where(DistanceCacheEntry.origin_key.in_(keys)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_matrix_keeps_caller_transaction(db, fleet, cache_cleanup):
+    _, driver, trips = fleet
+    service = DistanceMatrixService(db, backend=HaversineBackend())
+
+    distance, _ = service.matrix(POINTS, POINTS)
+
+    assert distance.shape == (3, 3)
+    # Objetos já carregados continuam válidos: nada de commit na sessão do chamador
+    assert db.in_transaction()
+    assert not inspect(driver).expired
+    assert all(not inspect(trip).expired for trip in trips)
+    # O cache foi gravado fora da transação do chamador
+    assert service._load_cached([point_key(POINTS[0])], [point_key(POINTS[1])])
@@ -0,0 +1,23 @@
+from core.live_events import _trip_event
+from models import TripStatus
+
+
+def test_trip_event_loads_previous_status_of_expired_trip(db, fleet):
+    _, _, trips = fleet
+    trip = trips[0]
+    # Instância expirada (ex.: após commit): o status anterior não está na sessão
+    db.expire(trip)
+
+    trip.status = TripStatus.IN_TRANSIT
+    event = _trip_event(trip, "updated")
+
+    assert event["status"] == "in_transit"
+    assert event["previous_status"] == "planned"
+
+
+def test_trip_event_for_unchanged_status(db, fleet):
+    _, _, trips = fleet
+    trip = trips[0]
+    trip.notes = "sem mudança de status"
+
+    assert _trip_event(trip, "updated")["previous_status"] == "planned"
@@ -0,0 +1,206 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from prometheus_client import REGISTRY
+from core.log_shipping import ElasticsearchLogHandler
+
+
+class FakeElasticsearch:
+    """Servidor HTTP local no lugar do Elasticsearch (grava os corpos do _bulk)
+
+    item_statuses: fila de listas de status por documento, uma por requisição,
+    respondidas como no _bulk (200 com "errors": true e o status em cada item).
+    """
+
+    def __init__(self):
+        self.bodies = []
+        self.accepted = []
+        self.status = 200
+        self.item_statuses = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                documents = [json.loads(line)["message"] for line in body.decode().splitlines()[1::2]]
+                statuses = [201] * len(documents)
+                if fake.status == 200:
+                    fake.bodies.append((self.path, self.headers["Content-Type"], body))
+                    if fake.item_statuses:
+                        statuses = fake.item_statuses.pop(0)
+                    fake.accepted.extend(doc for doc, code in zip(documents, statuses) if code < 300)
+                response = json.dumps({
+                    "errors": any(code >= 300 for code in statuses),
+                    "items": [{"index": {"status": code}} for code in statuses],
+                }).encode()
+                self.send_response(fake.status)
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def documents(self):
+        return list(self.accepted)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps({"message": record.getMessage()})
+
+
+@pytest.fixture
+def elasticsearch():
+    fake = FakeElasticsearch()
+    yield fake
+    fake.close()
+
+
+def _handler(url, **kwargs):
+    handler = ElasticsearchLogHandler(url, **kwargs)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def _record(message, level=logging.INFO):
+    return logging.LogRecord("test", level, __file__, 0, message, None, None)
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida")
+        time.sleep(0.02)
+
+
+def test_ships_full_batches_through_bulk_api(elasticsearch):
+    handler = _handler(elasticsearch.url, batch_size=3, flush_interval=60)
+    try:
+        for i in range(6):
+            handler.emit(_record(f"m{i}"))
+        _wait(lambda: len(elasticsearch.bodies) == 2)
+
+        path, content_type, body = elasticsearch.bodies[0]
+        assert path == "/_bulk"
+        assert content_type == "application/x-ndjson"
+        assert body.endswith(b"\n")
+        assert json.loads(body.splitlines()[0])["index"]["_index"].startswith("tms-logs-")
+        assert elasticsearch.documents() == [f"m{i}" for i in range(6)]
+    finally:
+        handler.close()
+
+
+def test_flushes_partial_batch_after_interval(elasticsearch):
+    handler = _handler(elasticsearch.url, batch_size=100, flush_interval=0.1)
+    try:
+        handler.emit(_record("alone"))
+        _wait(lambda: elasticsearch.documents() == ["alone"])
+    finally:
+        handler.close()
+
+
+def test_spools_while_down_and_replays_on_recovery(elasticsearch, tmp_path):
+    elasticsearch.status = 503
+    handler = _handler(elasticsearch.url, batch_size=2, flush_interval=0.1, spool_dir=str(tmp_path))
+    try:
+        handler.emit(_record("a"))
+        handler.emit(_record("b"))
+        _wait(lambda: list(tmp_path.glob("*.ndjson")))
+        assert elasticsearch.bodies == []
+
+        elasticsearch.status = 200
+        handler._retry_at = 0.0
+        handler.emit(_record("c"))
+        handler.emit(_record("d"))
+        _wait(lambda: sorted(elasticsearch.documents()) == ["a", "b", "c", "d"])
+        _wait(lambda: not list(tmp_path.glob("*.ndjson")))
+    finally:
+        handler.close()
+
+
+def _events(result):
+    return REGISTRY.get_sample_value("tms_log_shipper_events_total", {"result": result}) or 0.0
+
+
+def test_partial_bulk_errors_retry_overloaded_and_count_rejected(elasticsearch):
+    # Documento 1 aceito, 2 inválido (mapeamento), 3 recusado por sobrecarga
+    elasticsearch.item_statuses = [[201, 400, 429]]
+    rejected, retried = _events("rejected"), _events("retried")
+    handler = _handler(elasticsearch.url, batch_size=3, flush_interval=0.05)
+    try:
+        for message in ("ok", "invalid", "overloaded"):
+            handler.emit(_record(message))
+        _wait(lambda: len(elasticsearch.bodies) == 1)
+        _wait(lambda: handler._retry_at > 0)
+        handler._retry_at = 0.0
+
+        _wait(lambda: elasticsearch.documents() == ["ok", "overloaded"])
+        assert _events("rejected") - rejected == 1
+        assert _events("retried") - retried == 1
+        # O documento inválido não é reenviado
+        assert b"invalid" not in elasticsearch.bodies[-1][2]
+    finally:
+        handler.close()
+
+
+def test_client_error_rejects_whole_batch(elasticsearch):
+    elasticsearch.status = 400
+    rejected = _events("rejected")
+    handler = _handler(elasticsearch.url, batch_size=2, flush_interval=60)
+    try:
+        handler.emit(_record("a"))
+        handler.emit(_record("b"))
+        _wait(lambda: _events("rejected") - rejected == 2)
+        assert handler._retry_at == 0.0
+    finally:
+        handler.close()
+
+
+def test_backoff_does_not_busy_wait(elasticsearch):
+    elasticsearch.close()
+    handler = _handler(elasticsearch.url, batch_size=2, flush_interval=0.05, max_buffer=1000)
+    try:
+        handler.emit(_record("a"))
+        handler.emit(_record("b"))
+        _wait(lambda: handler._retry_at > 0)
+        handler._retry_at = time.monotonic() + 30
+        # Buffer acima do tamanho de lote durante o backoff
+        for i in range(10):
+            handler.emit(_record(f"x{i}"))
+
+        started = time.process_time()
+        time.sleep(1.0)
+        assert time.process_time() - started < 0.3
+    finally:
+        handler._retry_at = 0.0
+        handler._closed = True
+        with handler._cond:
+            handler._cond.notify_all()
+
+
+def test_low_priority_dropped_when_buffer_full(elasticsearch):
+    elasticsearch.close()
+    handler = _handler(elasticsearch.url, batch_size=100, flush_interval=60, max_buffer=3, block_timeout=0.05)
+    try:
+        for i in range(5):
+            handler.emit(_record(f"i{i}"))
+        assert len(handler._buffer) == 3
+        handler.emit(_record("w", logging.WARNING))
+        assert len(handler._buffer) == 3
+    finally:
+        handler._closed = True
+        with handler._cond:
+            handler._cond.notify_all()
@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import selectinload
+from core.celery_app import celery_app
+from core.config import settings
+from core.query_tracker import NPlusOneError, get_current_stats, install_query_tracking, track_queries
+from models import Client, Tenant
+
+THRESHOLD = 3
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tracking(engine):
+    install_query_tracking(engine)
+
+
+@pytest.fixture
+def clients(db):
+    tenant = Tenant(name="t", slug="query-tracker-test", company_name="t", cnpj="query-tracker-test")
+    db.add(tenant)
+    db.flush()
+    clients = [
+        Client(tenant_id=tenant.id, name=f"c{i}", document=f"query-tracker-{i}", contact_name="c", phone="1",
+               address="a", city="c", state="SP", zip_code="1")
+        for i in range(THRESHOLD + 2)
+    ]
+    db.add_all(clients)
+    db.flush()
+    db.expire_all()
+    return [client.id for client in clients]
+
+
+def _lazy_load(db, client_ids):
+    """N+1 clássico: uma consulta de viagens por cliente"""
+    for client in db.query(Client).filter(Client.id.in_(client_ids)).all():
+        list(client.trips)
+
+
+def _eager_load(db, client_ids):
+    for client in db.query(Client).options(selectinload(Client.trips)).filter(Client.id.in_(client_ids)).all():
+        list(client.trips)
+
+
+def test_strict_mode_raises_on_n_plus_one(db, clients):
+    with pytest.raises(NPlusOneError):
+        with track_queries("lazy", threshold=THRESHOLD, strict=True) as stats:
+            _lazy_load(db, clients)
+
+    assert stats.query_count == 1 + THRESHOLD
+    assert list(stats.flagged.values()) == [THRESHOLD]
+    # A conexão continua utilizável após o erro
+    assert db.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_strict_mode_quiet_without_repetition(db, clients):
+    with track_queries("eager", threshold=THRESHOLD, strict=True) as stats:
+        _eager_load(db, clients)
+
+    assert stats.query_count == 2
+    assert not stats.flagged
+
+
+def test_lenient_mode_flags_without_raising(db, clients):
+    with track_queries("lazy", threshold=THRESHOLD, strict=False) as stats:
+        _lazy_load(db, clients)
+
+    assert stats.query_count == 1 + len(clients)
+    assert list(stats.flagged.values()) == [len(clients)]
+    assert get_current_stats() is None
+
+
+@pytest.fixture
+def strict_tasks(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", THRESHOLD)
+    monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_STRICT", True)
+
+
+def _run_task(name, body):
+    """Executar body como tarefa Celery (eager), devolvendo o resultado e o QueryStats usado"""
+    seen = []
+
+    def run():
+        seen.append(get_current_stats())
+        body()
+
+    task = celery_app.task(name=f"tests.query_tracker.{name}")(run)
+    try:
+        return task.apply(), seen[0]
+    finally:
+        celery_app.tasks.pop(task.name, None)
+
+
+def test_celery_signals_track_each_task(db, clients, strict_tasks):
+    result, stats = _run_task("eager", lambda: _eager_load(db, clients))
+
+    assert result.successful()
+    assert stats.kind == "celery"
+    assert stats.name == "tests.query_tracker.eager"
+    assert stats.query_count == 2
+    assert get_current_stats() is None
+
+
+def test_celery_signals_strict_mode_fails_task(db, clients, strict_tasks):
+    result, stats = _run_task("lazy", lambda: _lazy_load(db, clients))
+
+    assert result.failed()
+    assert isinstance(result.result, NPlusOneError)
+    assert stats.flagged
+    # O postrun desfaz o contexto mesmo com a tarefa falhando
+    assert get_current_stats() is None
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from core.row_security import TENANT_INFO_KEY, TENANT_SETTING, scope_session
+
+
+def _tenant_setting(db):
+    return db.execute(text(f"SELECT current_setting('{TENANT_SETTING}', true)")).scalar()
+
+
+def test_scope_session_applies_to_open_transaction(db, fleet):
+    tenant, _, _ = fleet
+    # Como na requisição: usuário e tenant já carregados, transação aberta
+    assert db.in_transaction()
+
+    scope_session(db, tenant.id)
+
+    assert db.info[TENANT_INFO_KEY] == tenant.id
+    assert _tenant_setting(db) == str(tenant.id)
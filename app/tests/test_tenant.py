@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+import core.tenant as tenant_module
+from core.security import create_access_token
+from core.tenant import get_token_tenant_id
+
+
+@pytest.fixture
+def status_loads(monkeypatch):
+    """Consultas ao banco pelo estado do tenant (substituídas por um dicionário)"""
+    errors = {}
+    loads = []
+
+    def load(tenant_id):
+        loads.append(tenant_id)
+        return errors.get(tenant_id)
+
+    monkeypatch.setattr(tenant_module, "_load_tenant_status", load)
+    monkeypatch.setattr(tenant_module, "_tenant_status", type(tenant_module._tenant_status)())
+    return errors, loads
+
+
+def _resolve(claims):
+    return asyncio.run(get_token_tenant_id(create_access_token(claims)))
+
+
+def test_token_tenant_resolved_from_claim_and_cached(status_loads):
+    _, loads = status_loads
+
+    assert [_resolve({"sub": "u", "tenant_id": 7}) for _ in range(3)] == [7, 7, 7]
+    assert loads == [7]
+
+
+def test_token_without_tenant_claim_is_rejected(status_loads):
+    with pytest.raises(HTTPException) as error:
+        _resolve({"sub": "u"})
+
+    assert error.value.status_code == 401
+    assert status_loads[1] == []
+
+
+def test_blocked_tenant_error_is_cached(status_loads):
+    errors, loads = status_loads
+    errors[8] = (402, "trial expirado")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            _resolve({"sub": "u", "tenant_id": 8})
+        assert error.value.status_code == 402
+    assert loads == [8]
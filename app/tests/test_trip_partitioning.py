@@ -0,0 +1,110 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event, text
+from services.booking import booking_conflicts
+from services.dispatch import DispatchOptimizer
+from services.partitions import add_months, current_month, partition_name
+from tasks.reports import generate_trips_report
+
+
+@pytest.fixture(scope="module", autouse=True)
+def partitioned(engine):
+    with engine.connect() as conn:
+        partitioned = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table JOIN pg_class ON oid = partrelid WHERE relname = 'trips')"
+        )).scalar()
+    if not partitioned:
+        pytest.skip("trips não particionada (alembic upgrade head)")
+
+
+@pytest.fixture
+def fleet(fleet, db):
+    # Estatísticas atualizadas para o planner escolher os planos reais
+    db.execute(text("ANALYZE trips, trip_bookings"))
+    return fleet
+
+
+def _capture(db, call):
+    """Executar call e devolver os SELECTs em trips emitidos por ele"""
+    statements = []
+    conn = db.connection()
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM trips" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", listener)
+    try:
+        call()
+    finally:
+        event.remove(conn, "before_cursor_execute", listener)
+    assert statements
+    return statements[-1]
+
+
+def _scanned_partitions(db, statement, parameters):
+    """Partições de trips que restam no plano após a poda"""
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scanned = set()
+
+    def walk(node):
+        relation = node.get("Relation Name", "")
+        if relation.startswith("trips_"):
+            scanned.add(relation)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scanned
+
+
+def test_report_query_scans_only_requested_month(db, fleet):
+    month = current_month()
+    last_day = add_months(month, 1) - timedelta(days=1)
+    statement, parameters = _capture(db, lambda: generate_trips_report(db, month, last_day))
+
+    assert _scanned_partitions(db, statement, parameters) == {partition_name("trips", month)}
+
+
+def test_booking_conflicts_probe_one_partition(db, fleet):
+    _, driver, trips = fleet
+    trip = trips[1]
+    statement, parameters = _capture(db, lambda: booking_conflicts(
+        db, driver.id, None, trip.departure_date, trip.estimated_arrival
+    ))
+
+    assert _scanned_partitions(db, statement, parameters) == {
+        partition_name("trips", trip.departure_date.date())
+    }
+
+
+def test_dispatch_busy_trips_probe_one_partition(db, fleet):
+    tenant, _, trips = fleet
+    trip = trips[2]
+    day_start = datetime.combine(trip.departure_date.date(), datetime.min.time())
+    statement, parameters = _capture(db, lambda: DispatchOptimizer(db)._busy_trips(tenant.id, day_start, []))
+
+    assert _scanned_partitions(db, statement, parameters) == {
+        partition_name("trips", trip.departure_date.date())
+    }
+
+
+def test_apply_moves_trip_to_new_departure(db, fleet):
+    tenant, driver, trips = fleet
+    trip = trips[0]
+    # Nova data no mês seguinte: a linha muda de partição
+    departure = trips[1].departure_date + timedelta(days=5)
+    DispatchOptimizer(db)._apply(tenant.id, [trip], [{
+        "vehicle_id": trip.vehicle_id,
+        "driver_id": driver.id,
+        "trips": [{"trip_id": trip.id, "departure_date": departure,
+                   "estimated_arrival": departure + timedelta(hours=3)}],
+    }])
+
+    row = db.execute(text("SELECT tableoid::regclass::text, departure_date FROM trips WHERE id = :id"),
+                     {"id": trip.id}).one()
+    assert row == (partition_name("trips", departure.date()), departure)
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pytest
+import services.vrp as vrp
+from services.vrp import VRPInstance, solve_parallel
+
+
+def _instance(stops: int = 8) -> VRPInstance:
+    rng = np.random.default_rng(0)
+    coords = np.vstack([[50.0, 50.0], rng.uniform(0, 100, (stops, 2))])
+    index = np.arange(1, stops + 1)
+    return VRPInstance(
+        pickup=index,
+        dropoff=index,
+        demand=np.ones(stops),
+        earliest=np.full(stops, 1.0),
+        latest=np.full(stops, 10.0),
+        service=np.full(stops, 0.1),
+        capacities=np.full(3, 10.0),
+        coords=coords,
+        depot=0,
+    )
+
+
+@pytest.fixture
+def fresh_pool():
+    yield
+    if vrp._pool is not None:
+        vrp._discard_pool(vrp._pool)
+
+
+def test_solve_parallel_replaces_broken_pool(fresh_pool):
+    broken = vrp._get_pool(1)
+    # Worker morto (como num OOM kill): o pool fica inutilizável
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    solution = solve_parallel(_instance(), time_budget=0.2, starts=2, workers=1)
+
+    assert not solution.unassigned
+    assert vrp._pool is not None and vrp._pool is not broken
+
+
+def test_solve_parallel_falls_back_in_process(monkeypatch):
+    calls = []
+
+    def always_broken(*args):
+        calls.append(args)
+        raise BrokenProcessPool("worker morto")
+
+    monkeypatch.setattr(vrp, "_solve_in_pool", always_broken)
+
+    solution = solve_parallel(_instance(), time_budget=0.2, starts=2, workers=1)
+
+    assert len(calls) == 2
+    assert not solution.unassigned
+    assert solution.seed == 0
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tempo de inicialização da API
+Mede, em interpretadores novos, o import de main.py (o que cada worker/pod faz no boot)
+e verifica se dependências pesadas ficaram fora do caminho de inicialização
+
+Uso: python benchmarks/startup_time.py [execuções]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+# Carregados apenas no primeiro uso (tarefas, notificações, geração de arquivos, cálculo numérico)
+DEFERRED_MODULES = ["celery", "httpx", "reportlab", "openpyxl", "numpy"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "modules": len(sys.modules),
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def run_once() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    run_once()  # aquecimento (bytecode em __pycache__)
+    results = [run_once() for _ in range(runs)]
+    timings = sorted(r["import_ms"] for r in results)
+
+    print(f"Execuções: {runs}")
+    print(f"import main: mediana {statistics.median(timings):.1f} ms, "
+          f"mín {timings[0]:.1f} ms, máx {timings[-1]:.1f} ms")
+    print(f"Módulos carregados: {results[-1]['modules']}")
+    loaded = results[-1]["loaded"]
+    print(f"Dependências pesadas no boot: {', '.join(loaded) if loaded else 'nenhuma'}")
+
+
+if __name__ == "__main__":
+    main()
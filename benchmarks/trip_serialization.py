@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização de uma página de viagens (TripWithRelations)
+Compara o caminho antigo (dict do ORM + JSONResponse) com o atual
+(model_validate direto dos atributos + ORJSONResponse)
+
+Uso: python benchmarks/trip_serialization.py [linhas] [repetições]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from models.client import Client
+from models.driver import Driver
+from models.route import Route
+from models.trip import Trip, TripStatus
+from models.vehicle import Vehicle
+from schemas.trip import TripWithRelations
+
+# Mesmo tratamento do response_model=List[TripWithRelations] nas rotas
+page_adapter = TypeAdapter(List[TripWithRelations])
+
+
+def build_trips(rows: int):
+    """Montar viagens transitórias com as relações já carregadas"""
+    client = Client(id=1, tenant_id=1, name="Cliente Exemplo")
+    driver = Driver(id=1, tenant_id=1, name="Motorista Exemplo")
+    vehicle = Vehicle(id=1, tenant_id=1, plate="ABC1D23")
+    route = Route(id=1, tenant_id=1, name="São Paulo - Campinas")
+    now = datetime(2024, 1, 1, 8, 0)
+
+    trips = []
+    for i in range(rows):
+        trips.append(Trip(
+            id=i + 1,
+            tenant_id=1,
+            client_id=1,
+            driver_id=1,
+            vehicle_id=1,
+            route_id=1,
+            client=client,
+            driver=driver,
+            vehicle=vehicle,
+            route=route,
+            departure_date=now + timedelta(hours=i),
+            estimated_arrival=now + timedelta(hours=i + 2),
+            actual_departure=now + timedelta(hours=i),
+            actual_arrival=now + timedelta(hours=i + 2, minutes=15),
+            status=TripStatus.COMPLETED,
+            estimated_fuel_cost=820.4,
+            estimated_toll_cost=95.6,
+            actual_fuel_cost=845.1,
+            actual_toll_cost=95.6,
+            daily_allowance_cost=120.0,
+            other_costs=40.0,
+            freight_revenue=3500.0,
+            notes="Entrega sem ocorrências",
+            created_at=now,
+            updated_at=now,
+        ))
+    return trips
+
+
+def legacy_path(trips):
+    """Caminho antigo: dict do ORM + response_model + JSONResponse
+
+    O FastAPI converte os modelos retornados em dicts, valida de novo contra o
+    response_model e serializa com json.dumps
+    """
+    items = [
+        TripWithRelations(
+            **{k: v for k, v in trip.__dict__.items() if not k.startswith("_")},
+            client_name=trip.client.name,
+            driver_name=trip.driver.name,
+            vehicle_plate=trip.vehicle.plate,
+            route_name=trip.route.name
+        )
+        for trip in trips
+    ]
+    content = [item.model_dump() for item in items]
+    return JSONResponse(page_adapter.dump_python(page_adapter.validate_python(content), mode="json")).body
+
+
+def fast_path(trips):
+    """Caminho atual: validação direta do ORM + ORJSONResponse"""
+    items = page_adapter.validate_python(trips)
+    return ORJSONResponse(page_adapter.dump_python(items, mode="json")).body
+
+
+def measure(fn, trips, repeats: int) -> float:
+    fn(trips)  # aquecimento
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(trips)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    trips = build_trips(rows)
+
+    legacy_ms = measure(legacy_path, trips, repeats)
+    fast_ms = measure(fast_path, trips, repeats)
+
+    print(f"Linhas: {rows} (melhor de {repeats} execuções)")
+    print(f"Antigo (dict + JSONResponse):              {legacy_ms:8.2f} ms")
+    print(f"Atual (from_attributes + ORJSONResponse):  {fast_ms:8.2f} ms")
+    print(f"Ganho: {legacy_ms / fast_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
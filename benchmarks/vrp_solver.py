@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark do solver de roteirização (services/vrp.py)
+Instâncias sintéticas com base central, paradas uniformes + agrupadas (estilo Solomon RC),
+demanda de 1 a 10 t, janelas de 2 a 4 h numa jornada de 8 h e frota homogênea de 100 t
+
+Uso: python benchmarks/vrp_solver.py [paradas ...] [--budget segundos] [--starts n]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.vrp import VRPInstance, solve, solve_parallel  # noqa: E402
+
+AREA_KM = 200.0
+VEHICLE_CAPACITY = 100.0
+
+
+def make_instance(stops: int, seed: int = 0) -> VRPInstance:
+    rng = np.random.default_rng(seed)
+    uniform = rng.uniform(0, AREA_KM, (stops // 2, 2))
+    centers = rng.uniform(0.1 * AREA_KM, 0.9 * AREA_KM, (max(stops // 200, 1), 2))
+    clustered = centers[rng.integers(0, len(centers), stops - len(uniform))] + rng.normal(0, 8, (stops - len(uniform), 2))
+    points = np.clip(np.vstack([uniform, clustered]), 0, AREA_KM)
+    coords = np.vstack([[AREA_KM / 2, AREA_KM / 2], points])
+
+    demand = rng.integers(1, 11, stops).astype(float)
+    # Janela começa depois do tempo de chegada a partir da base (instância sempre viável)
+    reach = np.hypot(*(points - AREA_KM / 2).T) / 60.0
+    earliest = reach + rng.uniform(0, 6, stops)
+    width = rng.uniform(2, 4, stops)
+    fleet = int(np.ceil(demand.sum() / VEHICLE_CAPACITY * 1.6))
+
+    index = np.arange(1, stops + 1)
+    return VRPInstance(
+        pickup=index,
+        dropoff=index,
+        demand=demand,
+        earliest=earliest,
+        latest=earliest + width,
+        service=np.full(stops, 0.1),
+        capacities=np.full(fleet, VEHICLE_CAPACITY),
+        coords=coords,
+        depot=0,
+        speed_kmh=60.0,
+        horizon=14.0,
+        cost_per_km=3.5,
+        vehicle_fixed_cost=300.0,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("stops", nargs="*", type=int, default=[1000, 2000, 5000, 10000])
+    parser.add_argument("--budget", type=float, default=None, help="segundos (padrão: 5 + 1 por mil paradas)")
+    parser.add_argument("--starts", type=int, default=1, help="execuções paralelas no pool de processos")
+    args = parser.parse_args()
+
+    print(f"{'paradas':>8} {'rotas':>6} {'fora':>5} {'savings':>12} {'final':>12} {'ganho':>7} "
+          f"{'movim.':>7} {'vizinh.':>8} {'constr.':>8} {'total':>7}")
+    for stops in args.stops:
+        instance = make_instance(stops)
+        budget = args.budget or 5 + stops / 1000
+        started = time.perf_counter()
+        if args.starts > 1:
+            solution = solve_parallel(instance, budget, args.starts, args.starts)
+        else:
+            solution = solve(instance, budget)
+        wall = time.perf_counter() - started
+        gain = (1 - solution.cost / solution.initial_cost) * 100
+        print(f"{stops:>8} {len(solution.routes):>6} {len(solution.unassigned):>5} "
+              f"{solution.initial_cost:>12,.0f} {solution.cost:>12,.0f} {gain:>6.1f}% "
+              f"{solution.iterations:>7} {solution.stats['neighbors_seconds']:>7.2f}s "
+              f"{solution.stats['construct_seconds']:>7.2f}s {wall:>6.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,21 +20,14 @@ done
 
 echo "✅ PostgreSQL está pronto!"
 
-# Criar tabelas diretamente
-echo "📊 Criando tabelas no banco..."
-docker compose exec -T app python -c "
-import sys
-sys.path.append('/app')
-from core.database import engine
-from models import Base
-Base.metadata.create_all(bind=engine)
-print('Tabelas criadas com sucesso!')
-"
+# Aplicar migrações (schema gerenciado pelo Alembic)
+echo "📊 Aplicando migrações do banco..."
+docker compose exec -T app alembic upgrade head
 
 if [ $? -eq 0 ]; then
-    echo "✅ Tabelas criadas com sucesso"
+    echo "✅ Migrações aplicadas com sucesso"
 else
-    echo "❌ Erro ao criar tabelas"
+    echo "❌ Erro ao aplicar migrações"
     exit 1
 fi
 